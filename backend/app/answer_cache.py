@@ -0,0 +1,202 @@
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+import numpy as np
+from app.gemini_api import get_gemini_response
+from app.prompts import get_all_prompts
+from common.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+# ✅ Sık sorulan sorular için anlamsal cevap cache'i ayarları (ortam değişkenleriyle ayarlanabilir)
+# Varsayılan kapalı: yanlış eşleşme başka bir hastalığın / yaş grubunun tavsiyesini döndürür
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "0") == "1"
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "2000"))
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+# chat_prompts'tan üretilen (editör onaylı sık sorular) kayıtlar daha uzun tutulur
+ANSWER_CACHE_PROMPT_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_PROMPT_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+# İçerik kelimeleri birebir aynı olan sorular arasında kosinüs benzerliği bu değeri geçerse
+# cache'ten cevap verilir (1.0 = birebir aynı)
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.9"))
+# Hashing vektörünün boyutu (bellek: boyut x kayıt sayısı x 4 bayt)
+ANSWER_CACHE_DIM = int(os.getenv("ANSWER_CACHE_DIM", "2048"))
+
+# Bu benzerliğin üstündeki yeni kayıt eskisinin yerine yazılır (aynı soru iki kez saklanmasın)
+_DUPLICATE_SIMILARITY = 0.98
+_WORD_PATTERN = re.compile(r"\w+")
+# Anlamı taşımayan sık kelimeler: yalnızca kelime olarak ve düşük ağırlıkla sayılır
+_STOPWORDS = frozenset(
+    "a an the i me my you your is are am was were be do does did can could should would will "
+    "how what why when which who to of for in on at with and or it this that there about".split()
+)
+
+
+def _weighted_features(text: str):
+    """
+    (özellik, ağırlık) çiftleri: içerik kelimeleri ve bunların karakter 3-gram'ları
+    (yazım hataları ve ek/çoğul farkları tolere edilir), sık kelimeler düşük ağırlıkla.
+    """
+    for word in _WORD_PATTERN.findall(text.lower()):
+        if word in _STOPWORDS:
+            yield f"w:{word}", 0.5
+            continue
+        yield f"w:{word}", 2.0
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            yield padded[i:i + 3], 1.0
+
+
+def content_key(text: str) -> int:
+    """
+    Sorunun içerik kelimeleri kümesine (küçük harf, sık kelimeler hariç) ait sabit bir anahtar.
+    Yalnızca anahtarı aynı sorular eşleşir: hastalık adı, yaş / sayı ya da olumsuzluk
+    ("not", "can't" → "t") farkı olan sorular benzerlikleri ne olursa olsun birbirinin cevabını almaz.
+    """
+    words = {word for word in _WORD_PATTERN.findall(text.lower()) if word not in _STOPWORDS}
+    return zlib.crc32(" ".join(sorted(words)).encode("utf-8"))
+
+
+def embed(text: str, dim: int = ANSWER_CACHE_DIM) -> np.ndarray:
+    """
+    Metni ağ / model gerektirmeyen, L2 normalize edilmiş bir hashing vektörüne çevirir.
+    crc32 kullanılır (Python'un hash()'i süreçler arasında değişir).
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature, weight in _weighted_features(text):
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dim] += weight if h & 0x80000000 else -weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class AnswerCache:
+    """
+    Soru → cevap çiftlerini soru vektörleriyle saklar; içerik kelimeleri aynı olan ve
+    benzerliği threshold'u geçen en yakın sorunun cevabı döner. Vektörler tek bir (kapasite, dim) matriste tutulur,
+    arama tek bir matris-vektör çarpımıdır. Her kaydın kendi süresi vardır (varsayılan ttl_seconds);
+    kapasite dolunca süresi ilk dolacak kayıt silinir.
+    """
+
+    def __init__(self, max_entries: int = ANSWER_CACHE_SIZE, ttl_seconds: int = ANSWER_CACHE_TTL_SECONDS,
+                 threshold: float = ANSWER_CACHE_THRESHOLD, dim: int = ANSWER_CACHE_DIM):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((self.max_entries, dim), dtype=np.float32)
+        self._expires_at = np.zeros(self.max_entries)  # 0 → boş slot
+        self._content_keys = np.zeros(self.max_entries, dtype=np.int64)
+        self._entries = [None] * self.max_entries  # slot -> {"question", "answer", "source"}
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, question: str):
+        """En yakın sorunun cevabını döner; threshold'u geçen canlı kayıt yoksa None."""
+        with self._lock:
+            slot = self._match_locked(question)
+            if slot is not None:
+                self._hits += 1
+                record_cache("chat_answer", "hit")
+                return self._entries[slot]["answer"]
+            self._misses += 1
+            record_cache("chat_answer", "miss")
+            return None
+
+    def contains(self, question: str) -> bool:
+        """İstatistiklere yansımadan, soruya threshold içinde bir cevap var mı."""
+        with self._lock:
+            return self._match_locked(question) is not None
+
+    def put(self, question: str, answer: str, source: str = "chat", ttl_seconds: int = None):
+        """
+        Kaydı ekler (incremental; index yeniden kurulmaz).
+        :param source: Kaydın kaynağı ("chat" → canlı trafik, "prompt" → chat_prompts)
+        :param ttl_seconds: Bu kaydın ömrü (verilmezse self.ttl_seconds)
+        """
+        vector = embed(question, self.dim)
+        if not vector.any():
+            return
+        content = content_key(question)
+        with self._lock:
+            slot, similarity = self._nearest_locked(vector, content)
+            if slot is None or similarity < _DUPLICATE_SIMILARITY:
+                slot = self._free_slot_locked()
+            self._vectors[slot] = vector
+            self._expires_at[slot] = time.time() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+            self._content_keys[slot] = content
+            self._entries[slot] = {"question": question, "answer": answer, "source": source}
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            live = int(np.count_nonzero(self._live_mask_locked()))
+            return {
+                "entries": live,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "threshold": self.threshold,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _match_locked(self, question: str):
+        slot, similarity = self._nearest_locked(embed(question, self.dim), content_key(question))
+        return slot if slot is not None and similarity >= self.threshold else None
+
+    def _live_mask_locked(self) -> np.ndarray:
+        return self._expires_at[:self._size] > time.time()
+
+    def _nearest_locked(self, vector: np.ndarray, content: int):
+        if self._size == 0:
+            return None, 0.0
+        similarities = self._vectors[:self._size] @ vector
+        similarities[~self._live_mask_locked() | (self._content_keys[:self._size] != content)] = -1.0
+        slot = int(np.argmax(similarities))
+        if similarities[slot] < 0:
+            return None, 0.0
+        return slot, float(similarities[slot])
+
+    def _free_slot_locked(self) -> int:
+        """Boş ya da süresi dolmuş slot; yoksa süresi ilk dolacak kayıt silinir."""
+        if self._size < self.max_entries:
+            self._size += 1
+            return self._size - 1
+        expired = np.flatnonzero(~self._live_mask_locked())
+        if len(expired):
+            return int(expired[0])
+        return int(np.argmin(self._expires_at))
+
+
+answer_cache = AnswerCache()
+
+
+def is_cacheable(history: list, summary: str, reply: str) -> bool:
+    """
+    Yalnızca bağlamsız (sohbetin ilk mesajına verilmiş) ve hatasız cevaplar saklanır;
+    geçmişe dayanan cevaplar başka kullanıcıya uygun olmayabilir.
+    """
+    return not history and not summary and bool(reply) and not reply.startswith("⚠️")
+
+
+async def seed_prompt(prompt: str):
+    """Soruyu bağlamsız olarak cevaplatıp cache'e ekler (zaten cevabı varsa LLM çağrılmaz)."""
+    if answer_cache.contains(prompt):
+        return
+    reply = await get_gemini_response([], prompt)
+    if is_cacheable([], "", reply):
+        answer_cache.put(prompt, reply, source="prompt", ttl_seconds=ANSWER_CACHE_PROMPT_TTL_SECONDS)
+
+
+async def seed_from_prompts():
+    """chat_prompts koleksiyonundaki soruları cache'e doldurur (başlangıçta arka planda çağrılır)."""
+    for entry in await get_all_prompts():
+        try:
+            await seed_prompt(entry["prompt"])
+        except Exception as e:
+            logger.warning("answer_cache_seed_failed prompt=%r error=%s", entry["prompt"], e)
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, EmailStr
-from app.db import users_collection
-from app.utils import create_access_token  # ✅ düzelttik
+from pymongo.errors import DuplicateKeyError
+from app.users import get_user_by_email, create_user, update_user
+from app.scheduler import admit
+from app.utils import create_access_token, hash_password_async, verify_and_update_password  # ✅ düzelttik
 
 auth_router = APIRouter()
 
@@ -14,27 +16,38 @@ class UserLogin(BaseModel):
     email: EmailStr
     password: str
 
-@auth_router.post("/register")
+@auth_router.post("/register", dependencies=[Depends(admit("db"))])
 async def register_user(user: UserRegister):
-    if users_collection.find_one({"email": user.email}):
+    if await get_user_by_email(user.email):
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    users_collection.insert_one({
-        "username": user.username,
-        "email": user.email,
-        "password": user.password
-    })
+    try:
+        await create_user({
+            "username": user.username,
+            "email": user.email,
+            "password": await hash_password_async(user.password)  # ✅ bcrypt, event loop dışında
+        })
+    except DuplicateKeyError:
+        # ✅ Kontrol ile insert arasında aynı email'le eşzamanlı kayıt (unique index yakaladı)
+        raise HTTPException(status_code=400, detail="Email already registered")
 
     # ✅ JWT üret
     token = create_access_token({"sub": user.email})
 
     return {"message": "User registered successfully", "token": token}
 
-@auth_router.post("/login")
+@auth_router.post("/login", dependencies=[Depends(admit("db"))])
 async def login_user(user: UserLogin):
-    db_user = users_collection.find_one({"email": user.email})
-    if not db_user or db_user["password"] != user.password:
+    db_user = await get_user_by_email(user.email)
+    if not db_user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    valid, new_hash = await verify_and_update_password(user.password, db_user["password"])
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        # ✅ Düz metin / eski work factor'lü şifre yeni hash ile değiştirilir
+        await update_user(user.email, {"password": new_hash})
 
     # ✅ JWT üret
     token = create_access_token({"sub": user.email})
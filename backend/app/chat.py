@@ -1,15 +1,99 @@
-from datetime import datetime
-from app.db import chat_collection
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from app.db import db, chat_collection
 
-def get_chat_history(user_id):
+summary_collection = db["chat_summaries"]  # Kullanıcı başına rolling özet
+
+# ✅ Chat context'i için DB'den çekilecek en fazla mesaj sayısı. Yalnızca özete katılmamış mesajlar
+# okunur ve token bütçesiyle kırpılır; bu sayı sadece güvenlik sınırıdır
+CHAT_CONTEXT_MESSAGES = 200
+
+async def ensure_chat_indexes():
+    """(user_id, timestamp) bileşik index'ini oluşturur (uygulama başlarken çağrılır)"""
+    # _id, aynı timestamp'li mesajların sıralaması da index'ten gelsin diye sonda
+    await chat_collection.create_index([("user_id", ASCENDING), ("timestamp", ASCENDING), ("_id", ASCENDING)])
+    await summary_collection.create_index("user_id", unique=True)
+
+async def get_chat_history(user_id):
     """Belirli kullanıcıya ait geçmiş mesajları döndür"""
-    return list(chat_collection.find({"user_id": user_id}, {"_id": 0}))
+    return await chat_collection.find({"user_id": user_id}, {"_id": 0}).sort("timestamp", ASCENDING).to_list()
+
+async def get_recent_messages(user_id, limit: int = CHAT_CONTEXT_MESSAGES, after: str = None):
+    """
+    Kullanıcının son `limit` mesajını eski → yeni sırasıyla döndür (index üzerinden)
+    :param limit: 0 → sınır yok
+    :param after: Verilirse yalnızca bu timestamp'ten yeni mesajlar (ör. özetin summarized_until'i)
+    """
+    query = {"user_id": user_id}
+    if after:
+        query["timestamp"] = {"$gt": after}
+    cursor = (
+        chat_collection.find(query, {"_id": 0})
+        .sort([("timestamp", DESCENDING), ("_id", DESCENDING)])
+        .limit(limit)
+    )
+    return (await cursor.to_list())[::-1]
+
+async def get_chat_history_page(user_id, limit: int, before: str = None):
+    """
+    Geçmişi sayfa sayfa döndür (en yeni sayfa önce gelir, sayfa içi eski → yeni).
+    :param before: Bir önceki sayfanın cursor'ı (bu mesajdan eski mesajlar gelir)
+    :return: (mesajlar, sonraki sayfanın cursor'ı ya da None)
+    """
+    query = {"user_id": user_id}
+    if before:
+        # Cursor "timestamp|_id" biçiminde; aynı timestamp'li mesajlar _id ile ayrılır
+        timestamp, _, last_id = before.partition("|")
+        query["$or"] = [
+            {"timestamp": {"$lt": timestamp}},
+            {"timestamp": timestamp, "_id": {"$lt": ObjectId(last_id)}},
+        ]
 
-def add_message(user_id, role, message):
+    page = await (
+        chat_collection.find(query)
+        .sort([("timestamp", DESCENDING), ("_id", DESCENDING)])
+        .limit(limit + 1)
+        .to_list()
+    )
+    has_more = len(page) > limit
+    page = page[:limit]
+    next_cursor = f"{page[-1]['timestamp']}|{page[-1]['_id']}" if has_more else None
+
+    for message in page:
+        message.pop("_id", None)
+    return page[::-1], next_cursor
+
+async def add_message(user_id, role, message):
     """Mesajı MongoDB’ye kaydet"""
-    chat_collection.insert_one({
-        "user_id": user_id,
-        "role": role,
-        "message": message,
-        "timestamp": datetime.utcnow().isoformat()
-    })
+    await add_messages(user_id, [(role, message)])
+
+async def add_messages(user_id, messages):
+    """
+    Bir chat turundaki mesajları tek bir insert_many ile kaydet.
+    :param messages: [(role, message), ...] sırasıyla
+    """
+    now = datetime.utcnow()
+    await chat_collection.insert_many([
+        {
+            "user_id": user_id,
+            "role": role,
+            "message": message,
+            # Aynı turdaki mesajların sırası timestamp'ten de anlaşılsın diye mikro saniye farkla
+            "timestamp": (now + timedelta(microseconds=i)).isoformat()
+        }
+        for i, (role, message) in enumerate(messages)
+    ])
+
+async def get_chat_summary(user_id):
+    """Kullanıcının rolling özetini döndür (yoksa boş özet)"""
+    doc = await summary_collection.find_one({"user_id": user_id}, {"_id": 0})
+    return doc or {"user_id": user_id, "summary": "", "summarized_until": ""}
+
+async def save_chat_summary(user_id, summary, summarized_until):
+    """Özeti ve özete katılan son mesajın timestamp'ini kaydet"""
+    await summary_collection.update_one(
+        {"user_id": user_id},
+        {"$set": {"summary": summary, "summarized_until": summarized_until}},
+        upsert=True,
+    )
@@ -1,12 +1,18 @@
 # app/chatbot_router.py
-from fastapi import APIRouter, HTTPException, Header, Depends
+from fastapi import APIRouter, HTTPException, Header, Depends, Query, Request, Response, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 from app.utils import decode_token
-from app.chat import get_chat_history, add_message
+from app.chat import get_recent_messages, get_chat_history_page, get_chat_summary, add_messages
 from app.prompts import save_prompt, get_all_prompts
-from app.gemini_api import get_gemini_response
+from app.gemini_api import get_gemini_response, stream_gemini_response, update_chat_summary
+from app.scheduler import admit, run_admitted, try_rate_limit
+from app.answer_cache import ANSWER_CACHE_ENABLED, answer_cache, is_cacheable, seed_prompt
+from common.metrics import stage
 from bson import ObjectId
+from bson.errors import InvalidId
+import json
 
 chatbot_router = APIRouter()
 
@@ -31,28 +37,109 @@ def get_current_user(authorization: str = Header(...)):
     return email
 
 # ✅ Chat endpoint
-@chatbot_router.post("/chat")
-async def chat_endpoint(req: ChatRequest, user_email: str = Depends(get_current_user)):
+@chatbot_router.post("/chat", dependencies=[Depends(admit("llm"))])
+async def chat_endpoint(req: ChatRequest, background_tasks: BackgroundTasks, user_email: str = Depends(get_current_user)):
     if not req.message.strip():
         raise HTTPException(status_code=400, detail="Message cannot be empty")
 
-    # ✅ Geçmişi al (DB'den)
-    history = get_chat_history(user_email)
-    past_texts = [h["message"] for h in history]
+    # ✅ Context için sadece son mesajları + eski mesajların özetini al (DB'den, index üzerinden)
+    with stage("chat", "db_read"):
+        # Özete katılmış mesajlar okunmaz; katılmamışlar bütçeyi aşsa da prompt'a girer
+        summary_doc = await get_chat_summary(user_email)
+        history = await get_recent_messages(user_email, after=summary_doc["summarized_until"])
+        summary = summary_doc["summary"]
 
-    # ✅ Gemini’den cevap al
-    reply = get_gemini_response(past_texts, req.message)
+    # ✅ Sohbetin ilk mesajı sık sorulan bir soruya çok benziyorsa cevap cache'ten gelir (LLM çağrılmaz)
+    reply = _cached_answer(req.message, history, summary, "chat")
+    if reply is None:
+        # ✅ Gemini’den cevap al
+        with stage("chat", "llm"):
+            reply = await get_gemini_response(history, req.message, summary)
+        _remember_answer(req.message, history, summary, reply)
 
-    # ✅ Mesajları DB’ye kaydet
-    add_message(user_email, "user", req.message)
-    add_message(user_email, "assistant", reply)
+    # ✅ Mesajları DB’ye tek yazımda kaydet
+    with stage("chat", "db_write"):
+        await add_messages(user_email, [("user", req.message), ("assistant", reply)])
+
+    # ✅ Bütçe dışına düşen mesajları cevap döndükten sonra özete kat
+    background_tasks.add_task(update_chat_summary, user_email)
 
     return {"reply": reply}
 
+def _cached_answer(message: str, history: list, summary: str, pipeline: str):
+    # Cache'te yalnızca bağlamsız cevaplar var; sohbetin ortasındaki soru ("bulaşıcı mı?")
+    # önceki mesajlara göre cevaplanmalı
+    if not ANSWER_CACHE_ENABLED or history or summary:
+        return None
+    with stage(pipeline, "answer_cache"):
+        return answer_cache.get(message)
+
+def _remember_answer(message: str, history: list, summary: str, reply: str):
+    if ANSWER_CACHE_ENABLED and is_cacheable(history, summary, reply):
+        answer_cache.put(message, reply)
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# ✅ Streaming chat endpoint (SSE): cevap parçaları geldikçe gönderilir
+@chatbot_router.post("/chat/stream", dependencies=[Depends(admit("llm"))])
+async def chat_stream_endpoint(req: ChatRequest, background_tasks: BackgroundTasks, user_email: str = Depends(get_current_user)):
+    if not req.message.strip():
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
+
+    with stage("chat_stream", "db_read"):
+        # Özete katılmış mesajlar okunmaz; katılmamışlar bütçeyi aşsa da prompt'a girer
+        summary_doc = await get_chat_summary(user_email)
+        history = await get_recent_messages(user_email, after=summary_doc["summarized_until"])
+        summary = summary_doc["summary"]
+    cached = _cached_answer(req.message, history, summary, "chat_stream")
+
+    async def event_stream():
+        if cached is not None:
+            # ✅ Cache'teki cevap tek parça halinde gönderilir
+            reply = cached
+            yield _sse_event("delta", {"text": reply})
+        else:
+            parts = []
+            try:
+                async for chunk in stream_gemini_response(history, req.message, summary):
+                    parts.append(chunk)
+                    yield _sse_event("delta", {"text": chunk})
+                reply = "".join(parts).strip()
+            except Exception as e:
+                reply = f"⚠️ Gemini API error: {str(e)}"
+                yield _sse_event("error", {"detail": reply})
+            _remember_answer(req.message, history, summary, reply)
+
+        # ✅ Akış bitince mesajları DB’ye tek yazımda kaydet
+        with stage("chat_stream", "db_write"):
+            await add_messages(user_email, [("user", req.message), ("assistant", reply)])
+
+        yield _sse_event("done", {"reply": reply})
+
+    # ✅ Akış bittikten sonra özet güncellenir
+    background_tasks.add_task(update_chat_summary, user_email)
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # ✅ Kullanıcının geçmiş mesajlarını getir
-@chatbot_router.get("/get_history")
-async def get_history(user_email: str = Depends(get_current_user)):
-    history = get_chat_history(user_email)
+@chatbot_router.get("/get_history", dependencies=[Depends(admit("db"))])
+async def get_history(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[str] = None,
+    user_email: str = Depends(get_current_user),
+):
+    # ✅ Sayfalı geçmiş: bir sonraki (daha eski) sayfanın cursor'ı X-Next-Cursor header'ında
+    try:
+        history, next_cursor = await get_chat_history_page(user_email, limit, before)
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
 
     # ✅ Mongo ObjectId ve timestamp'leri stringe çevir
     for h in history:
@@ -63,15 +150,25 @@ async def get_history(user_email: str = Depends(get_current_user)):
     return history
 
 # ✅ Yeni prompt kaydet
-@chatbot_router.post("/save_prompt")
-async def save_prompt_endpoint(req: SavePromptRequest, user_email: str = Depends(get_current_user)):
+@chatbot_router.post("/save_prompt", dependencies=[Depends(admit("db"))])
+async def save_prompt_endpoint(req: SavePromptRequest, background_tasks: BackgroundTasks, request: Request,
+                               user_email: str = Depends(get_current_user)):
     if not req.prompt.strip():
         raise HTTPException(status_code=400, detail="Prompt cannot be empty")
 
-    saved = save_prompt(req.prompt, req.tag)
+    saved = await save_prompt(req.prompt, req.tag)
+    # ✅ Kayıtlı sorunun cevabı arka planda üretilip cevap cache'ine eklenir. LLM çağrısı kullanıcının
+    # "llm" hakkından düşer ve llm havuzunda çalışır; hak ya da yer yoksa atlanır (başlangıçta doldurulur)
+    if ANSWER_CACHE_ENABLED and not answer_cache.contains(req.prompt) and try_rate_limit(request, "llm"):
+        background_tasks.add_task(run_admitted, "llm", seed_prompt, req.prompt)
     return {"status": "ok", "saved_prompt": saved}
 
 # ✅ Prompt listesini getir
-@chatbot_router.get("/get_prompts")
+@chatbot_router.get("/get_prompts", dependencies=[Depends(admit("db"))])
 async def get_prompts_endpoint():
-    return get_all_prompts()
+    return await get_all_prompts()
+
+# ✅ Cevap cache'i istatistikleri
+@chatbot_router.get("/cache_stats")
+async def answer_cache_stats():
+    return answer_cache.stats()
@@ -1,14 +1,33 @@
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
-client = MongoClient(MONGO_URI)
+# ✅ "mongo" → gerçek mongod, "fake" → süreç içi bellek taklidi (test / benchmark)
+MONGO_BACKEND = os.getenv("MONGO_BACKEND", "mongo")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+MONGO_TIMEOUT_MS = int(os.getenv("MONGO_TIMEOUT_MS", "5000"))
+
+if MONGO_BACKEND == "fake":
+    from app.fake_mongo import FakeAsyncClient
+    client = FakeAsyncClient()
+else:
+    # Async client: DB çağrıları event loop'u bloklamaz
+    client = AsyncMongoClient(
+        MONGO_URI,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        serverSelectionTimeoutMS=MONGO_TIMEOUT_MS,
+    )
 db = client["dermin_app"]
 
 users_collection = db["users"]
 records_collection = db["records"]   # YOLO sonuçları buraya
 chat_collection = db["chat_history"] # Chatbot geçmişi buraya
 
+async def ping():
+    """DB bağlantısını kontrol eder"""
+    await db.command("ping")
@@ -0,0 +1,261 @@
+# Süreç içi, bellekte çalışan async MongoDB taklidi (MONGO_BACKEND=fake).
+# Sadece uygulamanın kullandığı sorgu biçimlerini destekler; testler ve benchmark'lar
+# harici bir mongod olmadan aynı veri erişim katmanını çalıştırabilsin diye.
+import asyncio
+import copy
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+
+def _get_field(doc, path):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None, False
+        value = value[part]
+    return value, True
+
+
+def _compare(value, op, operand):
+    if op == "$eq":
+        return value == operand
+    if op == "$ne":
+        return value != operand
+    if op == "$in":
+        return value in operand
+    if op == "$nin":
+        return value not in operand
+    if value is None:
+        return False
+    if op == "$lt":
+        return value < operand
+    if op == "$lte":
+        return value <= operand
+    if op == "$gt":
+        return value > operand
+    if op == "$gte":
+        return value >= operand
+    raise NotImplementedError(f"fake_mongo does not support {op}")
+
+
+def _matches(doc, query):
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(_matches(doc, sub) for sub in condition):
+                return False
+            continue
+        if key == "$and":
+            if not all(_matches(doc, sub) for sub in condition):
+                return False
+            continue
+
+        value, exists = _get_field(doc, key)
+        if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+            for op, operand in condition.items():
+                if op == "$exists":
+                    if exists != bool(operand):
+                        return False
+                elif not _compare(value, op, operand):
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _project(doc, projection):
+    doc = copy.deepcopy(doc)
+    if not projection:
+        return doc
+    include = {k for k, v in projection.items() if v and k != "_id"}
+    if include:
+        projected = {k: doc[k] for k in include if k in doc}
+        if projection.get("_id", 1) and "_id" in doc:
+            projected["_id"] = doc["_id"]
+        return projected
+    for key, value in projection.items():
+        if not value:
+            doc.pop(key, None)
+    return doc
+
+
+def _sort_key(value):
+    # None değerler en başa, farklı tipler birbirinden ayrı gruplanır
+    return (value is not None, type(value).__name__, value) if value is not None else (False, "", 0)
+
+
+def _apply_update(doc, update, inserting=False):
+    for op, fields in update.items():
+        if op == "$set" or (op == "$setOnInsert" and inserting):
+            doc.update(copy.deepcopy(fields))
+        elif op == "$inc":
+            for key, amount in fields.items():
+                doc[key] = doc.get(key, 0) + amount
+        elif op == "$unset":
+            for key in fields:
+                doc.pop(key, None)
+        elif op != "$setOnInsert":
+            raise NotImplementedError(f"fake_mongo does not support {op}")
+
+
+class InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class InsertManyResult:
+    def __init__(self, inserted_ids):
+        self.inserted_ids = inserted_ids
+
+
+class UpdateResult:
+    def __init__(self, matched_count, modified_count, upserted_id=None):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+        self.upserted_id = upserted_id
+
+
+class FakeCursor:
+    def __init__(self, collection, query, projection):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._sort = []
+        self._skip = 0
+        self._limit = 0
+        self._results = None
+
+    def sort(self, key, direction=1):
+        self._sort = list(key) if isinstance(key, list) else [(key, direction)]
+        return self
+
+    def skip(self, count):
+        self._skip = count
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def _evaluate(self):
+        docs = [d for d in self._collection._docs if _matches(d, self._query)]
+        for key, direction in reversed(self._sort):
+            docs.sort(key=lambda d: _sort_key(_get_field(d, key)[0]), reverse=direction < 0)
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [_project(d, self._projection) for d in docs]
+
+    async def to_list(self, length=None):
+        await asyncio.sleep(0)
+        docs = self._evaluate()
+        return docs if length is None else docs[:length]
+
+    def __aiter__(self):
+        self._results = iter(self._evaluate())
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._results)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    def __init__(self, name):
+        self.name = name
+        self._docs = []
+        self._indexes = []
+
+    async def create_index(self, keys, **kwargs):
+        self._indexes.append((keys, kwargs))
+        return keys if isinstance(keys, str) else "_".join(f"{k}_{d}" for k, d in keys)
+
+    def _check_unique(self, document):
+        # Sadece tek alanlı (string) unique index'ler desteklenir
+        for keys, options in self._indexes:
+            if not options.get("unique") or not isinstance(keys, str):
+                continue
+            value, found = _get_field(document, keys)
+            if found and any(_get_field(doc, keys) == (value, True) for doc in self._docs):
+                raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: {keys}_1")
+
+    async def insert_one(self, document):
+        await asyncio.sleep(0)
+        self._check_unique(document)
+        document.setdefault("_id", ObjectId())
+        self._docs.append(copy.deepcopy(document))
+        return InsertOneResult(document["_id"])
+
+    async def insert_many(self, documents):
+        await asyncio.sleep(0)
+        for document in documents:
+            self._check_unique(document)
+            document.setdefault("_id", ObjectId())
+            self._docs.append(copy.deepcopy(document))
+        return InsertManyResult([d["_id"] for d in documents])
+
+    async def find_one(self, query=None, projection=None):
+        await asyncio.sleep(0)
+        for doc in self._docs:
+            if _matches(doc, query or {}):
+                return _project(doc, projection)
+        return None
+
+    def find(self, query=None, projection=None):
+        return FakeCursor(self, query or {}, projection)
+
+    async def update_one(self, query, update, upsert=False):
+        await asyncio.sleep(0)
+        for doc in self._docs:
+            if _matches(doc, query):
+                _apply_update(doc, update)
+                return UpdateResult(1, 1)
+        if not upsert:
+            return UpdateResult(0, 0)
+        doc = {k: v for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+        doc["_id"] = ObjectId()
+        _apply_update(doc, update, inserting=True)
+        self._docs.append(doc)
+        return UpdateResult(0, 0, doc["_id"])
+
+    async def update_many(self, query, update):
+        await asyncio.sleep(0)
+        matched = [doc for doc in self._docs if _matches(doc, query)]
+        for doc in matched:
+            _apply_update(doc, update)
+        return UpdateResult(len(matched), len(matched))
+
+    async def count_documents(self, query):
+        await asyncio.sleep(0)
+        return sum(1 for d in self._docs if _matches(d, query))
+
+
+class FakeDatabase:
+    def __init__(self, name):
+        self.name = name
+        self._collections = {}
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(name)
+        return self._collections[name]
+
+    async def command(self, name, *args, **kwargs):
+        if name == "ping":
+            return {"ok": 1.0}
+        raise NotImplementedError(f"fake_mongo does not support command {name}")
+
+
+class FakeAsyncClient:
+    def __init__(self, *args, **kwargs):
+        self._databases = {}
+        self.admin = self["admin"]
+
+    def __getitem__(self, name):
+        if name not in self._databases:
+            self._databases[name] = FakeDatabase(name)
+        return self._databases[name]
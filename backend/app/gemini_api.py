@@ -1,36 +1,70 @@
+import logging
 import os
-import google.generativeai as genai
+import sys
 
-# 🔑 Gemini API anahtarını yükle
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise ValueError("❌ GEMINI_API_KEY environment variable missing")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-genai.configure(api_key=GEMINI_API_KEY)
+from common.llm_client import get_llm_client
+from common.chat_context import build_context, turns_to_fold, build_summary_prompt
+from app.chat import get_recent_messages, get_chat_summary, save_chat_summary
 
-# ✅ Gemini modelini hazırlayalım (tek sefer yüklenir)
-model = genai.GenerativeModel("gemini-1.5-flash")
+logger = logging.getLogger(__name__)
 
-def get_gemini_response(history: list[str], user_message: str) -> str:
+def build_chat_prompt(history: list[dict], user_message: str, summary: str = "") -> str:
+    """Özet, token bütçesine sığan geçmiş ve yeni mesajdan Gemini'ye gidecek prompt'u oluşturur."""
+    context_text = build_context(history, summary)
+    return (
+        "You are Dermin ChatBot, an AI assistant specialized in dermatology.\n"
+        "You should provide helpful, friendly and medically safe responses.\n"
+        "Avoid giving direct diagnosis; always recommend consulting a dermatologist.\n\n"
+        f"Chat history:\n{context_text}\n\n"
+        f"User: {user_message}\nAssistant:"
+    )
+
+async def get_gemini_response(history: list[dict], user_message: str, summary: str = "") -> str:
     """
     Kullanıcı mesajını Gemini'ye gönderir ve cevap döner.
-    :param history: Kullanıcının önceki mesajlarının listesi (context için)
+    Çağrı paylaşılan LLM istemcisi üzerinden yapılır, event loop bloklanmaz.
+    :param history: Özete henüz katılmamış önceki mesajlar (role + message, eski → yeni)
     :param user_message: Yeni gelen mesaj
+    :param summary: Bütçe dışına düşmüş eski mesajların özeti
     :return: Gemini cevabı (string)
     """
     try:
-        # Geçmiş mesajlardan bir context oluştur
-        context_text = "\n".join([f"User: {msg}" for msg in history[-5:]])  # son 5 mesaj
-        full_prompt = (
-            "You are Dermin ChatBot, an AI assistant specialized in dermatology.\n"
-            "You should provide helpful, friendly and medically safe responses.\n"
-            "Avoid giving direct diagnosis; always recommend consulting a dermatologist.\n\n"
-            f"Chat history:\n{context_text}\n\n"
-            f"User: {user_message}\nAssistant:"
-        )
-
-        response = model.generate_content(full_prompt)
-        return response.text.strip()
+        full_prompt = build_chat_prompt(history, user_message, summary)
+        response = await get_llm_client().generate(full_prompt)
+        return response.strip()
 
     except Exception as e:
         return f"⚠️ Gemini API error: {str(e)}"
+
+async def stream_gemini_response(history: list[dict], user_message: str, summary: str = ""):
+    """
+    Gemini cevabını geldikçe parça parça döner (SSE endpoint'i için).
+    :param history: Özete henüz katılmamış önceki mesajlar (role + message, eski → yeni)
+    :param user_message: Yeni gelen mesaj
+    :param summary: Bütçe dışına düşmüş eski mesajların özeti
+    """
+    full_prompt = build_chat_prompt(history, user_message, summary)
+    async for chunk in get_llm_client().stream(full_prompt):
+        yield chunk
+
+async def update_chat_summary(user_id: str):
+    """
+    Bütçe dışına düşen mesajları kullanıcının rolling özetine katar.
+    Cevap döndükten sonra arka planda çalışır; yeterli birikim yoksa LLM çağrılmaz.
+    summarized_until'den sonraki mesajların hepsine bakılır (son N mesaja değil), böylece
+    prompt'a sığıp sonra dışarıda kalan eski mesajlar da özete girer.
+    """
+    current = await get_chat_summary(user_id)
+    turns = await get_recent_messages(user_id, limit=0, after=current["summarized_until"])
+    pending = turns_to_fold(turns, current["summary"], current["summarized_until"])
+    if not pending:
+        return
+
+    try:
+        summary = await get_llm_client().generate(build_summary_prompt(current["summary"], pending))
+    except Exception as e:
+        logger.warning("chat_summary_update_failed user=%s error=%s", user_id, e)
+        return
+    await save_chat_summary(user_id, summary.strip(), pending[-1]["timestamp"])
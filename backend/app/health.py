@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+from fastapi import APIRouter, Response
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.db import ping
+from app.scheduler import get_admission_stats
+
+logger = logging.getLogger(__name__)
+
+# ✅ /health/ready'deki DB ping'i bu süreden uzun sürerse hazır değil sayılır
+HEALTH_DB_TIMEOUT_SECONDS = float(os.getenv("HEALTH_DB_TIMEOUT_SECONDS", "1"))
+
+health_router = APIRouter()
+
+# Startup'ta arka planda hazırlanan bileşenler: isim → "pending" | "ready" | "failed"
+startup_components = {}
+
+
+async def run_startup_task(name: str, coro):
+    """Startup işini uygulamayı bekletmeden çalıştırır; sonucu readiness için kaydedilir."""
+    startup_components[name] = "pending"
+    try:
+        await coro
+    except Exception:
+        logger.exception("startup_task_failed name=%s", name)
+        startup_components[name] = "failed"
+        return
+    startup_components[name] = "ready"
+
+
+def start_startup_thread(name: str, fn):
+    """Bloklayan startup işini (ör. model yükleme) daemon thread'de çalıştırır."""
+    startup_components[name] = "pending"
+
+    def run():
+        try:
+            fn()
+        except Exception:
+            logger.exception("startup_task_failed name=%s", name)
+            startup_components[name] = "failed"
+            return
+        startup_components[name] = "ready"
+
+    threading.Thread(target=run, name=f"startup-{name}", daemon=True).start()
+
+
+# ✅ Liveness: süreç ayakta ve event loop cevap veriyor (bağımlılıklara bakılmaz)
+@health_router.get("/live")
+async def liveness():
+    return {"status": "alive"}
+
+
+# ✅ Readiness: DB erişilebilir, index'ler hazır ve (warm-up açıksa) model yüklenmiş
+@health_router.get("/ready")
+async def readiness(response: Response):
+    checks = dict(startup_components)
+    try:
+        await asyncio.wait_for(ping(), HEALTH_DB_TIMEOUT_SECONDS)
+        checks["db"] = "ready"
+    except Exception:
+        checks["db"] = "failed"
+
+    if checks.get("model") not in (None, "failed"):
+        # Worker havuzunda warm-up thread'i süreçleri başlatıp döner; asıl durum worker'lardan gelir
+        from yolo.yolo_service import is_ready
+        checks["model"] = "ready" if is_ready() else "pending"
+
+    ready = all(status == "ready" for status in checks.values())
+    if not ready:
+        response.status_code = 503
+    return {"status": "ready" if ready else "not_ready", "checks": checks}
+
+
+# ✅ Admission havuzlarının anlık doluluğu (bekleme süreleri /metrics'te)
+@health_router.get("/admission")
+async def admission_stats():
+    return get_admission_stats()
@@ -0,0 +1,260 @@
+import asyncio
+import ipaddress
+import json
+import logging
+import os
+import socket
+import sys
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from datetime import datetime, timedelta
+from fastapi.concurrency import run_in_threadpool
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from classification_bot.classifier import process_image
+from app.db import db, records_collection
+from common.metrics import observe_queue_depth
+
+logger = logging.getLogger(__name__)
+
+# ✅ Sınıflandırma job kuyruğu ayarları (ortam değişkenleriyle ayarlanabilir)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))          # Aynı anda işlenen job sayısı
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))  # Dolunca yeni job'lar 503 ile reddedilir
+JOB_WEBHOOK_TIMEOUT_SECONDS = float(os.getenv("JOB_WEBHOOK_TIMEOUT_SECONDS", "10"))
+# ✅ Webhook yalnızca bu host'lara gönderilebilir (virgülle ayrılmış; boşsa herkese açık adreslerin hepsi)
+JOB_WEBHOOK_ALLOWED_HOSTS = {h.strip().lower() for h in os.getenv("JOB_WEBHOOK_ALLOWED_HOSTS", "").split(",") if h.strip()}
+# ✅ Her süreç bu aralıkla heartbeat yazar ve ölü süreçlerin job'larını failed yapar
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "15"))
+# Bu kadar süre heartbeat yazmayan süreç ölü sayılır (birden fazla uvicorn worker'ı / rolling restart)
+JOB_INSTANCE_TIMEOUT_SECONDS = float(os.getenv("JOB_INSTANCE_TIMEOUT_SECONDS", str(4 * JOB_HEARTBEAT_SECONDS)))
+
+instances_collection = db["job_instances"]  # Job kuyruğu çalıştıran süreçlerin heartbeat'leri
+
+# Job durumları: queued → running → done | failed  (kuyruk doluysa: rejected)
+PENDING_STATUSES = ("queued", "running")
+# /yolo/upload cevabıyla aynı alanlar saklanır
+RESULT_FIELDS = ("top_class", "confidence", "gemini_response", "boxed_image_url")
+
+
+class QueueFullError(Exception):
+    """Kuyrukta yer yok; istemci daha sonra tekrar denemeli."""
+
+
+class InvalidCallbackError(ValueError):
+    """callback_url'e istek gönderilemez (iç ağ adresi, izin listesinde olmayan host vb.)."""
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+async def ensure_job_indexes():
+    """job_id üzerinde unique index, eski heartbeat'ler için TTL index (uygulama başlarken çağrılır)"""
+    await records_collection.create_index("job_id", unique=True)
+    await instances_collection.create_index("heartbeat_at", expireAfterSeconds=24 * 60 * 60)
+
+
+async def get_job(job_id: str, owner: str = None):
+    """Job kaydını döndür (yoksa ya da owner verilip job başkasınınsa None)"""
+    query = {"job_id": job_id}
+    if owner is not None:
+        query["owner"] = owner
+    return await records_collection.find_one(query, {"_id": 0, "owner": 0})
+
+
+async def fail_orphaned_jobs(instance_id: str):
+    """
+    Kuyruk süreç içinde tutulduğu için ölen süreçle kaybolan job'lar sonsuza dek queued / running
+    kalmasın. Yalnızca bu süreç dışındaki, heartbeat'i JOB_INSTANCE_TIMEOUT_SECONDS'tan eski
+    (ya da hiç olmayan) süreçlerin bekleyen job'ları failed yapılır; canlı worker'ların job'larına dokunulmaz.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=JOB_INSTANCE_TIMEOUT_SECONDS)
+    live = [instance_id]
+    async for doc in instances_collection.find({"heartbeat_at": {"$gte": cutoff}}, {"instance": 1}):
+        live.append(doc["instance"])
+    # created_at şartı: yeni başlayan süreç ilk heartbeat'ini yazmadan job'ları failed olmasın
+    result = await records_collection.update_many(
+        {"job_id": {"$exists": True}, "status": {"$in": list(PENDING_STATUSES)},
+         "instance": {"$nin": live}, "created_at": {"$lt": cutoff.isoformat()}},
+        {"$set": {"status": "failed", "error": "Server restarted before the job finished", "finished_at": _now()}},
+    )
+    if result.modified_count:
+        logger.warning("orphaned_jobs_failed count=%s", result.modified_count)
+
+
+async def _update_job(job_id: str, fields: dict, status: str = None) -> bool:
+    """Job'u günceller; status verilirse yalnızca job hâlâ o durumdaysa (failed yapılmış job ezilmez)."""
+    query = {"job_id": job_id}
+    if status is not None:
+        query["status"] = status
+    result = await records_collection.update_one(query, {"$set": fields})
+    return result.matched_count > 0
+
+
+def validate_callback_url(url: str):
+    """
+    SSRF koruması: yalnızca http(s), izin listesindeki (varsa) host'lar ve host'un çözüldüğü
+    tüm adresler herkese açık (loopback / özel ağ / link-local / metadata değil) olmalı.
+    """
+    parsed = urllib.parse.urlsplit(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise InvalidCallbackError("callback_url must be an http(s) URL")
+    host = parsed.hostname.lower()
+    if JOB_WEBHOOK_ALLOWED_HOSTS and host not in JOB_WEBHOOK_ALLOWED_HOSTS:
+        raise InvalidCallbackError("callback_url host is not allowed")
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parsed.port or 443, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, UnicodeError, ValueError):
+        raise InvalidCallbackError("callback_url host cannot be resolved")
+    for address in addresses:
+        if not ipaddress.ip_address(address.split("%", 1)[0]).is_global:
+            raise InvalidCallbackError("callback_url must point to a public address")
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Yönlendirme izlenmez; aksi halde doğrulanmış URL iç ağa yönlendirebilir."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        raise urllib.error.HTTPError(req.full_url, code, f"Redirects are not followed ({newurl})", headers, fp)
+
+
+_webhook_opener = urllib.request.build_opener(_NoRedirect)
+
+
+def _post_webhook(url: str, payload: dict) -> int:
+    # Kayıttan bu yana DNS değişmiş olabilir; gönderimden hemen önce tekrar doğrulanır
+    validate_callback_url(url)
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with _webhook_opener.open(request, timeout=JOB_WEBHOOK_TIMEOUT_SECONDS) as response:
+        return response.status
+
+
+class JobQueue:
+    """
+    Süreç içi, sınırlı boyutlu job kuyruğu.
+    - submit resmi kuyruğa koyup hemen job_id döner; kuyruk doluysa QueueFullError verir (backpressure).
+    - `workers` adet asyncio task'ı job'ları sırayla alır; işleme thread pool'da çalışır.
+    - Durum ve sonuç records_collection'a yazılır; callback_url verilmişse sonuç oraya POST edilir.
+    - Job'lar süreç kimliğiyle (instance) kaydedilir; heartbeat'i kesilen süreçlerin job'ları failed yapılır.
+    """
+
+    def __init__(self, handler, workers: int = JOB_WORKERS, max_size: int = JOB_QUEUE_SIZE):
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.max_size = max(1, max_size)
+        self._queue = None
+        self._tasks = []
+        self._running = 0
+        self._heartbeat_task = None
+        self.instance_id = None  # start()'ta süreç başına üretilir (fork edilen worker'lar paylaşmasın)
+
+    def start(self):
+        """Worker task'larını çalışan event loop üzerinde başlatır (tekrar çağrılırsa bir şey yapmaz)."""
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self.instance_id = uuid.uuid4().hex
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+
+    async def stop(self):
+        tasks = self._tasks + [self._heartbeat_task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._queue = None
+        self._tasks = []
+        self._heartbeat_task = None
+
+    async def submit(self, image_bytes: bytes, filename: str = None, callback_url: str = None,
+                     owner: str = None) -> str:
+        """Job'u kaydedip kuyruğa ekler ve job_id döner."""
+        self.start()
+        observe_queue_depth("jobs", self._queue.qsize())
+        if self._queue.full():
+            raise QueueFullError()
+
+        job_id = uuid.uuid4().hex
+        await records_collection.insert_one({
+            "job_id": job_id,
+            "status": "queued",
+            "filename": filename,
+            "callback_url": callback_url,
+            "owner": owner,
+            "instance": self.instance_id,
+            "created_at": _now(),
+        })
+        try:
+            self._queue.put_nowait((job_id, image_bytes, callback_url))
+        except asyncio.QueueFull:
+            # insert sırasında kuyruk dolmuş
+            await _update_job(job_id, {"status": "rejected", "finished_at": _now()})
+            raise QueueFullError()
+        return job_id
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue_size": self.max_size,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": self._running,
+        }
+
+    async def _heartbeat(self):
+        """Bu sürecin canlı olduğunu yazar ve ölü süreçlerden kalan job'ları failed yapar."""
+        while True:
+            try:
+                await instances_collection.update_one(
+                    {"instance": self.instance_id}, {"$set": {"heartbeat_at": datetime.utcnow()}}, upsert=True)
+                await fail_orphaned_jobs(self.instance_id)
+            except Exception as e:
+                logger.warning("job_heartbeat_failed instance=%s error=%s", self.instance_id, e)
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+
+    async def _worker(self):
+        while True:
+            job_id, image_bytes, callback_url = await self._queue.get()
+            self._running += 1
+            try:
+                await self._process(job_id, image_bytes, callback_url)
+            except Exception:
+                logger.exception("job_failed_unexpectedly job_id=%s", job_id)
+            finally:
+                self._running -= 1
+                self._queue.task_done()
+
+    async def _process(self, job_id, image_bytes, callback_url):
+        if not await _update_job(job_id, {"status": "running", "started_at": _now()}, status="queued"):
+            return  # Bu arada failed yapılmış (ör. heartbeat gecikti); tekrar işlenmez
+        try:
+            result = await run_in_threadpool(self.handler, image_bytes)
+            fields = {"status": "done", "result": {k: result[k] for k in RESULT_FIELDS}}
+        except Exception as e:
+            logger.warning("job_failed job_id=%s error=%s", job_id, e)
+            fields = {"status": "failed", "error": str(e)}
+        fields["finished_at"] = _now()
+        if not await _update_job(job_id, fields, status="running"):
+            # Job failed yapılmış; sonuç yazılmaz, webhook ikinci kez gönderilmez
+            logger.warning("job_finished_after_failed job_id=%s", job_id)
+            return
+
+        if callback_url:
+            payload = {"job_id": job_id, **{k: v for k, v in fields.items() if k != "finished_at"}}
+            try:
+                status = await run_in_threadpool(_post_webhook, callback_url, payload)
+                await _update_job(job_id, {"webhook_status": status})
+            except Exception as e:
+                logger.warning("job_webhook_failed job_id=%s url=%s error=%s", job_id, callback_url, e)
+                await _update_job(job_id, {"webhook_status": "failed", "webhook_error": str(e)})
+
+
+# ✅ /yolo/jobs endpoint'lerinin kullandığı kuyruk
+classification_jobs = JobQueue(process_image)
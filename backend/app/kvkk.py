@@ -1,13 +1,14 @@
-from fastapi import APIRouter, HTTPException
-from app.db import users_collection
+from fastapi import APIRouter, HTTPException, Depends
+from app.users import update_user
+from app.scheduler import admit
 from app.utils import decode_token
 
 kvkk_router = APIRouter()
 
-@kvkk_router.post("/approve")
-def approve_kvkk(token: str):
+@kvkk_router.post("/approve", dependencies=[Depends(admit("db"))])
+async def approve_kvkk(token: str):
     email = decode_token(token)
     if not email:
         raise HTTPException(status_code=401, detail="Invalid token")
-    users_collection.update_one({"email": email}, {"$set": {"kvkk_approved": True}})
+    await update_user(email, {"kvkk_approved": True})
     return {"message": "KVKK approved"}
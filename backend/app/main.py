@@ -1,6 +1,11 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 import sys
 import os
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles  # ✅ eklendi
 
@@ -11,8 +16,58 @@ from app.kvkk import kvkk_router
 from app.survey import survey_router
 from app.yolo_router import yolo_router
 from app.chatbot_router import chatbot_router
+from app.chat import ensure_chat_indexes
+from app.users import ensure_user_indexes
+from app.jobs import ensure_job_indexes, classification_jobs
+from app.answer_cache import ANSWER_CACHE_ENABLED, seed_from_prompts
+from app.health import health_router, run_startup_task, start_startup_thread
+from app.profiling import start_profiler, finish_profiler
+from common.metrics import observe_request, render_latest
 
-app = FastAPI(title="Dermin Backend")
+# ✅ Yapılandırılmış log (LOG_LEVEL ile ayarlanır)
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format="%(asctime)s %(levelname)s %(name)s %(message)s",
+)
+
+# ✅ Açıklama cache'i başlangıçta arka planda doldurulsun mu? (EXPLANATION_WARMUP=1)
+EXPLANATION_WARMUP = os.getenv("EXPLANATION_WARMUP", "0") == "1"
+# ✅ Cevap cache'i başlangıçta chat_prompts'taki sorularla doldurulsun mu? (ANSWER_CACHE_WARMUP=1)
+ANSWER_CACHE_WARMUP = os.getenv("ANSWER_CACHE_WARMUP", "0") == "1"
+# ✅ YOLO modeli başlangıçta arka planda yüklensin mi? 0 → ilk /yolo isteğinde yüklenir
+# (sadece auth / chat trafiği alan worker'lar için; readiness de modeli beklemez)
+YOLO_WARMUP = os.getenv("YOLO_WARMUP", "1") == "1"
+
+# ✅ Her koleksiyonun index'leri ayrı startup işi: biri hata verse de diğerleri oluşturulur
+INDEX_TASKS = {
+    "chat_indexes": ensure_chat_indexes,
+    "user_indexes": ensure_user_indexes,
+    "job_indexes": ensure_job_indexes,
+}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # ✅ Uygulama hemen istek almaya başlar; DB index'leri ve model arka planda hazırlanır,
+    # durumları /health/ready'den izlenir
+    background = [asyncio.create_task(run_startup_task(name, ensure())) for name, ensure in INDEX_TASKS.items()]
+    if ANSWER_CACHE_ENABLED and ANSWER_CACHE_WARMUP:
+        background.append(asyncio.create_task(seed_from_prompts()))
+    # ✅ Job kuyruğu heartbeat yazar; ölü süreçlerden kalan job'lar (yalnızca onlar) failed yapılır
+    classification_jobs.start()
+    if YOLO_WARMUP:
+        from yolo.yolo_service import warm_up
+        start_startup_thread("model", warm_up)
+    if EXPLANATION_WARMUP:
+        from classification_bot.classifier import explanation_cache
+        threading.Thread(target=explanation_cache.warm_up, name="explanation-warmup", daemon=True).start()
+
+    yield
+
+    for task in background:
+        task.cancel()
+    await classification_jobs.stop()
+
+app = FastAPI(title="Dermin Backend", lifespan=lifespan)
 
 # ✅ CORS
 app.add_middleware(
@@ -21,8 +76,38 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Retry-After"],  # ✅ Sayfalama cursor'ı + 429/503'te tekrar deneme süresi
 )
 
+def _route_label(request: Request) -> str:
+    """
+    Metrik etiketi olarak route şablonu (ör. /yolo/jobs/{job_id}); ID'ler etiket sayısını patlatmasın.
+    Router prefix'i şablonda yoksa (FastAPI sürümüne bağlı) gerçek path'ten eklenir.
+    """
+    template = getattr(request.scope.get("route"), "path", None)
+    if template is None:
+        return "unmatched"
+    segments = request.url.path.rstrip("/").split("/")
+    depth = len(template.rstrip("/").split("/"))
+    return "/".join(segments[:max(1, len(segments) - depth + 1)]) + template
+
+# ✅ İstek süresi histogramı (route şablonuyla) + opsiyonel yavaş istek profili
+@app.middleware("http")
+async def measure_requests(request: Request, call_next):
+    profiler = start_profiler()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - started
+        route_path = _route_label(request)
+        observe_request(request.method, route_path, status, elapsed)
+        if profiler is not None:
+            finish_profiler(profiler, request.method, route_path, elapsed)
+
 # ✅ static klasörünü bağla
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -32,6 +117,16 @@ app.include_router(kvkk_router, prefix="/kvkk", tags=["KVKK"])
 app.include_router(survey_router, prefix="/survey", tags=["Survey"])
 app.include_router(yolo_router, prefix="/yolo", tags=["YOLO"])
 app.include_router(chatbot_router, prefix="/chatbot", tags=["Chatbot"])
+app.include_router(health_router, prefix="/health", tags=["Health"])
+
+# ✅ Prometheus metrikleri
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    rendered = render_latest()
+    if rendered is None:
+        return Response("prometheus_client is not installed\n", status_code=501, media_type="text/plain")
+    content, content_type = rendered
+    return Response(content, media_type=content_type)
 
 @app.get("/")
 def root():
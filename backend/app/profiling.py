@@ -0,0 +1,44 @@
+import logging
+import os
+import random
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+# ✅ Yavaş istek profili (opsiyonel, pyinstrument gerekir). PROFILE_SAMPLE_RATE=0 → kapalı
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Profillenen istek bu süreden uzun sürerse rapor kaydedilir
+PROFILE_SLOW_REQUEST_MS = float(os.getenv("PROFILE_SLOW_REQUEST_MS", "1000"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+try:
+    from pyinstrument import Profiler
+except ImportError:
+    Profiler = None
+
+if PROFILE_SAMPLE_RATE > 0 and Profiler is None:
+    logger.warning("profiling_disabled reason=pyinstrument_not_installed")
+
+
+def start_profiler():
+    """İstek örneklemeye denk gelirse çalışan bir sampling profiler döner, yoksa None."""
+    if Profiler is None or PROFILE_SAMPLE_RATE <= 0 or random.random() >= PROFILE_SAMPLE_RATE:
+        return None
+    profiler = Profiler(async_mode="enabled")
+    profiler.start()
+    return profiler
+
+
+def finish_profiler(profiler, method: str, path: str, seconds: float):
+    """Profili durdurur; istek yavaşsa HTML raporunu PROFILE_DIR'e yazar."""
+    profiler.stop()
+    if seconds * 1000 < PROFILE_SLOW_REQUEST_MS:
+        return
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = re.sub(r"[^A-Za-z0-9]+", "_", f"{method}{path}").strip("_")
+    report_path = os.path.join(PROFILE_DIR, f"{int(time.time() * 1000)}_{name}.html")
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write(profiler.output_html())
+    logger.info("slow_request_profiled method=%s path=%s ms=%.1f report=%s",
+                method, path, seconds * 1000, report_path)
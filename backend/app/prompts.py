@@ -2,17 +2,17 @@ from app.db import db
 
 prompts_collection = db["chat_prompts"]
 
-def save_prompt(prompt: str, tag: str = "general"):
+async def save_prompt(prompt: str, tag: str = "general"):
     """
     Yeni bir prompt kaydeder.
     """
     new_prompt = {"prompt": prompt, "tag": tag}
-    prompts_collection.insert_one(new_prompt)
+    await prompts_collection.insert_one(dict(new_prompt))  # insert_one _id ekler; cevaba girmesin
     return new_prompt
 
-def get_all_prompts():
+async def get_all_prompts():
     """
     Tüm promptları döner.
     """
-    prompts = list(prompts_collection.find({}, {"_id": 0}))  # _id hariç
+    prompts = await prompts_collection.find({}, {"_id": 0}).to_list()  # _id hariç
     return prompts
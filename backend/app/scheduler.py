@@ -0,0 +1,229 @@
+import asyncio
+import math
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from fastapi import HTTPException, Request
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.utils import decode_token
+from common.metrics import observe_admission_wait, record_admission_rejection
+
+# ✅ Admission control: her iş sınıfının (inference / llm / db) kendi eşzamanlılık havuzu ve
+# sınırlı bekleme kuyruğu var; pahalı yükleme patlamaları ucuz auth / geçmiş isteklerini aç bırakmaz.
+INFERENCE_CONCURRENCY = int(os.getenv("INFERENCE_CONCURRENCY", "4"))
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "16"))
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "16"))
+LLM_QUEUE_SIZE = int(os.getenv("LLM_QUEUE_SIZE", "64"))
+DB_CONCURRENCY = int(os.getenv("DB_CONCURRENCY", "64"))
+DB_QUEUE_SIZE = int(os.getenv("DB_QUEUE_SIZE", "256"))
+# Kuyrukta bundan uzun bekleyen istek 503 ile döner (istemcinin timeout'unu beklemesin)
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "10"))
+
+# ✅ Kullanıcı başına token bucket: dakikadaki istek hakkı ve anlık patlama (burst) payı
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+INFERENCE_RATE_PER_MINUTE = float(os.getenv("INFERENCE_RATE_PER_MINUTE", "30"))
+INFERENCE_BURST = float(os.getenv("INFERENCE_BURST", "10"))
+LLM_RATE_PER_MINUTE = float(os.getenv("LLM_RATE_PER_MINUTE", "20"))
+LLM_BURST = float(os.getenv("LLM_BURST", "5"))
+DB_RATE_PER_MINUTE = float(os.getenv("DB_RATE_PER_MINUTE", "600"))
+DB_BURST = float(os.getenv("DB_BURST", "60"))
+# Bellekte tutulan en fazla bucket (en az kullanılanlar silinir)
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+
+class TokenBuckets:
+    """
+    Anahtar (kullanıcı / IP) başına token bucket. Bucket'lar süreç içinde tutulur; birden fazla
+    uvicorn worker'ı varsa her worker kendi limitini uygular.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: float, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1.0, burst)
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # anahtar -> (token sayısı, son güncelleme)
+
+    def take(self, key: str, cost: float = 1.0) -> float:
+        """Token düşer; yetmiyorsa düşmez. :return: 0 → izin verildi, yoksa tekrar denemeden önce beklenecek saniye"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / self.rate if self.rate > 0 else float("inf")
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+class AdmissionPool:
+    """
+    Sınırlı eşzamanlılık + sınırlı bekleme kuyruğu. Kuyruk doluysa ya da slot
+    queue_timeout içinde boşalmazsa istek hemen reddedilir (503 + Retry-After).
+    """
+
+    def __init__(self, name: str, concurrency: int, max_queue: int, queue_timeout: float = ADMISSION_QUEUE_TIMEOUT_SECONDS):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self.active = 0
+        self.waiting = 0
+        self._avg_hold_seconds = 0.0  # Slot tutma süresinin hareketli ortalaması (Retry-After tahmini için)
+
+    def retry_after(self) -> int:
+        """Kuyruğun önündeki işlerin bitmesi için tahmini süre (en az 1 saniye)."""
+        return max(1, math.ceil(self._avg_hold_seconds * (self.waiting + 1) / self.concurrency))
+
+    async def acquire(self):
+        if self.active + self.waiting >= self.concurrency + self.max_queue:
+            self._reject("queue_full")
+        self.waiting += 1
+        started = time.perf_counter()
+        # ✅ acquire ayrı task'ta ve shield ile beklenir: timeout / iptal anında slot alınmış olabilir
+        # (Python <3.12 wait_for yarışı); alındıysa geri verilir, alınmadıysa bekleme iptal edilir
+        acquiring = asyncio.ensure_future(self._semaphore.acquire())
+        try:
+            await asyncio.wait_for(asyncio.shield(acquiring), self.queue_timeout)
+        except BaseException as e:
+            if acquiring.done() and not acquiring.cancelled() and acquiring.exception() is None:
+                self._semaphore.release()
+            else:
+                acquiring.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                self._reject("queue_timeout")
+            raise
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        observe_admission_wait(self.name, time.perf_counter() - started)
+        return time.perf_counter()
+
+    def release(self, acquired_at: float):
+        self.active -= 1
+        self._semaphore.release()
+        held = time.perf_counter() - acquired_at
+        self._avg_hold_seconds = 0.9 * self._avg_hold_seconds + 0.1 * held if self._avg_hold_seconds else held
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "avg_hold_ms": round(1000 * self._avg_hold_seconds, 3),
+        }
+
+    def _reject(self, reason: str):
+        record_admission_rejection(self.name, reason)
+        raise HTTPException(
+            status_code=503,
+            detail=f"Server is busy ({self.name}), please retry later",
+            headers={"Retry-After": str(self.retry_after())},
+        )
+
+
+pools = {
+    "inference": AdmissionPool("inference", INFERENCE_CONCURRENCY, INFERENCE_QUEUE_SIZE),
+    "llm": AdmissionPool("llm", LLM_CONCURRENCY, LLM_QUEUE_SIZE),
+    "db": AdmissionPool("db", DB_CONCURRENCY, DB_QUEUE_SIZE),
+}
+rate_limits = {
+    "inference": TokenBuckets(INFERENCE_RATE_PER_MINUTE, INFERENCE_BURST),
+    "llm": TokenBuckets(LLM_RATE_PER_MINUTE, LLM_BURST),
+    "db": TokenBuckets(DB_RATE_PER_MINUTE, DB_BURST),
+}
+
+
+def client_key(request: Request) -> str:
+    """Rate limit anahtarı: token geçerliyse kullanıcı email'i, değilse istemci IP'si."""
+    authorization = request.headers.get("authorization", "")
+    token = authorization.split(" ", 1)[1] if authorization.startswith("Bearer ") else request.query_params.get("token")
+    email = decode_token(token) if token else None
+    if email:
+        return f"user:{email}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def _take(request: Request, work_class: str) -> float:
+    if not RATE_LIMIT_ENABLED:
+        return 0.0
+    wait = rate_limits[work_class].take(client_key(request))
+    if wait:
+        record_admission_rejection(work_class, "rate_limited")
+    return wait
+
+
+def try_rate_limit(request: Request, work_class: str) -> bool:
+    """check_rate_limit gibi hak düşer ama hata vermez: hak yoksa False (ör. isteğe bağlı arka plan işi atlanır)."""
+    return not _take(request, work_class)
+
+
+def check_rate_limit(request: Request, work_class: str):
+    """Kullanıcının bu iş sınıfındaki hakkı bittiyse 429 + Retry-After."""
+    wait = _take(request, work_class)
+    if wait:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests, please slow down",
+            headers={"Retry-After": str(max(1, math.ceil(wait)))},
+        )
+
+
+def rate_limited(work_class: str):
+    """Yalnızca kullanıcı limiti uygulayan dependency (kendi kuyruğu olan uçlar için, ör. /yolo/jobs)."""
+
+    async def dependency(request: Request):
+        check_rate_limit(request, work_class)
+
+    return dependency
+
+
+def admit(work_class: str):
+    """
+    Route dependency'si: önce kullanıcı limiti, sonra iş sınıfının havuzundan slot.
+    Slot istek işlendikten sonra bırakılır.
+    Örnek: @router.post("/upload", dependencies=[Depends(admit("inference"))])
+    """
+    pool = pools[work_class]
+
+    async def dependency(request: Request):
+        check_rate_limit(request, work_class)
+        acquired_at = await pool.acquire()
+        try:
+            yield
+        finally:
+            pool.release(acquired_at)
+
+    return dependency
+
+
+async def run_admitted(work_class: str, fn, *args) -> bool:
+    """
+    Arka plan işini (ör. BackgroundTasks) iş sınıfının havuzunda çalıştırır; canlı isteklerle aynı
+    eşzamanlılık sınırına tabidir. Havuz doluysa iş atlanır ve False döner.
+    """
+    pool = pools[work_class]
+    try:
+        acquired_at = await pool.acquire()
+    except HTTPException:
+        return False
+    try:
+        await fn(*args)
+    finally:
+        pool.release(acquired_at)
+    return True
+
+
+def get_admission_stats() -> dict:
+    return {name: pool.stats() for name, pool in pools.items()}
@@ -0,0 +1,332 @@
+"""
+Anket tabanlı kullanıcı segmentasyonu.
+
+Anket cevapları sabit boyutlu NumPy vektörlerine çevrilir (tek seçimli alanlar one-hot,
+çok seçimli alanlar multi-hot, sayısal alanlar 0-1 aralığına ölçeklenmiş). Segmentler tüm
+kullanıcılar üzerinde, DB'den batch batch okunarak mini-batch k-means ile bulunur; merkezler
+`segments` koleksiyonuna yazılır. Yeni anket gönderildiğinde kullanıcı en yakın segmente atanır.
+
+Toplu segmentasyon (backend/ klasöründen):
+    python -m app.segmentation
+    python -m app.segmentation --segments 8 --epochs 10 --batch-size 2000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import db, users_collection
+
+logger = logging.getLogger(__name__)
+
+# ✅ Segmentasyon ayarları (ortam değişkenleriyle ayarlanabilir)
+SEGMENT_COUNT = int(os.getenv("SEGMENT_COUNT", "6"))
+SEGMENT_EPOCHS = int(os.getenv("SEGMENT_EPOCHS", "5"))
+SEGMENT_BATCH_SIZE = int(os.getenv("SEGMENT_BATCH_SIZE", "1000"))  # Cursor'dan tek seferde okunan kullanıcı
+SEGMENT_SEED = int(os.getenv("SEGMENT_SEED", "0"))
+SEGMENT_CACHE_SIZE = int(os.getenv("SEGMENT_CACHE_SIZE", "10000"))  # Bellekte tutulan kullanıcı → segment
+# Başka bir süreç segmentleri yeniden hesaplamışsa merkezler bu aralıkla DB'den tazelenir
+SEGMENT_MODEL_REFRESH_SECONDS = int(os.getenv("SEGMENT_MODEL_REFRESH_SECONDS", "300"))
+SEGMENT_MODEL_NAME = "survey_kmeans"
+
+segments_collection = db["segments"]
+
+# Tek seçimli alanlar: alan → kategoriler. Her kategori (İngilizce, Türkçe) form etiketleridir
+# (frontend'de SurveyPage İngilizce, SurveyForm Türkçe etiket gönderiyor); ilki özellik adında kullanılır.
+CATEGORICAL_FIELDS = {
+    "gender": [("Female", "Kadın"), ("Male", "Erkek"), ("Prefer not to say", "Belirtmek istemiyorum")],
+    "skin_type": [("Dry", "Kuru"), ("Oily", "Yağlı"), ("Combination", "Karma"), ("Normal",), ("Sensitive", "Hassas")],
+    "sun_sensitive": [("Yes", "Evet"), ("No", "Hayır"), ("Not sure", "Emin değilim")],
+    "physical_sensitive": [("Yes", "Evet"), ("Mildly sensitive", "Hafif hassas"), ("No", "Hayır")],
+    "itching": [("Yes", "Evet"), ("No", "Hayır"), ("Occasionally", "Ara sıra")],
+    "allergies": [("Yes", "Evet"), ("No", "Hayır"), ("Not sure", "Emin değilim")],
+    "hair_type": [("Oily", "Yağlı"), ("Dry", "Kuru"), ("Normal",)],
+    "diet": [("Regular", "Düzenli"), ("Vegetarian", "Vejetaryen"), ("Vegan",), ("Ketogenic", "Ketojenik"),
+             ("Other", "Diğer")],
+    "water_intake": [("Less than 1 liter", "1 litreden az"), ("1–2 liters", "1–2 litre"), ("2–3 liters", "2–3 litre"),
+                     ("More than 3 liters", "3 litreden fazla")],
+    "exercise_per_week": [("I don’t regularly exercise", "Düzenli egzersiz yapmıyorum"), ("Once a week", "Haftada bir"),
+                          ("2 to 4 days a week", "Haftada 2–4 gün"), ("5 to 7 days a week", "Haftada 5–7 gün")],
+    "chronic_disease": [("Yes", "Evet"), ("No", "Hayır")],
+    "medication": [("Yes", "Evet"), ("No", "Hayır")],
+    "dermatologist_visit": [("Yes", "Evet"), ("No", "Hayır")],
+}
+# Çok seçimli alanlar (seçilen her kategori 1/sqrt(seçim sayısı) ağırlık alır; alan vektörün normunu domine etmesin)
+MULTI_LABEL_FIELDS = {
+    "skin_issues": [("Acne", "Akne"), ("Blackheads", "Siyah nokta"), ("Redness", "Kızarıklık"),
+                    ("Flaking", "Pullanma"), ("Eczema", "Egzama"), ("Other", "Diğer")],
+    "hair_issues": [("Dandruff", "Kepek"), ("Itching", "Kaşıntı"), ("Hair loss", "Saç dökülmesi"),
+                    ("Redness", "Kızarıklık"), ("Eczema", "Egzama"), ("Other", "Diğer")],
+}
+# Sayısal alanlar: alan → ölçek (değer / ölçek, 0-1 aralığına kırpılır; boş değer 0)
+NUMERIC_FIELDS = {"age": 100, "alcohol_per_week": 20, "cigarettes_per_day": 40}
+
+
+def _normalize(label) -> str:
+    """Etiket eşleştirmesi büyük/küçük harf, boşluk ve tipografik tire / kesme işaretinden etkilenmesin."""
+    if not isinstance(label, str):
+        return ""
+    return label.strip().casefold().replace("’", "'").replace("–", "-")
+
+
+def _build_columns():
+    names, columns, numeric_columns = [], {}, {}
+    for field, categories in {**CATEGORICAL_FIELDS, **MULTI_LABEL_FIELDS}.items():
+        for category in categories:
+            for label in category:
+                columns[(field, _normalize(label))] = len(names)
+            names.append(f"{field}={category[0]}")
+    for field in NUMERIC_FIELDS:
+        numeric_columns[field] = len(names)
+        names.append(field)
+    return names, columns, numeric_columns
+
+
+# Vektördeki her sütunun adı (ör. "skin_type=Oily", "age") ve etiket → sütun eşlemesi
+FEATURE_NAMES, _COLUMNS, _NUMERIC_COLUMNS = _build_columns()
+
+
+def encode_surveys(surveys: list) -> np.ndarray:
+    """
+    Anketleri (SurveyModel.dict() biçiminde) (len(surveys), len(FEATURE_NAMES)) float32 matrise çevirir.
+    Bilinmeyen etiketler yok sayılır. Tüm değerler tek bir fancy-index atamasıyla yazılır.
+    """
+    rows, cols, values = [], [], []
+    for row, survey in enumerate(surveys):
+        for field in CATEGORICAL_FIELDS:
+            column = _COLUMNS.get((field, _normalize(survey.get(field))))
+            if column is not None:
+                rows.append(row)
+                cols.append(column)
+                values.append(1.0)
+        for field in MULTI_LABEL_FIELDS:
+            selected = {_COLUMNS.get((field, _normalize(label))) for label in survey.get(field) or []}
+            selected.discard(None)
+            for column in selected:
+                rows.append(row)
+                cols.append(column)
+                values.append(1.0 / np.sqrt(len(selected)))
+        for field, scale in NUMERIC_FIELDS.items():
+            value = survey.get(field)
+            if isinstance(value, (int, float)):
+                rows.append(row)
+                cols.append(_NUMERIC_COLUMNS[field])
+                values.append(min(max(value / scale, 0.0), 1.0))
+
+    matrix = np.zeros((len(surveys), len(FEATURE_NAMES)), dtype=np.float32)
+    matrix[rows, cols] = values
+    return matrix
+
+
+def _squared_distances(X: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """(n, k) kare uzaklık matrisi: |x|² - 2x·c + |c|²"""
+    distances = (X * X).sum(axis=1)[:, None] - 2 * X @ centroids.T + (centroids * centroids).sum(axis=1)[None, :]
+    return np.maximum(distances, 0)
+
+
+def _init_centroids(X: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """k-means++ başlangıcı (ilk batch üzerinden)."""
+    k = min(k, len(X))
+    centroids = [X[rng.integers(len(X))]]
+    for _ in range(1, k):
+        distances = _squared_distances(X, np.array(centroids)).min(axis=1)
+        total = distances.sum()
+        index = rng.choice(len(X), p=distances / total) if total > 0 else rng.integers(len(X))
+        centroids.append(X[index])
+    return np.array(centroids, dtype=np.float32)
+
+
+class SegmentModel:
+    """Segment merkezleri ve her segmentin büyüklüğü; en yakın merkeze atama yapar."""
+
+    def __init__(self, centroids: np.ndarray, sizes=None, version: str = None):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.sizes = list(sizes) if sizes is not None else [0] * len(self.centroids)
+        self.version = version or datetime.utcnow().isoformat()
+
+    def assign(self, X: np.ndarray) -> np.ndarray:
+        return _squared_distances(X, self.centroids).argmin(axis=1)
+
+    def profile(self, segment: int, top: int = 6) -> list:
+        """
+        Segmenti diğerlerinden ayıran özellikler: merkezde tüm kullanıcıların ortalamasından
+        en fazla yüksek olan sütunlar (herkeste ortak cevaplar segmenti tarif etmez).
+        """
+        weights = np.asarray(self.sizes, dtype=np.float64) if sum(self.sizes) else None
+        overall = np.average(self.centroids, axis=0, weights=weights)
+        centroid = self.centroids[segment]
+        lift = centroid - overall
+        order = np.argsort(-lift)[:top]
+        return [
+            {"feature": FEATURE_NAMES[i], "value": round(float(centroid[i]), 3), "average": round(float(overall[i]), 3)}
+            for i in order if lift[i] > 0
+        ]
+
+    def to_document(self) -> dict:
+        return {
+            "name": SEGMENT_MODEL_NAME,
+            "version": self.version,
+            "feature_names": FEATURE_NAMES,
+            "centroids": self.centroids.tolist(),
+            "sizes": self.sizes,
+        }
+
+    @classmethod
+    def from_document(cls, document: dict):
+        if document is None or document.get("feature_names") != FEATURE_NAMES:
+            return None  # Anket alanları değişmiş; segmentler yeniden hesaplanmalı
+        return cls(document["centroids"], document.get("sizes"), document.get("version"))
+
+
+class SegmentCache:
+    """Kullanıcı → segment LRU cache'i (chatbot / classifier her istekte DB'ye gitmesin)."""
+
+    def __init__(self, max_entries: int = SEGMENT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, email: str, default=None):
+        with self._lock:
+            if email not in self._entries:
+                return default
+            self._entries.move_to_end(email)
+            return self._entries[email]
+
+    def put(self, email: str, segment):
+        with self._lock:
+            self._entries[email] = segment
+            self._entries.move_to_end(email)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+segment_cache = SegmentCache()
+_model = None
+_model_loaded_at = None  # ✅ Henüz yüklenmedi (monotonic saat açılışta küçük olabilir)
+_MISSING = object()
+
+
+async def get_segment_model():
+    """Güncel segment modelini döner (DB'den SEGMENT_MODEL_REFRESH_SECONDS aralıkla tazelenir; yoksa None)."""
+    global _model, _model_loaded_at
+    if _model_loaded_at is None or time.monotonic() - _model_loaded_at > SEGMENT_MODEL_REFRESH_SECONDS:
+        model = SegmentModel.from_document(await segments_collection.find_one({"name": SEGMENT_MODEL_NAME}))
+        if model is None or _model is None or model.version != _model.version:
+            segment_cache.clear()
+        _model, _model_loaded_at = model, time.monotonic()
+    return _model
+
+
+async def _survey_batches(batch_size: int):
+    """Anketi olan kullanıcıları (email listesi, özellik matrisi) batch'leri halinde okur."""
+    cursor = users_collection.find({"survey": {"$exists": True}}, {"email": 1, "survey": 1}).batch_size(batch_size)
+    emails, surveys = [], []
+    async for user in cursor:
+        emails.append(user["email"])
+        surveys.append(user["survey"])
+        if len(emails) == batch_size:
+            yield emails, encode_surveys(surveys)
+            emails, surveys = [], []
+    if emails:
+        yield emails, encode_surveys(surveys)
+
+
+async def build_segments(k: int = SEGMENT_COUNT, epochs: int = SEGMENT_EPOCHS,
+                         batch_size: int = SEGMENT_BATCH_SIZE, seed: int = SEGMENT_SEED):
+    """
+    Tüm kullanıcıları mini-batch k-means ile segmentlere ayırır, her kullanıcının segmentini
+    ve merkezleri DB'ye yazar. Bellekte aynı anda yalnızca bir batch tutulur.
+    :return: SegmentModel (anketi olan kullanıcı yoksa None)
+    """
+    rng = np.random.default_rng(seed)
+    centroids, counts = None, None
+    started = time.perf_counter()
+
+    for _ in range(epochs):
+        async for _, X in _survey_batches(batch_size):
+            if centroids is None:
+                centroids = _init_centroids(X, k, rng)
+                counts = np.zeros(len(centroids))
+            labels = _squared_distances(X, centroids).argmin(axis=1)
+            # Her merkez, kendisine düşen örneklerin ortalamasına 1/görülen örnek oranında yaklaşır
+            for segment in np.unique(labels):
+                members = X[labels == segment]
+                counts[segment] += len(members)
+                centroids[segment] += (len(members) / counts[segment]) * (members.mean(axis=0) - centroids[segment])
+
+    if centroids is None:
+        logger.info("segmentation_skipped reason=no_surveys")
+        return None
+
+    # ✅ Son geçiş: her kullanıcının segmenti, segment başına tek update_many ile yazılır
+    model = SegmentModel(centroids)
+    sizes = np.zeros(len(centroids), dtype=int)
+    async for emails, X in _survey_batches(batch_size):
+        labels = model.assign(X)
+        for segment in np.unique(labels):
+            members = [email for email, label in zip(emails, labels) if label == segment]
+            sizes[segment] += len(members)
+            await users_collection.update_many({"email": {"$in": members}}, {"$set": {"segment": int(segment)}})
+    model.sizes = sizes.tolist()
+
+    await segments_collection.update_one({"name": SEGMENT_MODEL_NAME}, {"$set": model.to_document()}, upsert=True)
+    global _model, _model_loaded_at
+    _model, _model_loaded_at = model, time.monotonic()
+    segment_cache.clear()
+    logger.info("segmentation_done segments=%d users=%d seconds=%.2f",
+                len(centroids), int(sizes.sum()), time.perf_counter() - started)
+    return model
+
+
+async def assign_segment(survey: dict):
+    """Tek bir anketin en yakın segmenti (segmentler henüz hesaplanmadıysa None)."""
+    model = await get_segment_model()
+    if model is None:
+        return None
+    return int(model.assign(encode_surveys([survey]))[0])
+
+
+async def get_user_segment(email: str):
+    """Kullanıcının segmenti (cache'ten; yoksa DB'den okunup cache'lenir). Segmenti yoksa None."""
+    await get_segment_model()  # Model değiştiyse cache temizlenir
+    segment = segment_cache.get(email, _MISSING)
+    if segment is _MISSING:
+        user = await users_collection.find_one({"email": email}, {"segment": 1})
+        segment = user.get("segment") if user else None
+        segment_cache.put(email, segment)
+    return segment
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Survey based user segmentation (mini-batch k-means)")
+    parser.add_argument("--segments", type=int, default=SEGMENT_COUNT)
+    parser.add_argument("--epochs", type=int, default=SEGMENT_EPOCHS)
+    parser.add_argument("--batch-size", type=int, default=SEGMENT_BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=SEGMENT_SEED)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    model = asyncio.run(build_segments(args.segments, args.epochs, args.batch_size, args.seed))
+    if model is None:
+        print("No survey answers found; nothing to segment.")
+        return
+    for segment, size in enumerate(model.sizes):
+        features = ", ".join(f"{p['feature']} ({p['value']})" for p in model.profile(segment))
+        print(f"Segment {segment}: {size} users — {features}")
+
+
+if __name__ == "__main__":
+    main()
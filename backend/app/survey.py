@@ -1,17 +1,32 @@
-from fastapi import APIRouter, HTTPException
-from app.db import users_collection
+from fastapi import APIRouter, HTTPException, Depends
+from app.users import update_user
 from app.models import SurveyModel
 from app.utils import decode_token
+from app.scheduler import admit
+from app.segmentation import assign_segment, get_segment_model, get_user_segment, segment_cache
 
 survey_router = APIRouter()
 
-@survey_router.post("/submit")
-def submit_survey(survey: SurveyModel, token: str):
+@survey_router.post("/submit", dependencies=[Depends(admit("db"))])
+async def submit_survey(survey: SurveyModel, token: str):
     email = decode_token(token)
     if not email:
         raise HTTPException(status_code=401, detail="Invalid token")
-    users_collection.update_one(
-        {"email": email},
-        {"$set": {"survey": survey.dict()}}
-    )
-    return {"message": "Survey submitted"}
+    # ✅ Kullanıcı mevcut segmentlerden en yakınına atanır (segmentler henüz hesaplanmadıysa None)
+    survey_data = survey.dict()
+    segment = await assign_segment(survey_data)
+    await update_user(email, {"survey": survey_data, "segment": segment})
+    segment_cache.put(email, segment)
+    return {"message": "Survey submitted", "segment": segment}
+
+# ✅ Kullanıcının segmenti ve segmenti tarif eden özellikler
+@survey_router.get("/segment", dependencies=[Depends(admit("db"))])
+async def user_segment(token: str):
+    email = decode_token(token)
+    if not email:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    segment = await get_user_segment(email)
+    if segment is None:
+        raise HTTPException(status_code=404, detail="User has no segment yet")
+    model = await get_segment_model()
+    return {"segment": segment, "profile": model.profile(segment) if model else []}
@@ -0,0 +1,31 @@
+import logging
+from pymongo.errors import OperationFailure
+from app.db import users_collection
+
+logger = logging.getLogger(__name__)
+
+async def ensure_user_indexes():
+    """
+    email üzerinde unique index (login / register sorguları için; eşzamanlı kayıtlarda çift hesabı engeller).
+    Eski veritabanında aynı email'le birden fazla kullanıcı ya da unique olmayan eski index varsa
+    uyarı loglanır ve normal index ile devam edilir (kayıtta email kontrolü yine yapılır).
+    """
+    try:
+        await users_collection.create_index("email", unique=True)
+    except OperationFailure as e:  # DuplicateKeyError dahil
+        logger.warning(
+            "user_email_index_not_unique error=%s; remove duplicate emails (and the old email_1 index) "
+            "to enforce unique registrations", e)
+        await users_collection.create_index("email")
+
+async def get_user_by_email(email: str):
+    """Email'e göre kullanıcıyı döndür (yoksa None)"""
+    return await users_collection.find_one({"email": email})
+
+async def create_user(user: dict):
+    """Yeni kullanıcıyı kaydet"""
+    await users_collection.insert_one(user)
+
+async def update_user(email: str, fields: dict):
+    """Kullanıcının verilen alanlarını güncelle"""
+    await users_collection.update_one({"email": email}, {"$set": fields})
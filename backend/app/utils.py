@@ -1,14 +1,42 @@
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
+import hmac
+import logging
+import threading
+import time
 import os
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+# ✅ bcrypt work factor; değişirse eski hash'ler login sırasında yeni factor ile yenilenir
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# ✅ Hash / verify işlemleri event loop dışında, bu kadar thread'lik havuzda çalışır
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# ✅ Doğrulanmış JWT'lerin tutulduğu LRU cache boyutu (0 = kapalı)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,  # farklı factor'lü hash'ler needs_update ile yenilenir
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="pwd-hash")
 
 SECRET_KEY = os.getenv("SECRET_KEY", "supersecret")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 1 gün
 
+# token digest -> (sub, exp timestamp)
+_token_cache = OrderedDict()
+_token_cache_lock = threading.Lock()
+
 def hash_password(password: str) -> str:
     """ Kullanıcı şifresini hash'ler """
     return pwd_context.hash(password)
@@ -17,6 +45,28 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """ Girilen şifre ile hash'i karşılaştırır """
     return pwd_context.verify(plain_password, hashed_password)
 
+def _verify_and_update(plain_password: str, stored_password: str):
+    if pwd_context.identify(stored_password, required=False) is None:
+        # Eski kayıtlar: şifre düz metin saklanmış; doğruysa hash'e taşınır
+        if hmac.compare_digest(plain_password.encode("utf-8"), stored_password.encode("utf-8")):
+            return True, pwd_context.hash(plain_password)
+        return False, None
+    return pwd_context.verify_and_update(plain_password, stored_password)
+
+async def hash_password_async(password: str) -> str:
+    """ hash_password'ün event loop'u bloklamayan hali """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, hash_password, password)
+
+async def verify_and_update_password(plain_password: str, stored_password: str):
+    """
+    Şifreyi event loop dışında doğrular.
+    :return: (doğru mu, yeni hash ya da None) — yeni hash dönerse kayıt güncellenmeli
+             (eski work factor ya da düz metin şifre)
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, _verify_and_update, plain_password, stored_password)
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     """ Kullanıcıya JWT token üretir """
     to_encode = data.copy()
@@ -25,11 +75,28 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def decode_token(token: str):
+    """ Token'ı doğrular ve sub alanını döner; doğrulanan token'lar süreleri dolana kadar cache'lenir """
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    with _token_cache_lock:
+        cached = _token_cache.get(digest)
+        if cached is not None:
+            if cached[1] > time.time():
+                _token_cache.move_to_end(digest)
+                return cached[0]
+            del _token_cache[digest]
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        print("✅ JWT Payload:", payload)  # 👈 DEBUG SATIRI
-        return payload.get("sub")
     except JWTError as e:
-        print("❌ JWT Decode Error:", str(e))  # 👈 DEBUG SATIRI
+        logger.info("jwt_decode_failed error=%s", e)
         return None
 
+    sub = payload.get("sub")
+    exp = payload.get("exp")
+    if TOKEN_CACHE_SIZE and sub is not None and exp is not None:
+        with _token_cache_lock:
+            _token_cache[digest] = (sub, float(exp))
+            _token_cache.move_to_end(digest)
+            while len(_token_cache) > TOKEN_CACHE_SIZE:
+                _token_cache.popitem(last=False)
+    return sub
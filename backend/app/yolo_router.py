@@ -1,26 +1,152 @@
-from fastapi import APIRouter, UploadFile, File
-import sys, os, tempfile, shutil
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request, Response, Depends
+from fastapi.responses import JSONResponse
+from typing import List, Optional
+from fastapi.concurrency import run_in_threadpool
+import sys, os
 
 # Klasör yolunu import edebilmek için ekle
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from classification_bot.classifier import process_image
+from classification_bot.classifier import process_image, process_images, result_cache
+from yolo.yolo_service import get_batch_stats, get_worker_health
+from yolo.annotation_store import annotation_store, preferred_format, ANNOTATION_VARIANTS, FORMAT_MEDIA_TYPES
+from app.scheduler import admit, client_key, rate_limited
+from app.jobs import classification_jobs, get_job, validate_callback_url, InvalidCallbackError, QueueFullError, PENDING_STATUSES
+from app.chatbot_router import get_current_user
 
 yolo_router = APIRouter()
 
-@yolo_router.post("/upload")
-async def upload_image(file: UploadFile = File(...)):
-    # ✅ Dosyayı geçici kaydet
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-        shutil.copyfileobj(file.file, tmp)
-        tmp_path = tmp.name
+# ✅ /upload_batch ile tek istekte gönderilebilecek en fazla resim
+MAX_BATCH_UPLOAD_FILES = int(os.getenv("MAX_BATCH_UPLOAD_FILES", "10"))
 
-    # ✅ YOLO + Gemini yorumunu al
-    result = process_image(tmp_path)
+@yolo_router.post("/upload", dependencies=[Depends(admit("inference"))])
+async def upload_image(request: Request, file: UploadFile = File(...)):
+    # ✅ Dosyayı belleğe oku (geçici dosya yok)
+    image_bytes = await file.read()
+
+    # ✅ YOLO + Gemini yorumunu al (event loop'u bloklamamak için thread pool'da)
+    result = await run_in_threadpool(process_image, image_bytes, client_key(request))
 
     return {
         "top_class": result["top_class"],
         "confidence": result["confidence"],
         "gemini_response": result["gemini_response"],
-        "boxed_image_url": "/static/boxed.jpg"  # ✅ Frontend bu URL’den çekecek
-    }
\ No newline at end of file
+        "boxed_image_url": result["boxed_image_url"]  # ✅ Frontend bu URL’den çekecek
+    }
+
+# ✅ Çoklu resim: tek YOLO batch'i, sınıf başına tek Gemini açıklaması
+@yolo_router.post("/upload_batch", dependencies=[Depends(admit("inference"))])
+async def upload_batch(files: List[UploadFile] = File(...)):
+    if len(files) > MAX_BATCH_UPLOAD_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_UPLOAD_FILES} images per request")
+
+    images = [await file.read() for file in files]
+    result = await run_in_threadpool(process_images, images)
+
+    for file, image_result in zip(files, result["images"]):
+        image_result["filename"] = file.filename
+    return result
+
+# ✅ Asenkron sınıflandırma: job_id hemen döner, sonuç polling ya da webhook ile alınır
+@yolo_router.post("/jobs", status_code=202, dependencies=[Depends(rate_limited("inference"))])
+async def submit_job(file: UploadFile = File(...), callback_url: Optional[str] = Form(None),
+                     user_email: str = Depends(get_current_user)):
+    if callback_url:
+        try:
+            # DNS çözümlemesi bloklayabilir
+            await run_in_threadpool(validate_callback_url, callback_url)
+        except InvalidCallbackError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    image_bytes = await file.read()
+    try:
+        job_id = await classification_jobs.submit(image_bytes, file.filename, callback_url, owner=user_email)
+    except QueueFullError:
+        # ✅ Backpressure: kuyruk doluysa istemci tekrar denesin
+        raise HTTPException(status_code=503, detail="Classification queue is full", headers={"Retry-After": "5"})
+
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/yolo/jobs/{job_id}",
+        "result_url": f"/yolo/jobs/{job_id}/result",
+    }
+
+@yolo_router.get("/jobs/stats")
+async def job_stats():
+    return classification_jobs.stats()
+
+@yolo_router.get("/jobs/{job_id}")
+async def job_status(job_id: str, user_email: str = Depends(get_current_user)):
+    job = await get_job(job_id, owner=user_email)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job.pop("result", None)
+    return job
+
+@yolo_router.get("/jobs/{job_id}/result")
+async def job_result(job_id: str, user_email: str = Depends(get_current_user)):
+    job = await get_job(job_id, owner=user_email)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] in PENDING_STATUSES:
+        # Henüz bitmedi: istemci polling'e devam etsin
+        return JSONResponse(status_code=202, content={"job_id": job_id, "status": job["status"]})
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=job.get("error") or f"Job {job['status']}")
+    return job["result"]
+
+# ✅ Tekrar yüklenen resim cache'inin isabet oranı
+@yolo_router.get("/cache_stats")
+async def cache_stats():
+    return result_cache.stats()
+
+# ✅ Micro-batching ayarları ve batch doluluk istatistikleri
+@yolo_router.get("/batch_stats")
+async def batch_stats():
+    return get_batch_stats()
+
+# ✅ Inference worker havuzunun sağlık durumu (hiç hazır worker yoksa 503)
+@yolo_router.get("/workers")
+async def worker_health(response: Response):
+    health = get_worker_health()
+    if health["num_workers"] and health["ready_workers"] == 0:
+        response.status_code = 503
+    return health
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+# ✅ Boxlu görsel: ilk istendiğinde yalnızca istenen boyut (thumb / screen / full) üretilir; format
+# Accept'e göre (WebP ya da JPEG) seçilir. İçerik hash'li olduğu için uzun süre cache'lenebilir, ETag ile 304 döner.
+# Örnek: /yolo/annotated/<key>?size=thumb
+async def _annotated_response(image_key: str, size: str, fmt: str, if_none_match: Optional[str]):
+    if size not in ANNOTATION_VARIANTS:
+        raise HTTPException(status_code=400, detail=f"size must be one of: {', '.join(ANNOTATION_VARIANTS)}")
+    if not await run_in_threadpool(annotation_store.contains, image_key):
+        raise HTTPException(status_code=404, detail="Annotated image not found")
+
+    etag = annotation_store.etag(image_key, size, fmt)
+    headers = {
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "ETag": etag,
+        "Vary": "Accept",
+    }
+    # ✅ İstemcideki kopya hâlâ geçerli: görseli okumadan/üretmeden 304
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    data = await run_in_threadpool(annotation_store.get, image_key, size, fmt)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Annotated image not found")
+    return Response(content=data, media_type=FORMAT_MEDIA_TYPES[fmt], headers=headers)
+
+# Eski sürümün verdiği .jpg URL'leri (cache'teki sonuçlar, job kayıtları) her zaman JPEG döner
+@yolo_router.get("/annotated/{image_key}.jpg")
+async def annotated_image_jpeg(image_key: str, request: Request, size: str = "full"):
+    return await _annotated_response(image_key, size, "jpeg", request.headers.get("if-none-match"))
+
+@yolo_router.get("/annotated/{image_key}")
+async def annotated_image(image_key: str, request: Request, size: str = "full"):
+    fmt = preferred_format(request.headers.get("accept", ""))
+    return await _annotated_response(image_key, size, fmt, request.headers.get("if-none-match"))
@@ -0,0 +1,74 @@
+"""
+İki benchmark sonucunu (load_test ya da microbench JSON'u) karşılaştırır.
+
+Kullanım (repo kökünden):
+    python -m benchmarks.compare benchmarks/results/load_test-<eski>.json benchmarks/results/load_test-<yeni>.json
+    python -m benchmarks.compare eski.json yeni.json --threshold 5
+
+Gecikme metriklerinde artış, throughput'ta düşüş gerileme sayılır; --threshold yüzdesini aşan
+gerileme varsa çıkış kodu 1 olur (CI'da kullanılabilir).
+"""
+import argparse
+import json
+
+# Küçük olanın iyi olduğu metrikler; throughput_rps için büyük olan iyidir
+LATENCY_METRICS = ("mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms")
+METRICS = ("throughput_rps",) + LATENCY_METRICS
+
+
+def _flatten(results: dict, prefix: str = "") -> dict:
+    """{"history": {"get_recent_messages": {...}}} → {"history.get_recent_messages": {...}}"""
+    flat = {}
+    for name, value in results.items():
+        if not isinstance(value, dict):
+            continue
+        key = f"{prefix}{name}"
+        if any(metric in value for metric in METRICS):
+            flat[key] = value
+        else:
+            flat.update(_flatten(value, f"{key}."))
+    return flat
+
+
+def compare(old: dict, new: dict, threshold: float) -> tuple:
+    """:return: (tablo satırları, gerileme var mı)"""
+    old_results, new_results = _flatten(old["results"]), _flatten(new["results"])
+    rows, regressed = [], False
+    for name in sorted(set(old_results) & set(new_results)):
+        for metric in METRICS:
+            before, after = old_results[name].get(metric), new_results[name].get(metric)
+            if not before or after is None:
+                continue
+            change = 100 * (after - before) / before
+            worse = change > threshold if metric in LATENCY_METRICS else change < -threshold
+            regressed |= worse
+            rows.append((name, metric, before, after, change, "REGRESSION" if worse else ""))
+    return rows, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10, help="Gerileme sayılacak yüzde değişim")
+    args = parser.parse_args()
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    if old["benchmark"] != new["benchmark"]:
+        raise SystemExit(f"Cannot compare '{old['benchmark']}' with '{new['benchmark']}' results")
+
+    print(f"{old['benchmark']}: {old['git_commit'][:12]} → {new['git_commit'][:12]}")
+    if old["settings"] != new["settings"]:
+        print("⚠️ Settings differ between runs; numbers may not be comparable")
+
+    rows, regressed = compare(old, new, args.threshold)
+    for name, metric, before, after, change, flag in rows:
+        print(f"{name:<40} {metric:<15} {before:>12.3f} {after:>12.3f} {change:>+8.1f}% {flag}")
+    raise SystemExit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
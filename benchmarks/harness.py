@@ -0,0 +1,154 @@
+"""
+Benchmark'ların ortak yardımcıları: yerel taklit ortamı, sentetik resimler,
+yüzdelik hesapları ve sonuçların commit bilgisiyle JSON olarak kaydedilmesi.
+"""
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(REPO_DIR, "backend")
+RESULTS_DIR = os.path.join(REPO_DIR, "benchmarks", "results")
+
+
+def use_local_stand_ins(llm_latency_ms: float):
+    """
+    Gemini ve Mongo yerine süreç içi taklitleri seçer. Backend modülleri import edilmeden
+    önce çağrılmalı (ayarlar import sırasında okunur). Açıkça verilmiş ortam değişkenleri korunur.
+    """
+    os.environ.setdefault("MONGO_BACKEND", "fake")
+    os.environ.setdefault("LLM_TRANSPORT", "fake")
+    os.environ["LLM_FAKE_LATENCY_MS"] = str(llm_latency_ms)
+    # Kullanıcı başına limitler kapasite ölçümünü bozmasın (havuzlar ve kuyruklar açık kalır)
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+    # Açıklama cache'i diskteki gerçek cache'e karışmasın
+    os.environ.setdefault("EXPLANATION_CACHE_PATH", os.path.join(RESULTS_DIR, ".explanation_cache.json"))
+
+
+def add_backend_to_path():
+    """Backend'in `app` paketi ve repo kökü (yolo, classification_bot, common) import edilebilsin."""
+    for path in (REPO_DIR, BACKEND_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def import_backend_app():
+    """backend/app.main'i import eder (static klasörü cwd'ye göre bağlandığı için backend/ içinden)."""
+    add_backend_to_path()
+    os.chdir(BACKEND_DIR)
+    from app.main import app
+
+    return app
+
+
+def model_available() -> bool:
+    from yolo.model_backends import BACKEND_PATHS, YOLO_BACKEND
+
+    return os.path.exists(BACKEND_PATHS.get(YOLO_BACKEND, ""))
+
+
+def synthetic_images(count: int, width: int = 1280, height: int = 960, seed: int = 0) -> list:
+    """
+    Tekrarlanabilir, telefon fotoğrafı boyutunda JPEG'ler: ten rengi zemin üzerinde
+    farklı boyutlarda koyu lekeler. Her çağrıda aynı seed aynı baytları üretir.
+    """
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width]
+    images = []
+    for _ in range(count):
+        base = np.array([210, 160, 140]) + rng.normal(0, 6, (height, width, 3))
+        for _ in range(rng.integers(1, 5)):
+            cx, cy = rng.integers(0, width), rng.integers(0, height)
+            radius = rng.integers(15, 120)
+            mask = (xx - cx) ** 2 + (yy - cy) ** 2 < radius ** 2
+            base[mask] *= rng.uniform(0.4, 0.8)
+        buffer = io.BytesIO()
+        Image.fromarray(base.clip(0, 255).astype(np.uint8)).save(buffer, format="JPEG", quality=90)
+        images.append(buffer.getvalue())
+    return images
+
+
+def load_images(directory: str, count: int) -> list:
+    """Klasördeki resimleri okur (gerçek örnek fotoğraflarla ölçmek için)."""
+    names = sorted(n for n in os.listdir(directory) if n.lower().endswith((".jpg", ".jpeg", ".png")))
+    images = []
+    for name in names[:count]:
+        with open(os.path.join(directory, name), "rb") as f:
+            images.append(f.read())
+    return images
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies: list, elapsed: float, errors: int = 0) -> dict:
+    """Gecikme listesinden (saniye) throughput ve ms cinsinden yüzdelikler."""
+    values = sorted(latencies)
+    if not values:
+        return {"requests": 0, "errors": errors}
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else None,
+        "mean_ms": round(1000 * statistics.fmean(values), 3),
+        "p50_ms": round(1000 * percentile(values, 0.50), 3),
+        "p90_ms": round(1000 * percentile(values, 0.90), 3),
+        "p99_ms": round(1000 * percentile(values, 0.99), 3),
+        "max_ms": round(1000 * values[-1], 3),
+    }
+
+
+def time_calls(fn, repeat: int, warmup: int = 2) -> dict:
+    """fn'i warmup kez ısıtıp repeat kez ölçer."""
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, text=True).strip()
+        dirty = subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"],
+                                        cwd=REPO_DIR, text=True).strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_results(name: str, settings: dict, results: dict, output: str = None) -> str:
+    """Sonuçları commit, zaman ve ortam bilgisiyle JSON olarak kaydeder; dosya yolunu döner."""
+    commit = git_commit()
+    payload = {
+        "benchmark": name,
+        "git_commit": commit,
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": settings,
+        "results": results,
+    }
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{name}-{commit[:12]}-{int(time.time())}.json")
+    with open(output, "w") as f:
+        json.dump(payload, f, indent=4)
+    return output
@@ -0,0 +1,167 @@
+"""
+Dermin backend yük testi: /auth/login, /chatbot/chat, /chatbot/get_history ve /yolo/upload
+uçlarını ayarlanabilir eşzamanlılıkla çağırır; throughput ve gecikme yüzdeliklerini JSON'a yazar.
+
+Varsayılan olarak uygulama süreç içinde (ASGI) çalıştırılır; Gemini yerine gecikmesi ayarlanabilen
+sahte LLM, Mongo yerine bellek içi sahte veritabanı kullanılır, yani ağ ve API anahtarı gerekmez.
+Çalışan bir sunucuyu ölçmek için --base-url verilir (o zaman sunucunun kendi ayarları geçerlidir).
+
+Kullanım (repo kökünden):
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --scenarios chat history --concurrency 32 --requests 500 --llm-latency-ms 50
+    python -m benchmarks.load_test --images-dir ~/dermin_samples --base-url http://localhost:8000
+
+/yolo/upload, süreç içi modda yolo/yolov8s_50epochs.pt (ya da YOLO_BACKEND'in export'u) gerektirir.
+Sonuçlar benchmarks/results/ altına commit hash'iyle kaydedilir; iki koşu benchmarks.compare ile karşılaştırılır.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.harness import (
+    import_backend_app, load_images, model_available, summarize, synthetic_images,
+    use_local_stand_ins, write_results,
+)
+
+SCENARIOS = ("login", "chat", "history", "upload")
+PASSWORD = "benchmark-password"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Dermin backend load test")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument("--concurrency", type=int, default=8, help="Aynı anda açık istek sayısı")
+    parser.add_argument("--requests", type=int, default=200, help="Senaryo başına istek sayısı")
+    parser.add_argument("--users", type=int, default=16, help="Kayıt edilecek test kullanıcısı sayısı")
+    parser.add_argument("--history-messages", type=int, default=200, help="Kullanıcı başına önceden yazılan mesaj")
+    parser.add_argument("--llm-latency-ms", type=float, default=200, help="Sahte LLM'in cevap gecikmesi")
+    parser.add_argument("--images", type=int, default=8, help="Kullanılacak farklı resim sayısı")
+    parser.add_argument("--images-dir", help="Sentetik resimler yerine bu klasördeki resimler")
+    parser.add_argument("--base-url", help="Süreç içi uygulama yerine çalışan bir sunucu")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output", help="Sonuç dosyası (varsayılan: benchmarks/results/...)")
+    return parser.parse_args()
+
+
+async def run_scenario(client, request_fn, total: int, concurrency: int) -> dict:
+    """request_fn(i) → httpx cevabı; total isteği en fazla concurrency eşzamanlı olacak şekilde gönderir."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], []
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await request_fn(client, i)
+                ok = response.status_code < 400
+            except Exception as e:
+                ok, response = False, e
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors.append(getattr(response, "status_code", type(response).__name__))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    result = summarize(latencies, time.perf_counter() - started, len(errors))
+    if errors:
+        result["error_kinds"] = {str(k): errors.count(k) for k in set(errors)}
+    return result
+
+
+async def prepare_users(client, count: int, history_messages: int) -> list:
+    """Test kullanıcılarını kaydeder, token'larını alır ve geçmişlerini sahte mesajlarla doldurur."""
+    run_id = int(time.time())
+    users = []
+    for i in range(count):
+        email = f"bench{run_id}_{i}@example.com"
+        response = await client.post("/auth/register", json={"username": f"bench{i}", "email": email, "password": PASSWORD})
+        response.raise_for_status()
+        users.append({"email": email, "token": response.json()["token"]})
+
+    if history_messages and users:
+        from app.chat import add_messages
+
+        for user in users:
+            messages = [("user" if j % 2 == 0 else "assistant", f"benchmark message {j}") for j in range(history_messages)]
+            await add_messages(user["email"], messages)
+    return users
+
+
+def build_requests(users: list, images: list) -> dict:
+    def auth(i):
+        return {"Authorization": f"Bearer {users[i % len(users)]['token']}"}
+
+    async def login(client, i):
+        return await client.post("/auth/login", json={"email": users[i % len(users)]["email"], "password": PASSWORD})
+
+    async def chat(client, i):
+        return await client.post("/chatbot/chat", json={"message": f"Is this mole dangerous? ({i})"}, headers=auth(i))
+
+    async def history(client, i):
+        return await client.get("/chatbot/get_history", params={"limit": 50}, headers=auth(i))
+
+    async def upload(client, i):
+        files = {"file": (f"sample_{i % len(images)}.jpg", images[i % len(images)], "image/jpeg")}
+        return await client.post("/yolo/upload", files=files)
+
+    return {"login": login, "chat": chat, "history": history, "upload": upload}
+
+
+async def run(args, app=None) -> dict:
+    import httpx
+
+    if app is not None:
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://dermin", timeout=args.timeout)
+    else:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+
+    images = load_images(args.images_dir, args.images) if args.images_dir else synthetic_images(args.images)
+    results = {}
+    async with client:
+        # Süreç dışı sunucuda geçmiş, mesaj uçları üzerinden değil doğrudan DB'ye yazılamaz
+        users = await prepare_users(client, args.users, args.history_messages if app is not None else 0)
+        requests = build_requests(users, images)
+        for name in args.scenarios:
+            print(f"→ {name}: {args.requests} requests, concurrency {args.concurrency}")
+            results[name] = await run_scenario(client, requests[name], args.requests, args.concurrency)
+            print(f"  {results[name]}")
+    return results
+
+
+async def run_in_process(args) -> dict:
+    app = import_backend_app()
+    # Startup/shutdown hook'ları (index'ler, worker'lar, iş kuyruğu) gerçek sunucudaki gibi çalışsın
+    async with app.router.lifespan_context(app):
+        return await run(args, app)
+
+
+def main():
+    args = parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+    if args.images_dir:
+        args.images_dir = os.path.abspath(args.images_dir)
+
+    if args.base_url:
+        results = asyncio.run(run(args))
+    else:
+        use_local_stand_ins(args.llm_latency_ms)
+        if "upload" in args.scenarios and not model_available():
+            print("→ upload: skipped (YOLO weights not found)")
+            args.scenarios.remove("upload")
+        if "upload" not in args.scenarios:
+            os.environ.setdefault("YOLO_WARMUP", "0")
+        results = asyncio.run(run_in_process(args))
+
+    settings = {k: v for k, v in vars(args).items() if k != "output"}
+    settings["mode"] = "remote" if args.base_url else "in-process"
+    for name in ("MONGO_BACKEND", "LLM_TRANSPORT", "YOLO_BACKEND", "YOLO_WORKERS", "YOLO_INFERENCE_MODE", "YOLO_WARMUP", "BCRYPT_ROUNDS"):
+        if name in os.environ:
+            settings[name] = os.environ[name]
+    print(f"Results written to {write_results('load_test', settings, results, output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Tek fonksiyon ölçümleri: convert_to_grayscale, load_grayscale_array, classify_image ve
+chat geçmişi okuma (get_recent_messages / get_chat_history_page, sahte Mongo üzerinde).
+
+Kullanım (repo kökünden):
+    python -m benchmarks.microbench
+    python -m benchmarks.microbench --only grayscale history --repeat 200
+    python -m benchmarks.microbench --width 4032 --height 3024   # telefon kamerası çözünürlüğü
+
+classify_image, YOLO ağırlıkları yoksa atlanır. Sonuçlar benchmarks/results/ altına yazılır.
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.harness import (
+    add_backend_to_path, model_available, summarize, synthetic_images, time_calls,
+    use_local_stand_ins, write_results,
+)
+
+BENCHMARKS = ("grayscale", "decode", "classify", "history")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Dermin microbenchmarks")
+    parser.add_argument("--only", nargs="+", default=list(BENCHMARKS), choices=BENCHMARKS)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=960)
+    parser.add_argument("--images", type=int, default=8)
+    parser.add_argument("--history-messages", type=int, default=2000, help="Sahte DB'ye yazılan mesaj sayısı")
+    parser.add_argument("--output")
+    return parser.parse_args()
+
+
+def bench_grayscale(images: list, repeat: int) -> dict:
+    """Orijinal, diske yazan convert_to_grayscale (dosya aç + çevir + kaydet)."""
+    from classification_bot.image_preprocessor import convert_to_grayscale
+
+    workdir = tempfile.mkdtemp(prefix="dermin-bench-")
+    try:
+        paths = []
+        for i, data in enumerate(images):
+            path = os.path.join(workdir, f"sample_{i}.jpg")
+            with open(path, "wb") as f:
+                f.write(data)
+            paths.append(path)
+        counter = iter(range(10 ** 9))
+        return time_calls(lambda: convert_to_grayscale(paths[next(counter) % len(paths)]), repeat)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def bench_decode(images: list, repeat: int) -> dict:
+    """Upload yolunda kullanılan, bellekten çözen load_grayscale_array."""
+    from classification_bot.image_preprocessor import load_grayscale_array
+
+    counter = iter(range(10 ** 9))
+    return time_calls(lambda: load_grayscale_array(images[next(counter) % len(images)]), repeat)
+
+
+def bench_classify(images: list, repeat: int) -> dict:
+    """classify_image (batch scheduler + model + annotation store), tek istemciyle sıralı."""
+    from classification_bot.image_preprocessor import load_grayscale_array
+    from yolo import yolo_service
+
+    yolo_service.start_workers()
+    arrays = [load_grayscale_array(data) for data in images]
+    counter = iter(range(10 ** 9))
+    return time_calls(lambda: yolo_service.classify_image(arrays[next(counter) % len(arrays)]), repeat)
+
+
+def bench_history(messages: int, repeat: int) -> dict:
+    """Sahte Mongo'da messages mesajlık bir kullanıcının son mesajları ve sayfalı geçmişi."""
+    from app.chat import add_messages, get_chat_history_page, get_recent_messages
+
+    async def run():
+        user = f"bench{int(time.time())}@example.com"
+        await add_messages(user, [("user" if i % 2 == 0 else "assistant", f"message {i}") for i in range(messages)])
+
+        async def measure(fn):
+            for _ in range(2):
+                await fn()
+            latencies = []
+            started = time.perf_counter()
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                await fn()
+                latencies.append(time.perf_counter() - t0)
+            return summarize(latencies, time.perf_counter() - started)
+
+        return {
+            "get_recent_messages": await measure(lambda: get_recent_messages(user)),
+            "get_chat_history_page": await measure(lambda: get_chat_history_page(user, 50)),
+        }
+
+    return asyncio.run(run())
+
+
+def main():
+    args = parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+    use_local_stand_ins(llm_latency_ms=0)
+    add_backend_to_path()
+
+    images = synthetic_images(args.images, args.width, args.height)
+    results = {}
+    for name in args.only:
+        if name == "classify" and not model_available():
+            print("→ classify: skipped (YOLO weights not found)")
+            results[name] = {"skipped": "model weights not found"}
+            continue
+        print(f"→ {name}")
+        if name == "grayscale":
+            results[name] = bench_grayscale(images, args.repeat)
+        elif name == "decode":
+            results[name] = bench_decode(images, args.repeat)
+        elif name == "classify":
+            results[name] = bench_classify(images, args.repeat)
+        elif name == "history":
+            results[name] = bench_history(args.history_messages, args.repeat)
+        print(f"  {results[name]}")
+
+    settings = {k: v for k, v in vars(args).items() if k != "output"}
+    print(f"Results written to {write_results('microbench', settings, results, output)}")
+
+
+if __name__ == "__main__":
+    main()
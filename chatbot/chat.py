@@ -1,16 +1,15 @@
 from datetime import datetime
-from storage import load_json, save_json, CHAT_FILE
+from storage import chat_log
 
 def get_chat_history(user_id):
-    chats = load_json(CHAT_FILE)
-    return [c for c in chats if c["user_id"] == user_id]
+    # Sadece bu kullanıcının satırları okunur (user_id → offset indeksi)
+    return chat_log.read(user_id)
 
 def add_message(user_id, role, message):
-    chats = load_json(CHAT_FILE)
-    chats.append({
+    # Tek satır sona eklenir, dosya yeniden yazılmaz
+    chat_log.append({
         "user_id": user_id,
         "role": role,
         "message": message,
         "timestamp": datetime.utcnow().isoformat()
     })
-    save_json(CHAT_FILE, chats)
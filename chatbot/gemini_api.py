@@ -1,12 +1,24 @@
 import os
-import google.generativeai as genai
+import sys
 from dotenv import load_dotenv
 
+# Ortak LLM istemcisini import edebilmek için proje kökünü ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 # API key yükle
 load_dotenv("dermin/chatbot/.env/gemini_keys.env")
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
-MODEL_NAME = "gemini-1.5-flash"
+import logging
+import threading
+from common.llm_client import get_llm_client
+from common.chat_context import build_context, turns_to_fold, build_summary_prompt
+
+logger = logging.getLogger(__name__)
+
+# ✅ Kullanıcı başına rolling özet cache'i: user_id -> {"summary", "summarized_until"}
+_summaries = {}
+_summary_lock = threading.Lock()
+_folding = set()  # Özeti şu an güncellenen kullanıcılar (aynı mesajlar iki kez katlanmasın)
 
 SYSTEM_PROMPT = """
 Sen bir sohbet asistanısın.
@@ -18,23 +30,50 @@ Gerekirse hastalık belirtileri veya tedavi yöntemleri hakkında genel bilgi ve
 Unutma, sen bir yapay zeka asistanısın, gerçek bir doktor değilsin.
 """
 
-def get_gemini_response(history, new_message):
+def get_gemini_response(history, new_message, user_id="default_user"):
     """
-    Gemini API'yi çağırır. Eğer history boşsa SYSTEM_PROMPT otomatik eklenir.
+    Gemini API'yi çağırır. SYSTEM_PROMPT her zaman eklenir.
+    Geçmiş rollerine göre etiketlenir; bütçe dışına düşen eski mesajlar kullanıcının özetine
+    katlanır ve katlanana kadar prompt'ta kalır.
+    :param history: Önceki mesajlar (role + message + timestamp, eski → yeni)
     """
-    messages_to_send = []
-    
-    # Eğer geçmiş boşsa sistem promptu ekle
-    if not history:
-        messages_to_send.append(SYSTEM_PROMPT)
-    else:
-        messages_to_send.append(SYSTEM_PROMPT)
-        messages_to_send.extend(history)
+    messages_to_send = [SYSTEM_PROMPT]
+
+    # Özet + özete henüz katılmamış mesajlar
+    with _summary_lock:
+        state = dict(_summaries.get(user_id, {"summary": "", "summarized_until": ""}))
+    context_text = build_context(history, state["summary"], state["summarized_until"])
+    if context_text:
+        messages_to_send.append(context_text)
 
     # Yeni mesajı ekle
     messages_to_send.append(new_message)
 
-    model = genai.GenerativeModel(MODEL_NAME)
-    response = model.generate_content(messages_to_send)
+    # Model objesi paylaşılan istemcide bir kez oluşturulur
+    reply = get_llm_client().generate_sync(messages_to_send)
+
+    # Özet güncellemesi cevabı geciktirmesin diye arka planda
+    pending = turns_to_fold(history, state["summary"], state["summarized_until"])
+    with _summary_lock:
+        if not pending or user_id in _folding:
+            pending = None
+        else:
+            _folding.add(user_id)
+    if pending:
+        threading.Thread(target=_fold_summary, args=(user_id, state["summary"], pending), daemon=True).start()
+
+    return reply
 
-    return response.text
\ No newline at end of file
+def _fold_summary(user_id, previous_summary, pending):
+    try:
+        summary = get_llm_client().generate_sync(build_summary_prompt(previous_summary, pending))
+    except Exception as e:
+        logger.warning("chat_summary_update_failed user=%s error=%s", user_id, e)
+        with _summary_lock:
+            _folding.discard(user_id)
+        return
+    with _summary_lock:
+        _folding.discard(user_id)
+        current = _summaries.get(user_id, {"summarized_until": ""})
+        if pending[-1]["timestamp"] > current["summarized_until"]:
+            _summaries[user_id] = {"summary": summary.strip(), "summarized_until": pending[-1]["timestamp"]}
@@ -20,10 +20,9 @@ def chat():
 
     # geçmişi al
     history = get_chat_history(user_id)
-    past_texts = [h["message"] for h in history]
 
-    # gemini yanıtını al
-    reply = get_gemini_response(past_texts, message)
+    # gemini yanıtını al (geçmiş rolleriyle birlikte, token bütçesine göre kırpılır)
+    reply = get_gemini_response(history, message, user_id)
 
     # mesajları kaydet
     add_message(user_id, "user", message)
@@ -1,8 +1,21 @@
 import os
 import json
+import threading
 
-CHAT_FILE = "chat_history.json"
-PROMPT_FILE = "prompts.json"
+try:
+    import fcntl  # Dosya kilidi (Linux / macOS)
+except ImportError:  # Windows: sadece süreç içi kilit kullanılır
+    fcntl = None
+
+CHAT_FILE = "chat_history.jsonl"
+PROMPT_FILE = "prompts.jsonl"
+
+# Eski (tek JSON listesi) dosyalar; ilk açılışta JSONL'e taşınır
+LEGACY_CHAT_FILE = "chat_history.json"
+LEGACY_PROMPT_FILE = "prompts.json"
+
+# ✅ Bu kadar ekleme sonrası log sıkıştırılır (kullanıcı mesajları yan yana yazılır)
+COMPACT_EVERY = int(os.getenv("CHAT_LOG_COMPACT_EVERY", "1000"))
 
 def load_json(file):
     if not os.path.exists(file):
@@ -14,3 +27,186 @@ def load_json(file):
 def save_json(file, data):
     with open(file, "w") as f:
         json.dump(data, f, indent=4, ensure_ascii=False)
+
+
+def _lock(f, exclusive):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class JsonlLog:
+    """
+    Sadece sona ekleme yapılan JSONL kayıt dosyası.
+    - Ekleme O(1): tek satır yazılır, dosya yeniden yazılmaz.
+    - key_field verilirse (ör. user_id) her anahtarın satır offset'leri bellekte indekslenir,
+      okuma sadece o anahtarın satırlarını okur.
+    - Birden fazla Flask worker'ı için dosya kilidi kullanılır; başka süreçlerin eklediği
+      satırlar okumadan önce indekse katılır.
+    """
+
+    def __init__(self, path, key_field=None, legacy_path=None, compact_every=COMPACT_EVERY):
+        self.path = path
+        self.key_field = key_field
+        self.legacy_path = legacy_path
+        self.compact_every = compact_every
+        self._thread_lock = threading.Lock()
+        self._file = None
+        self._pid = None
+        self._index = {}
+        self._offsets = []
+        self._indexed_size = 0
+        self._appends = 0
+        self._migrated = False
+
+    def append(self, record):
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._thread_lock:
+            f = self._acquire(exclusive=True)
+            try:
+                self._refresh(f)
+                end = f.seek(0, os.SEEK_END)
+                if end > self._indexed_size:
+                    # Yarım kalmış (bozuk) son satırı kapat
+                    f.write(b"\n")
+                    end += 1
+                f.write(line)
+                f.flush()
+                self._add(record, end)
+                self._indexed_size = end + len(line)
+            finally:
+                _unlock(f)
+
+            self._appends += 1
+            if self.compact_every and self._appends >= self.compact_every:
+                self._appends = 0
+                self._compact_locked()
+
+    def read(self, key=None):
+        """key verilirse sadece o anahtarın kayıtlarını, verilmezse hepsini (yazılma sırasıyla) döner."""
+        with self._thread_lock:
+            f = self._acquire(exclusive=False)
+            try:
+                self._refresh(f)
+                offsets = self._offsets if key is None else self._index.get(key, [])
+                return [self._read_at(f, offset) for offset in offsets]
+            finally:
+                _unlock(f)
+
+    def compact(self):
+        """
+        Log'u yeniden yazar: bozuk satırlar atılır, aynı anahtarın kayıtları yan yana dizilir
+        (okuma sırasında disk üzerinde atlama azalır). Yeni dosya atomik olarak değiştirilir.
+        """
+        with self._thread_lock:
+            self._compact_locked()
+
+    def _compact_locked(self):
+        f = self._acquire(exclusive=True)
+        try:
+            self._refresh(f)
+            records = [self._read_at(f, offset) for offset in self._offsets]
+            if self.key_field:
+                order = {}
+                for record in records:
+                    order.setdefault(record.get(self.key_field), len(order))
+                records.sort(key=lambda r: order[r.get(self.key_field)])  # sort stabil: sıra korunur
+
+            tmp_path = f"{self.path}.{os.getpid()}.compact"
+            with open(tmp_path, "wb") as out:
+                for record in records:
+                    out.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+            os.replace(tmp_path, self.path)
+        finally:
+            _unlock(f)
+
+        # Yeni dosya bir sonraki işlemde baştan indekslenir
+        self._close()
+
+    def _acquire(self, exclusive):
+        """
+        İndekslenen dosyayı kilitleyip döner. Dosya açık tutulur; böylece başka bir süreç
+        compaction ile dosyayı değiştirdiğinde inode numarası yeniden kullanılamaz ve
+        değişiklik güvenle fark edilir (o zaman yeni dosya açılıp baştan indekslenir).
+        """
+        self._migrate_legacy()
+        if self._pid != os.getpid():
+            # fork sonrası dosya tanımlayıcısı (ve flock) paylaşılmasın
+            self._file = None
+            self._pid = os.getpid()
+
+        while True:
+            if self._file is None:
+                self._file = open(self.path, "a+b")
+                self._index = {}
+                self._offsets = []
+                self._indexed_size = 0
+
+            _lock(self._file, exclusive)
+            try:
+                current = os.stat(self.path).st_ino
+            except FileNotFoundError:
+                current = None
+            if current == os.fstat(self._file.fileno()).st_ino:
+                return self._file
+            _unlock(self._file)
+            self._close()
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _read_at(self, f, offset):
+        f.seek(offset)
+        return json.loads(f.readline())
+
+    def _refresh(self, f):
+        """İndeksi dosyanın sonuna kadar günceller (başka süreçlerin eklemeleri dahil)."""
+        f.seek(self._indexed_size)
+        offset = self._indexed_size
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # Yazılmakta olan / yarım kalmış satır
+            try:
+                self._add(json.loads(line), offset)
+            except ValueError:
+                pass  # Bozuk satır atlanır
+            offset += len(line)
+        self._indexed_size = offset
+
+    def _add(self, record, offset):
+        self._offsets.append(offset)
+        if self.key_field:
+            self._index.setdefault(record.get(self.key_field), []).append(offset)
+
+    def _migrate_legacy(self):
+        """
+        Eski JSON listesini JSONL'e taşır. Kontrol ve değiştirme eklemelerle aynı flock altında
+        yapılır: başka bir süreç taşımayı bitirip satır eklediyse dosya üzerine yazılmaz.
+        """
+        if self._migrated:
+            return
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            self._migrated = True
+            return
+        with open(self.path, "a+b") as f:
+            _lock(f, exclusive=True)
+            try:
+                # Dosya boş değilse ya da bu arada değiştirildiyse (başka süreç taşıdı) yapılacak bir şey yok
+                if os.fstat(f.fileno()).st_size == 0 and os.stat(self.path).st_ino == os.fstat(f.fileno()).st_ino:
+                    records = load_json(self.legacy_path)
+                    tmp_path = f"{self.path}.{os.getpid()}.migrate"
+                    with open(tmp_path, "wb") as out:
+                        for record in records:
+                            out.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+                    os.replace(tmp_path, self.path)
+            finally:
+                _unlock(f)
+        self._migrated = True
+
+chat_log = JsonlLog(CHAT_FILE, key_field="user_id", legacy_path=LEGACY_CHAT_FILE)
+prompt_log = JsonlLog(PROMPT_FILE, legacy_path=LEGACY_PROMPT_FILE)
@@ -1,56 +1,173 @@
-import os
-import google.generativeai as genai
-from classification_bot.image_preprocessor import convert_to_grayscale
-from classification_bot.end_prompt import diagnosis_end_prompt, diagnosis_dictionary
-from yolo.yolo_service import classify_image
-
-# ✅ Gemini API setup
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise ValueError("❌ GEMINI_API_KEY environment variable is missing.")
-genai.configure(api_key=GEMINI_API_KEY)
+from concurrent.futures import ThreadPoolExecutor
+from classification_bot.image_preprocessor import load_grayscale_array, MAX_IMAGE_SIDE
+from classification_bot.end_prompt import diagnosis_dictionary
+from classification_bot.explanation_cache import ExplanationCache
+from classification_bot.result_cache import ResultCache, dhash
+from common.llm_client import get_llm_client
+from common.metrics import stage
+from yolo.yolo_service import annotate_boxes, classify_image, classify_images
+from yolo.annotation_store import annotation_store, image_key
+from yolo.tiling import decode_max_side
+
+NO_LESION_RESPONSE = "No lesion detected in the image."
+
+def _decode_max_side(width: int, height: int) -> int:
+    """✅ adaptive inference modunda yalnızca parçalanacak büyük resimler daha yüksek çözünürlükte çözülür"""
+    return decode_max_side(MAX_IMAGE_SIDE, width, height)
 
 def ask_gemini(prompt: str) -> str:
-    """Prompt'u Gemini modeline gönderir ve yanıt döner."""
-    model = genai.GenerativeModel("gemini-1.5-flash")
-    response = model.generate_content(prompt)
-    return response.text
+    """Prompt'u paylaşılan LLM istemcisi ile Gemini modeline gönderir ve yanıt döner."""
+    return get_llm_client().generate_sync(prompt)
 
-def process_image(image_path: str):
-    """Resmi gri tonlamaya çevirir, YOLO ile tahmin yapar, Gemini’den açıklama döner."""
+# ✅ Açıklama yalnızca sınıfa bağlı → sınıf başına bir kez üretilip saklanır
+explanation_cache = ExplanationCache(ask_gemini, get_llm_client().model_name)
 
-    # ✅ 1. Resmi gri tonlamaya çevir
-    gray_image_path = convert_to_grayscale(image_path)
+# ✅ Aynı / yeniden sıkıştırılmış resim tekrar yüklenirse pipeline baştan çalışmaz
+result_cache = ResultCache()
 
-    # ✅ 2. YOLO ile sınıflandır + box çizilmiş resmi al
-    results, boxed_image_url = classify_image(gray_image_path)
+def _read_image(image) -> bytes:
+    if isinstance(image, str):
+        with open(image, "rb") as f:
+            return f.read()
+    return image
+
+def _top_detection(results):
+    """YOLO sonucundan tespit tablosunu ve en yüksek güven skorlu sınıfı çıkarır."""
     detections = results.to_df()
+    if len(detections) == 0:
+        return detections, None, None
+    top = detections.iloc[0]
+    return detections, int(top["class"]), round(float(top["confidence"]), 2)
+
+def _annotation_available(result: dict) -> bool:
+    """Cache'teki sonucun boxlu görseli annotation_store'dan silinmediyse True."""
+    key = result["boxed_image_url"].rsplit("/", 1)[-1].split(".", 1)[0]
+    return annotation_store.contains(key)
+
+def _boxes(results):
+    """Near-duplicate isabetinde yeniden çizebilmek için tespit kutuları (N, 6) ve sınıf isimleri."""
+    return results.boxes.data.cpu().numpy(), dict(results.names)
+
+def process_image(image, owner: str = None):
+    """
+    Resmi bellekte gri tonlamaya çevirir, YOLO ile tahmin yapar, Gemini’den açıklama döner.
+    :param image: Yüklenen resmin baytları (ya da dosya yolu)
+    :param owner: Yükleyen kullanıcı / istemci; near-duplicate cache yalnızca onun kayıtlarında arar
+    """
+    image = _read_image(image)
+    key = image_key(image)
+
+    # ✅ 0. Birebir aynı dosya daha önce işlendiyse resmi çözmeden dön
+    cached = result_cache.get_exact(key, accept=_annotation_available)
+    if cached is not None:
+        return cached
+
+    # ✅ 1. Resmi bellekte gri tonlamaya çevir (diske yazmadan)
+    with stage("upload", "preprocess"):
+        gray_image = load_grayscale_array(image, max_side_for=_decode_max_side)
+        phash = dhash(gray_image)
+
+    # ✅ 1b. Aynı kullanıcının yeniden sıkıştırılmış / neredeyse aynı kopyası daha önce işlendiyse
+    # model atlanır; kutular bu resmin üzerine çizilir (eski yüklemenin URL'i dönmez)
+    similar = result_cache.get_similar(phash, owner)
+    if similar is not None:
+        cached, (boxes, names) = similar
+        cached["boxed_image_url"] = annotate_boxes(gray_image, boxes, names, key)
+        return cached
+
+    # ✅ 2. YOLO ile sınıflandır + box çizilmiş resmi al
+    with stage("upload", "inference"):
+        results, boxed_image_url = classify_image(gray_image, key)
+    with stage("upload", "postprocess"):
+        detections, top_class_id, confidence = _top_detection(results)
 
     # ✅ 3. Hiçbir sınıf bulunmazsa
-    if len(detections) == 0:
-        return {
+    if top_class_id is None:
+        response = {
             "top_class": None,
             "confidence": None,
-            "gemini_response": "No lesion detected in the image.",
+            "gemini_response": NO_LESION_RESPONSE,
             "boxed_image_url": boxed_image_url,
             "detections": {}
         }
+        result_cache.put(key, phash, response, owner, _boxes(results))
+        return response
 
     # ✅ 4. En yüksek güven skorlu sınıfı al
-    top = detections.iloc[0]
-    top_class_id = int(top["class"])
     top_class_name = diagnosis_dictionary.get(top_class_id, "Unknown")
-    confidence = round(float(top["confidence"]), 2)
 
-    # ✅ 5. Gemini için prompt hazırla & yanıt al
-    prompt = diagnosis_end_prompt(top_class_id)
-    gemini_response = ask_gemini(prompt)
+    # ✅ 5. Gemini açıklamasını al (cache'te varsa LLM'e gidilmez)
+    with stage("upload", "llm"):
+        gemini_response = explanation_cache.get_explanation(top_class_id)
 
-    # ✅ 6. Tüm bilgileri döndür
-    return {
+    # ✅ 6. Tüm bilgileri döndür (tekrar yüklemeler için cache'e de yaz)
+    response = {
         "top_class": top_class_name,
         "confidence": confidence,
         "gemini_response": gemini_response,
         "boxed_image_url": boxed_image_url,
         "detections": detections.to_dict()
     }
+    result_cache.put(key, phash, response, owner, _boxes(results))
+    return response
+
+def process_images(images: list):
+    """
+    Aynı oturumda çekilmiş birden fazla resmi birlikte işler.
+    - Resimler tek bir YOLO batch'inde sınıflandırılır.
+    - Gemini açıklaması bulunan her sınıf için bir kez alınır (aynı sınıfı içeren resimler paylaşır).
+    :param images: Resimlerin baytları (ya da dosya yolları)
+    :return: {"images": resim başına sonuçlar, "summary": tüm resimlerin özeti}
+    """
+    images = [_read_image(image) for image in images]
+
+    # ✅ 1. Hepsini gri tonlamaya çevir ve tek batch'te sınıflandır
+    with stage("upload_batch", "preprocess"):
+        gray_images = [load_grayscale_array(image, max_side_for=_decode_max_side) for image in images]
+    with stage("upload_batch", "inference"):
+        classified = classify_images(gray_images, [image_key(image) for image in images])
+    with stage("upload_batch", "postprocess"):
+        tops = [_top_detection(results) for results, _ in classified]
+
+    # ✅ 2. Açıklamaları sınıf başına bir kez al (farklı sınıflar paralel)
+    class_ids = sorted({class_id for _, class_id, _ in tops if class_id is not None})
+    explanations = {}
+    if class_ids:
+        with stage("upload_batch", "llm"), ThreadPoolExecutor(max_workers=min(4, len(class_ids))) as executor:
+            explanations = dict(zip(class_ids, executor.map(explanation_cache.get_explanation, class_ids)))
+
+    # ✅ 3. Resim başına sonuçlar + genel özet
+    per_image = []
+    classes = {}
+    for (_, boxed_image_url), (_, class_id, confidence) in zip(classified, tops):
+        if class_id is None:
+            per_image.append({
+                "top_class": None,
+                "confidence": None,
+                "gemini_response": NO_LESION_RESPONSE,
+                "boxed_image_url": boxed_image_url,
+            })
+            continue
+
+        class_name = diagnosis_dictionary.get(class_id, "Unknown")
+        per_image.append({
+            "top_class": class_name,
+            "confidence": confidence,
+            "gemini_response": explanations[class_id],
+            "boxed_image_url": boxed_image_url,
+        })
+        entry = classes.setdefault(class_name, {"images": 0, "max_confidence": 0.0})
+        entry["images"] += 1
+        entry["max_confidence"] = max(entry["max_confidence"], confidence)
+
+    top_class = max(classes, key=lambda name: classes[name]["max_confidence"]) if classes else None
+    return {
+        "images": per_image,
+        "summary": {
+            "images": len(per_image),
+            "images_with_detections": sum(entry["images"] for entry in classes.values()),
+            "top_class": top_class,
+            "confidence": classes[top_class]["max_confidence"] if top_class else None,
+            "classes": classes,
+        },
+    }
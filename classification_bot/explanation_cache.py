@@ -0,0 +1,118 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from classification_bot.end_prompt import diagnosis_end_prompt, diagnosis_dictionary
+from common.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+# ✅ Kalıcı açıklama cache'i ayarları (ortam değişkenleriyle ayarlanabilir)
+EXPLANATION_CACHE_PATH = os.getenv(
+    "EXPLANATION_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "explanation_cache.json"),
+)
+EXPLANATION_CACHE_TTL_SECONDS = int(os.getenv("EXPLANATION_CACHE_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+# Açıklamaların hepsini geçersiz kılmak için bu sürüm artırılır
+EXPLANATION_CACHE_VERSION = os.getenv("EXPLANATION_CACHE_VERSION", "1")
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+class ExplanationCache:
+    """
+    Teşhis açıklamalarını (sınıf ID, prompt hash'i, model adı) anahtarıyla diskte saklar.
+    Prompt yalnızca sınıfa bağlı olduğu için aynı teşhisi alan her kullanıcı aynı metni alır.
+    """
+
+    def __init__(self, ask_fn, model_name: str, path: str = EXPLANATION_CACHE_PATH,
+                 ttl_seconds: int = EXPLANATION_CACHE_TTL_SECONDS, version: str = EXPLANATION_CACHE_VERSION):
+        self.ask_fn = ask_fn
+        self.model_name = model_name
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.version = version
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._entries = self._load()
+
+    def cache_key(self, class_id: int, prompt: str) -> str:
+        return f"{class_id}:{prompt_hash(prompt)}:{self.model_name}"
+
+    def get_explanation(self, class_id: int) -> str:
+        """Sınıfın açıklamasını cache'ten döner; yoksa ya da süresi dolduysa LLM'e bir kez sorar."""
+        prompt = diagnosis_end_prompt(class_id)
+        key = self.cache_key(class_id, prompt)
+
+        cached = self._lookup(key)
+        if cached is not None:
+            record_cache("explanation", "hit")
+            return cached
+        record_cache("explanation", "miss")
+
+        # ✅ Aynı sınıf için eşzamanlı istekler tek bir LLM çağrısını bekler
+        with self._lock_for(key):
+            cached = self._lookup(key)
+            if cached is not None:
+                return cached
+
+            text = self.ask_fn(prompt)
+            with self._lock:
+                self._entries[key] = {
+                    "text": text,
+                    "created_at": time.time(),
+                    "version": self.version,
+                }
+                self._save_locked()
+            return text
+
+    def warm_up(self, class_ids=None, max_workers: int = 4):
+        """Açıklamaları önceden doldurur (başlangıçta arka planda çağrılır)."""
+        class_ids = list(class_ids if class_ids is not None else diagnosis_dictionary)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(self._warm_one, class_ids))
+
+    def _warm_one(self, class_id: int):
+        try:
+            self.get_explanation(class_id)
+        except Exception as e:
+            logger.warning("explanation_warmup_failed class_id=%s error=%s", class_id, e)
+
+    def _lookup(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry.get("version") != self.version:
+            return None
+        if time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+            return None
+        return entry["text"]
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_locked(self):
+        # ✅ Eski sürüme ait ya da süresi dolmuş kayıtlar dosyaya geri yazılmaz
+        cutoff = time.time() - self.ttl_seconds
+        self._entries = {
+            key: entry for key, entry in self._entries.items()
+            if entry.get("version") == self.version and entry.get("created_at", 0) >= cutoff
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
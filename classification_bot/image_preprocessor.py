@@ -1,8 +1,13 @@
 # classification_bot/image_preprocessor.py
 
-from PIL import Image
+from PIL import Image, ImageOps
+import numpy as np
+import io
 import os
 
+# ✅ Çözülen resmin en uzun kenarı bu değeri geçmez (YOLO zaten 640'a küçültüyor)
+MAX_IMAGE_SIDE = int(os.getenv("MAX_IMAGE_SIDE", "1280"))
+
 def convert_to_grayscale(image_path: str) -> str:
     """
     Verilen resmi siyah-beyaza çevirir ve yeni dosya yolunu döner.
@@ -17,3 +22,28 @@ def convert_to_grayscale(image_path: str) -> str:
     
     img.save(gray_path)
     return gray_path
+
+def load_grayscale_array(image_bytes: bytes, max_side: int = MAX_IMAGE_SIDE, max_side_for=None) -> np.ndarray:
+    """
+    Yüklenen resmi diske yazmadan tek seferde çözer ve gri tonlamaya çevirir.
+    EXIF yönü düzeltilir, en uzun kenar max_side ile sınırlanır.
+    :param image_bytes: Yüklenen dosyanın içeriği
+    :param max_side: Çözülen resmin izin verilen en uzun kenarı (0 → sınırsız)
+    :param max_side_for: Verilirse (genişlik, yükseklik) → max_side; sınır resmin kendi boyutuna göre seçilir
+    :return: YOLO'ya doğrudan verilebilen (H, W, 3) uint8 dizi
+    """
+    img = Image.open(io.BytesIO(image_bytes))
+    if max_side_for is not None:
+        max_side = max_side_for(*img.size)
+
+    # ✅ JPEG ise çözme sırasında küçült (tam çözünürlük hiç açılmaz)
+    if max_side:
+        img.draft("L", (max_side, max_side))
+
+    img = ImageOps.exif_transpose(img).convert("L")
+    if max_side and max(img.size) > max_side:
+        img.thumbnail((max_side, max_side), Image.BILINEAR)
+
+    # ✅ Eski akıştaki gibi gri kanal 3 kanala kopyalanır (cv2.imread gri JPEG'i böyle okuyordu)
+    gray = np.asarray(img)
+    return np.repeat(gray[:, :, None], 3, axis=2)
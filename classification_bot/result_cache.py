@@ -0,0 +1,130 @@
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from PIL import Image
+from common.metrics import record_cache
+
+# ✅ Tekrar yüklenen resimler için sonuç cache'i ayarları (ortam değişkenleriyle ayarlanabilir)
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+RESULT_CACHE_TTL_SECONDS = int(os.getenv("RESULT_CACHE_TTL_SECONDS", str(60 * 60)))
+# İki resim, dHash'leri arasında en fazla bu kadar bit farkı varsa aynı sayılır (256 bit üzerinden).
+# ✅ Varsayılan 0 = kapalı, yalnızca birebir aynı dosya: farklı lezyon fotoğrafları düşük mesafede
+# çakışabiliyor ve yanlış teşhis dönebiliyor. Açılırsa eşleşme yalnızca aynı kullanıcının kayıtlarında aranır.
+RESULT_CACHE_MAX_DISTANCE = int(os.getenv("RESULT_CACHE_MAX_DISTANCE", "0"))
+
+HASH_SIZE = 16
+
+
+def dhash(image: np.ndarray, hash_size: int = HASH_SIZE) -> int:
+    """
+    Gri tonlamalı resmin fark hash'i (dHash): yeniden sıkıştırma ve küçük boyut
+    değişikliklerinde aynı kalır, farklı resimlerde bitlerin yaklaşık yarısı değişir.
+    :param image: load_grayscale_array çıktısı (H, W, 3) ya da (H, W) uint8 dizi
+    """
+    gray = image[:, :, 0] if image.ndim == 3 else image
+    small = np.asarray(Image.fromarray(gray).resize((hash_size + 1, hash_size), Image.BILINEAR), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int("".join("1" if bit else "0" for bit in bits), 2)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class ResultCache:
+    """
+    process_image sonuçlarını girdi resminin içerik hash'i ve dHash'i ile saklar.
+    - Birebir aynı dosya: içerik hash'i ile, resim çözülmeden bulunur.
+    - Yeniden sıkıştırılmış kopya: aynı sahibin (kullanıcı / IP) kayıtları arasında dHash'i en yakın
+      kayıt max_distance içindeyse kullanılır. Sahibi olmayan kayıtlar yalnızca birebir eşleşir.
+    Kayıtlar LRU sırasıyla ve ttl_seconds sonunda silinir.
+    """
+
+    def __init__(self, max_entries: int = RESULT_CACHE_SIZE, ttl_seconds: int = RESULT_CACHE_TTL_SECONDS,
+                 max_distance: int = RESULT_CACHE_MAX_DISTANCE):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # içerik hash'i -> (dHash, sonuç, eklenme zamanı, sahip, ek veri)
+        self._exact_hits = 0
+        self._perceptual_hits = 0
+        self._misses = 0
+
+    def get_exact(self, key: str, accept=None):
+        """
+        İçerik hash'i ile arar; bulunamazsa None (miss sayılmaz, ardından get_similar denenir).
+        :param accept: Sonucu kullanmadan önce kontrol eden fonksiyon (ör. boxlu görsel hâlâ duruyor mu)
+        """
+        with self._lock:
+            entry = self._live_entry_locked(key)
+            if entry is None:
+                return None
+            if accept is not None and not accept(entry[1]):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self._exact_hits += 1
+            record_cache("result", "exact_hit")
+            return copy.deepcopy(entry[1])
+
+    def get_similar(self, phash: int, owner: str = None, accept=None):
+        """
+        Aynı sahibin kayıtları arasında dHash'i en yakın (max_distance içindeki) kaydı arar.
+        :return: (sonuç, put'ta verilen ek veri) ya da None; accept get_exact'teki gibi
+        """
+        with self._lock:
+            best_key, best_distance = None, self.max_distance + 1
+            if self.max_distance > 0 and owner is not None:
+                for key in list(self._entries):
+                    entry = self._live_entry_locked(key)
+                    if entry is None or entry[3] != owner:
+                        continue
+                    distance = hamming_distance(phash, entry[0])
+                    if distance < best_distance:
+                        best_key, best_distance = key, distance
+
+            if best_key is not None:
+                _, result, _, _, extra = self._entries[best_key]
+                if accept is None or accept(result):
+                    self._entries.move_to_end(best_key)
+                    self._perceptual_hits += 1
+                    record_cache("result", "perceptual_hit")
+                    return copy.deepcopy(result), extra
+                del self._entries[best_key]
+            self._misses += 1
+            record_cache("result", "miss")
+            return None
+
+    def put(self, key: str, phash: int, result: dict, owner: str = None, extra=None):
+        """:param extra: get_similar isabetinde sonuçla birlikte dönen veri (ör. tespit kutuları)"""
+        with self._lock:
+            self._entries[key] = (phash, copy.deepcopy(result), time.time(), owner, extra)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._exact_hits + self._perceptual_hits + self._misses
+            hits = self._exact_hits + self._perceptual_hits
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "max_distance": self.max_distance,
+                "exact_hits": self._exact_hits,
+                "perceptual_hits": self._perceptual_hits,
+                "misses": self._misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _live_entry_locked(self, key: str):
+        entry = self._entries.get(key)
+        if entry is not None and time.time() - entry[2] > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        return entry
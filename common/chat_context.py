@@ -0,0 +1,100 @@
+import os
+
+# ✅ Prompt'a giren sohbet geçmişi için token bütçesi (ortam değişkenleriyle ayarlanabilir)
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "1500"))
+# Bütçe dışına düşen mesajlar bu kadar token birikince özete katlanır
+CHAT_SUMMARY_MIN_TOKENS = int(os.getenv("CHAT_SUMMARY_MIN_TOKENS", "400"))
+# Tek özet çağrısına en fazla bu kadar token'lık mesaj girer (uzun birikim birkaç turda katlanır)
+CHAT_SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_SUMMARY_MAX_TOKENS", "4000"))
+# ✅ Özete katılmamış mesajlar bütçeyi aşsa da prompt'ta kalır; özetleme uzun süre başarısız olursa
+# prompt'un büyümesini sınırlayan üst sınır budur (aşılırsa en eski özetlenmemiş mesajlar düşer)
+CHAT_CONTEXT_MAX_TOKENS = int(os.getenv("CHAT_CONTEXT_MAX_TOKENS", str(3 * CHAT_CONTEXT_TOKEN_BUDGET)))
+# Kaba token tahmini: ortalama ~4 karakter = 1 token
+CHARS_PER_TOKEN = 4
+
+ROLE_LABELS = {"user": "User", "assistant": "Assistant"}
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def format_turn(turn: dict) -> str:
+    """Mesajı rolüne göre etiketler ("User: ..." / "Assistant: ...")."""
+    return f"{ROLE_LABELS.get(turn.get('role'), 'User')}: {turn['message']}"
+
+
+def split_by_budget(turns: list, budget: int = CHAT_CONTEXT_TOKEN_BUDGET):
+    """
+    Mesajları (eski → yeni) bütçeye göre ikiye ayırır.
+    :return: (bütçeye sığmayan eski mesajlar, bütçeye sığan son mesajlar)
+    """
+    used = 0
+    start = len(turns)
+    for i in range(len(turns) - 1, -1, -1):
+        cost = estimate_tokens(format_turn(turns[i]))
+        if used + cost > budget:
+            break
+        used += cost
+        start = i
+    return turns[:start], turns[start:]
+
+
+def _recent_budget(summary: str, budget: int) -> int:
+    return max(0, budget - (estimate_tokens(summary) if summary else 0))
+
+
+def unsummarized(turns: list, summarized_until: str = "") -> list:
+    """Özete henüz katılmamış mesajlar (timestamp'i summarized_until'den yeni olanlar)."""
+    return [t for t in turns if t.get("timestamp", "") > summarized_until] if summarized_until else list(turns)
+
+
+def build_context(turns: list, summary: str = "", summarized_until: str = "",
+                  max_tokens: int = CHAT_CONTEXT_MAX_TOKENS) -> str:
+    """
+    Özet + özete henüz katılmamış tüm mesajlardan prompt'a girecek geçmiş metnini oluşturur.
+    Bütçeyi aşan mesajlar özete katılana kadar prompt'ta kalır (hiçbir mesaj ne özette ne prompt'ta
+    olmadan kaybolmaz); normalde çıktı yaklaşık bütçe + CHAT_SUMMARY_MIN_TOKENS ile sınırlıdır.
+    :param summarized_until: Özete katılan son mesajın timestamp'i (daha eskiler prompt'a girmez)
+    """
+    _, recent = split_by_budget(unsummarized(turns, summarized_until), _recent_budget(summary, max_tokens))
+    parts = []
+    if summary:
+        parts.append(f"Summary of the earlier conversation:\n{summary}")
+    if recent:
+        parts.append("\n".join(format_turn(t) for t in recent))
+    return "\n\n".join(parts)
+
+
+def turns_to_fold(turns: list, summary: str = "", summarized_until: str = "",
+                  budget: int = CHAT_CONTEXT_TOKEN_BUDGET) -> list:
+    """
+    Bütçe dışına düşmüş ve henüz özete katılmamış mesajları eskiden yeniye döner.
+    Birikim CHAT_SUMMARY_MIN_TOKENS'ın altındaysa boş liste döner (her turda LLM çağrısı olmasın);
+    çok uzun birikimin ilk CHAT_SUMMARY_MAX_TOKENS'lık kısmı döner, kalanı sonraki turlarda katlanır.
+    :param turns: summarized_until'den sonraki mesajların hepsi (eski → yeni)
+    :param summarized_until: Özete katılan son mesajın timestamp'i
+    """
+    older, _ = split_by_budget(unsummarized(turns, summarized_until), _recent_budget(summary, budget))
+    costs = [estimate_tokens(format_turn(t)) for t in older]
+    if sum(costs) < CHAT_SUMMARY_MIN_TOKENS:
+        return []
+    used = 0
+    for i, cost in enumerate(costs):
+        if i and used + cost > CHAT_SUMMARY_MAX_TOKENS:
+            return older[:i]
+        used += cost
+    return older
+
+
+def build_summary_prompt(previous_summary: str, turns: list) -> str:
+    """Önceki özeti yeni mesajlarla güncelleyecek prompt'u oluşturur."""
+    conversation = "\n".join(format_turn(t) for t in turns)
+    return (
+        "You maintain a running summary of a conversation between a user and a dermatology assistant.\n"
+        "Update the summary with the new messages. Keep the user's skin concerns, symptoms, "
+        "treatments mentioned and any advice already given. Write at most 120 words in plain text.\n\n"
+        f"Current summary:\n{previous_summary or '(empty)'}\n\n"
+        f"New messages:\n{conversation}\n\n"
+        "Updated summary:"
+    )
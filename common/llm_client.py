@@ -0,0 +1,218 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from common.metrics import stage
+
+# ✅ LLM istemci ayarları (ortam değişkenleriyle ayarlanabilir)
+LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME", "gemini-1.5-flash")
+LLM_TRANSPORT = os.getenv("LLM_TRANSPORT", "gemini")  # gemini | fake
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_FAKE_LATENCY_MS = float(os.getenv("LLM_FAKE_LATENCY_MS", "200"))
+
+# Tekrar denenmeye değer hata tipleri (google.api_core isimleri + genel ağ hataları)
+_RETRYABLE_ERRORS = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable",
+    "DeadlineExceeded", "InternalServerError", "GatewayTimeout",
+}
+
+
+class GeminiTransport:
+    """google.generativeai üzerinden çağrı yapar; model objesi bir kez oluşturulup tekrar kullanılır."""
+
+    def __init__(self, model_name: str = LLM_MODEL_NAME, api_key: str = None):
+        self.model_name = model_name
+        self.api_key = api_key
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    import google.generativeai as genai
+
+                    api_key = self.api_key or os.getenv("GEMINI_API_KEY")
+                    if not api_key:
+                        raise ValueError("❌ GEMINI_API_KEY environment variable missing")
+                    genai.configure(api_key=api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def generate(self, prompt, timeout: float) -> str:
+        response = self._get_model().generate_content(prompt, request_options={"timeout": timeout})
+        return response.text
+
+    def stream(self, prompt, timeout: float):
+        response = self._get_model().generate_content(prompt, stream=True, request_options={"timeout": timeout})
+        for chunk in response:
+            if chunk.parts:
+                yield chunk.text
+
+
+class FakeTransport:
+    """
+    Ağ kullanmayan sahte LLM. Test ve yük ölçümleri için ayarlanabilir gecikmeyle
+    prompt'a bağlı sabit bir cevap üretir.
+    """
+
+    def __init__(self, latency_ms: float = LLM_FAKE_LATENCY_MS, model_name: str = "fake-llm"):
+        self.latency_ms = latency_ms
+        self.model_name = model_name
+
+    def _reply(self, prompt) -> str:
+        text = prompt[-1] if isinstance(prompt, (list, tuple)) else prompt
+        text = " ".join(str(text).split())
+        return f"This is a fake Dermin reply to: {text[-120:]}"
+
+    def generate(self, prompt, timeout: float) -> str:
+        time.sleep(min(self.latency_ms / 1000, timeout))
+        return self._reply(prompt)
+
+    def stream(self, prompt, timeout: float):
+        words = self._reply(prompt).split(" ")
+        delay = min(self.latency_ms / 1000, timeout) / len(words)
+        for i, word in enumerate(words):
+            time.sleep(delay)
+            yield word if i == 0 else f" {word}"
+
+
+class LLMClient:
+    """
+    Backend, classifier ve chatbot'un ortak LLM istemcisi.
+    Eşzamanlı çağrı sayısını sınırlar, zaman aşımı uygular, geçici hatalarda jitter'lı
+    üstel bekleme ile tekrar dener. Async çağrılar event loop'u bloklamaz.
+    """
+
+    def __init__(self, transport, max_concurrency: int = LLM_MAX_CONCURRENCY, timeout: float = LLM_TIMEOUT_SECONDS,
+                 max_retries: int = LLM_MAX_RETRIES, retry_base_delay: float = LLM_RETRY_BASE_DELAY):
+        self.transport = transport
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+
+    @property
+    def model_name(self) -> str:
+        return self.transport.model_name
+
+    def generate_sync(self, prompt) -> str:
+        """Bloklayan çağrı (Flask ya da thread pool içinden kullanılır)."""
+        with stage("llm", "generate"):
+            return self._with_retry(lambda: self.transport.generate(prompt, self.timeout))
+
+    async def generate(self, prompt) -> str:
+        """Event loop'u bloklamadan tam cevabı döner."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.generate_sync, prompt)
+
+    def stream_sync(self, prompt):
+        """Cevabı parça parça üretir. İlk parça gelmeden oluşan hatalarda tekrar denenir."""
+        with stage("llm", "stream"):
+            for attempt in range(self.max_retries + 1):
+                started = False
+                with self._semaphore:
+                    chunks = self.transport.stream(prompt, self.timeout)
+                    try:
+                        for chunk in chunks:
+                            started = True
+                            yield chunk
+                        return
+                    except Exception as e:
+                        if started or attempt == self.max_retries or not _is_retryable(e):
+                            raise
+                    finally:
+                        # Tüketici erken bıraktıysa (close) upstream bağlantısı da kapanır
+                        close = getattr(chunks, "close", None)
+                        if close is not None:
+                            close()
+                time.sleep(self._backoff(attempt))
+
+    async def stream(self, prompt):
+        """stream_sync'i bir worker thread'de çalıştırıp parçaları async olarak aktarır."""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        done = object()
+        # ✅ Tüketici bıraktığında (ör. SSE istemcisi koptu) üretici durur; semaphore ve thread serbest kalır
+        stopped = threading.Event()
+
+        def produce():
+            chunks = self.stream_sync(prompt)
+            try:
+                for chunk in chunks:
+                    if stopped.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk)
+            except Exception as e:
+                if not stopped.is_set():
+                    loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                chunks.close()
+                if not stopped.is_set():
+                    loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        producer = loop.run_in_executor(self._executor, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stopped.set()
+        await producer
+
+    def _with_retry(self, call):
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self._semaphore:
+                    return call()
+            except Exception as e:
+                if attempt == self.max_retries or not _is_retryable(e):
+                    raise
+            time.sleep(self._backoff(attempt))
+
+    def _backoff(self, attempt: int) -> float:
+        # ✅ "Full jitter": 0 ile üstel sınır arasında rastgele bekleme
+        return random.uniform(0, self.retry_base_delay * (2 ** attempt))
+
+
+def _is_retryable(error: Exception) -> bool:
+    return isinstance(error, (TimeoutError, ConnectionError)) or type(error).__name__ in _RETRYABLE_ERRORS
+
+
+def build_transport(name: str = LLM_TRANSPORT):
+    if name == "fake":
+        return FakeTransport()
+    if name == "gemini":
+        return GeminiTransport()
+    raise ValueError(f"Unknown LLM transport: {name}")
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """Süreç genelinde paylaşılan istemciyi döner (ilk çağrıda oluşturulur)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = LLMClient(build_transport())
+    return _client
+
+
+def set_llm_client(client: LLMClient):
+    """Testlerde ve benchmark'larda farklı bir transport kullanmak için."""
+    global _client
+    with _client_lock:
+        _client = client
@@ -0,0 +1,86 @@
+import time
+from contextlib import contextmanager
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Histogram
+except ImportError:  # prometheus_client yoksa metrikler sessizce kapanır (ör. Flask chatbot)
+    prometheus_client = None
+
+# Saniye cinsinden gecikme kovaları (1 ms … 60 s)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+QUEUE_DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+if prometheus_client is not None:
+    STAGE_SECONDS = Histogram(
+        "dermin_stage_seconds", "Duration of a pipeline stage",
+        ["pipeline", "stage"], buckets=LATENCY_BUCKETS,
+    )
+    REQUEST_SECONDS = Histogram(
+        "dermin_http_request_seconds", "HTTP request latency",
+        ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+    )
+    QUEUE_DEPTH = Histogram(
+        "dermin_queue_depth", "Queue depth seen by a newly submitted item",
+        ["queue"], buckets=QUEUE_DEPTH_BUCKETS,
+    )
+    CACHE_LOOKUPS = Counter(
+        "dermin_cache_lookups_total", "Cache lookups by outcome",
+        ["cache", "result"],
+    )
+    ADMISSION_WAIT_SECONDS = Histogram(
+        "dermin_admission_wait_seconds", "Time a request waited for a slot in its admission pool",
+        ["pool"], buckets=LATENCY_BUCKETS,
+    )
+    ADMISSION_REJECTIONS = Counter(
+        "dermin_admission_rejections_total", "Requests rejected by admission control",
+        ["pool", "reason"],
+    )
+
+
+@contextmanager
+def stage(pipeline: str, name: str):
+    """
+    Bloğun süresini dermin_stage_seconds{pipeline, stage} histogramına yazar.
+    Örnek: with stage("upload", "inference"): ...
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if prometheus_client is not None:
+            STAGE_SECONDS.labels(pipeline, name).observe(time.perf_counter() - started)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float):
+    if prometheus_client is not None:
+        REQUEST_SECONDS.labels(method, route, str(status)).observe(seconds)
+
+
+def observe_queue_depth(queue: str, depth: int):
+    if prometheus_client is not None:
+        QUEUE_DEPTH.labels(queue).observe(depth)
+
+
+def record_cache(cache: str, result: str):
+    """result: "hit", "miss" ya da cache'e özel bir sonuç (ör. "perceptual_hit")."""
+    if prometheus_client is not None:
+        CACHE_LOOKUPS.labels(cache, result).inc()
+
+
+def observe_admission_wait(pool: str, seconds: float):
+    if prometheus_client is not None:
+        ADMISSION_WAIT_SECONDS.labels(pool).observe(seconds)
+
+
+def record_admission_rejection(pool: str, reason: str):
+    """reason: "rate_limited", "queue_full" ya da "queue_timeout"."""
+    if prometheus_client is not None:
+        ADMISSION_REJECTIONS.labels(pool, reason).inc()
+
+
+def render_latest():
+    """/metrics cevabı: (içerik, content type) ya da prometheus_client yoksa None."""
+    if prometheus_client is None:
+        return None
+    return prometheus_client.generate_latest(), prometheus_client.CONTENT_TYPE_LATEST
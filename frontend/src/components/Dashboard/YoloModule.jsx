@@ -34,7 +34,7 @@ export default function YoloModule() {
 
       {result && (
         <div className="mt-4">
-          <img src={result.boxed_image_url} alt="Boxed result" className="mb-3" />
+          <img src={`${result.boxed_image_url}?size=screen`} alt="Boxed result" className="mb-3" />
           <p><strong>Class:</strong> {result.top_class}</p>
           <p><strong>Confidence:</strong> {result.confidence}</p>
           <p className="mt-2"><strong>Gemini Yorumu:</strong></p>
@@ -8,7 +8,7 @@ export default function ResultCard({ data }) {
       {/* YOLO'nun çizdiği kutulu görsel */}
       {data.boxed_image_url && (
         <img
-          src={`http://127.0.0.1:8000${data.boxed_image_url}`}
+          src={`http://127.0.0.1:8000${data.boxed_image_url}?size=screen`}
           alt="Boxed result"
           className="rounded-xl mt-4 border"
         />
@@ -137,7 +137,7 @@ export default function YoloChatPage() {
             <h3 style={{ fontWeight: "bold", marginBottom: "10px" }}>Processed Image</h3>
             {response.boxed_image_url ? (
               <img
-                src={`http://127.0.0.1:8000${response.boxed_image_url}`}
+                src={`http://127.0.0.1:8000${response.boxed_image_url}?size=screen`}
                 alt="YOLO Result"
                 style={{ borderRadius: "8px", width: "100%", objectFit: "cover" }}
               />
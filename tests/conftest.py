@@ -0,0 +1,15 @@
+# Testler harici servis olmadan çalışır: bellekte Mongo ve sahte LLM taşıyıcısı kullanılır.
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("MONGO_BACKEND", "fake")
+os.environ.setdefault("LLM_TRANSPORT", "fake")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("YOLO_WARMUP", "0")
+
+# backend modülleri "app." olarak, diğerleri paket adıyla import edilir
+for path in (ROOT, os.path.join(ROOT, "backend")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,60 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from yolo.annotation_store import AnnotationStore
+
+KEY = "0123456789abcdef0123456789abcdef"
+
+
+class FakeResult:
+    """ultralytics Results'ın annotation_store'un kullandığı kısmı: orig_img ve plot() (BGR)."""
+
+    def __init__(self, width, height):
+        self.orig_img = np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8)
+
+    def plot(self):
+        return self.orig_img
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AnnotationStore(directory=str(tmp_path))
+
+
+def test_pending_eviction_after_thumb_only_write(store):
+    result = FakeResult(1600, 1200)
+    store.put(KEY, result)
+    assert store.get(KEY, "thumb", "jpeg") is not None
+
+    store._pending.clear()  # Bellek sınırı / TTL ile silinmiş gibi
+    store._pending_bytes = 0
+    assert not store.contains(KEY)
+    assert store.get(KEY, "full", "jpeg") is None
+
+    # Aynı sonuç yeniden kaydedilince full ve screen tekrar üretilebilir
+    store.put(KEY, result)
+    assert store.contains(KEY)
+    with Image.open(io.BytesIO(store.get(KEY, "full", "jpeg"))) as full:
+        assert full.size == (1600, 1200)
+    assert store.get(KEY, "screen", "jpeg") is not None
+
+
+def test_full_on_disk_derives_other_variants(store):
+    store.put(KEY, FakeResult(1600, 1200))
+    assert store.get(KEY, "full", "jpeg") is not None
+    store._pending.clear()
+    store._pending_bytes = 0
+    assert store.contains(KEY)
+    assert store.get(KEY, "thumb", "jpeg") is not None
+
+
+def test_rewriting_a_variant_does_not_inflate_disk_usage(store, tmp_path):
+    store._write(KEY, "full", "jpeg", b"x" * 100)
+    store._write(KEY, "full", "jpeg", b"y" * 60)
+    on_disk = sum(path.stat().st_size for path in tmp_path.iterdir())
+    assert on_disk == 60
+    assert store._disk_bytes == 60
+    assert store._files[KEY][0] == 60
@@ -0,0 +1,25 @@
+from app.answer_cache import AnswerCache
+
+
+def test_same_question_hits():
+    cache = AnswerCache()
+    cache.put("What is eczema and how is it treated?", "eczema answer")
+    assert cache.get("what is eczema, and how is it treated") == "eczema answer"
+
+
+def test_condition_name_swap_misses():
+    cache = AnswerCache()
+    cache.put("I have a red itchy patch on my arm, could this be eczema and what cream should I use?", "eczema answer")
+    assert cache.get("I have a red itchy patch on my arm, could this be ringworm and what cream should I use?") is None
+
+
+def test_age_change_misses():
+    cache = AnswerCache()
+    cache.put("My baby is 3 months old and has a rash, can I use hydrocortisone?", "infant answer")
+    assert cache.get("My baby is 30 months old and has a rash, can I use hydrocortisone?") is None
+
+
+def test_negation_misses():
+    cache = AnswerCache()
+    cache.put("Is psoriasis contagious?", "psoriasis answer")
+    assert cache.get("Is psoriasis not contagious?") is None
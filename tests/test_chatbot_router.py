@@ -0,0 +1,44 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.chatbot_router as chatbot_router
+from app.answer_cache import answer_cache
+from conftest import ROOT
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Uygulama backend/ dizininden çalıştırılır (static gibi göreli yollar)
+    monkeypatch.chdir(os.path.join(ROOT, "backend"))
+    from app.main import app
+
+    monkeypatch.setattr(chatbot_router, "ANSWER_CACHE_ENABLED", True)
+    with TestClient(app) as client:
+        yield client
+
+
+def _login(client, email):
+    response = client.post("/auth/register", json={"username": "u", "email": email, "password": "pw"})
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+def test_cached_answer_only_for_first_message(client):
+    answer_cache.put("Is it contagious?", "cached context-free answer")
+    headers = _login(client, "cache-first@example.com")
+
+    first = client.post("/chatbot/chat", json={"message": "Is it contagious?"}, headers=headers)
+    assert first.json()["reply"] == "cached context-free answer"
+
+    followup = client.post("/chatbot/chat", json={"message": "Is it contagious?"}, headers=headers)
+    assert followup.json()["reply"] != "cached context-free answer"
+
+
+def test_stream_skips_cache_mid_conversation(client):
+    answer_cache.put("What cream should I use?", "cached context-free answer")
+    headers = _login(client, "cache-stream@example.com")
+    client.post("/chatbot/chat", json={"message": "I have a rash on my arm."}, headers=headers)
+
+    response = client.post("/chatbot/chat/stream", json={"message": "What cream should I use?"}, headers=headers)
+    assert "cached context-free answer" not in response.text
@@ -0,0 +1,57 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import app.jobs as jobs
+from app.jobs import JobQueue, fail_orphaned_jobs, get_job, instances_collection, records_collection
+
+
+def _ago(seconds: float) -> datetime:
+    return datetime.utcnow() - timedelta(seconds=seconds)
+
+
+async def _insert_job(instance: str, created_at: datetime, status: str = "running") -> str:
+    job_id = uuid.uuid4().hex
+    await records_collection.insert_one(
+        {"job_id": job_id, "status": status, "instance": instance, "created_at": created_at.isoformat()})
+    return job_id
+
+
+async def _heartbeat(instance: str, at: datetime):
+    await instances_collection.update_one({"instance": instance}, {"$set": {"heartbeat_at": at}}, upsert=True)
+
+
+def test_only_jobs_of_dead_instances_are_failed():
+    async def scenario():
+        old = _ago(10 * jobs.JOB_INSTANCE_TIMEOUT_SECONDS)
+        await _heartbeat("live-worker", _ago(1))
+        await _heartbeat("dead-worker", old)
+        live_job = await _insert_job("live-worker", old)
+        own_job = await _insert_job("this-worker", old)
+        dead_job = await _insert_job("dead-worker", old)
+        fresh_job = await _insert_job("new-worker", _ago(1))  # Henüz ilk heartbeat'i yok
+
+        await fail_orphaned_jobs("this-worker")
+        return [(await get_job(job_id))["status"] for job_id in (live_job, own_job, dead_job, fresh_job)]
+
+    assert asyncio.run(scenario()) == ["running", "running", "failed", "running"]
+
+
+def test_failed_job_is_not_overwritten_or_notified(monkeypatch):
+    sent = []
+    monkeypatch.setattr(jobs, "_post_webhook", lambda url, payload: sent.append(payload) or 200)
+    job_id = uuid.uuid4().hex
+
+    def handler(image):
+        # İşlenirken başka bir süreç job'u failed yapmış olsun (fake_mongo thread'den de kullanılabilir)
+        asyncio.run(records_collection.update_one({"job_id": job_id}, {"$set": {"status": "failed"}}))
+        return {field: "x" for field in jobs.RESULT_FIELDS}
+
+    async def scenario():
+        await records_collection.insert_one({"job_id": job_id, "status": "queued", "instance": "this-worker"})
+        await JobQueue(handler)._process(job_id, b"", "https://hooks.example.com/done")
+        return await get_job(job_id)
+
+    job = asyncio.run(scenario())
+    assert job["status"] == "failed" and "result" not in job
+    assert sent == []
@@ -0,0 +1,38 @@
+import asyncio
+import threading
+import time
+
+from common.llm_client import LLMClient
+
+
+class EndlessTransport:
+    """Tüketici bırakana kadar parça üreten transport; kapatıldığını kaydeder."""
+
+    model_name = "endless"
+
+    def __init__(self):
+        self.closed = threading.Event()
+
+    def stream(self, prompt, timeout):
+        try:
+            while True:
+                time.sleep(0.01)
+                yield "chunk "
+        finally:
+            self.closed.set()
+
+
+def test_abandoned_stream_releases_semaphore():
+    transport = EndlessTransport()
+    client = LLMClient(transport, max_concurrency=1)
+
+    async def scenario():
+        stream = client.stream("hello")
+        assert await stream.__anext__() == "chunk "
+        await stream.aclose()  # SSE istemcisi koptu
+        # Event loop çalışırken slot geri verilmeli (upstream akış bitmeden)
+        return await asyncio.to_thread(client._semaphore.acquire, True, 2)
+
+    assert asyncio.run(scenario())
+    client._semaphore.release()
+    assert transport.closed.is_set()
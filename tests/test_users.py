@@ -0,0 +1,18 @@
+import asyncio
+
+from pymongo.errors import DuplicateKeyError
+
+import app.users as users
+
+
+def test_duplicate_emails_fall_back_to_plain_index(monkeypatch):
+    created = []
+
+    async def create_index(keys, **options):
+        if options.get("unique"):
+            raise DuplicateKeyError("E11000 duplicate key error collection: users index: email_1")
+        created.append((keys, options))
+
+    monkeypatch.setattr(users.users_collection, "create_index", create_index)
+    asyncio.run(users.ensure_user_indexes())  # Hata fırlatmaz; readiness başarısız olmaz
+    assert created == [("email", {})]
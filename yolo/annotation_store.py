@@ -0,0 +1,329 @@
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, features
+from common.metrics import stage
+
+# ✅ Boxlu görsellerin tutulduğu klasör ve sınırlar (ortam değişkenleriyle ayarlanabilir)
+ANNOTATION_CACHE_DIR = os.getenv("ANNOTATION_CACHE_DIR", os.path.join(tempfile.gettempdir(), "dermin_annotated"))
+ANNOTATION_MAX_DISK_BYTES = int(os.getenv("ANNOTATION_MAX_DISK_BYTES", str(512 * 1024 * 1024)))
+ANNOTATION_MAX_PENDING_BYTES = int(os.getenv("ANNOTATION_MAX_PENDING_BYTES", str(256 * 1024 * 1024)))
+ANNOTATION_TTL_SECONDS = int(os.getenv("ANNOTATION_TTL_SECONDS", str(24 * 60 * 60)))
+ANNOTATION_URL_PREFIX = "/yolo/annotated"
+
+# ✅ Boyut varyantları: uzun kenarın en fazla piksel sayısı (0 → orijinal çözünürlük)
+ANNOTATION_VARIANTS = {
+    "thumb": int(os.getenv("ANNOTATION_THUMB_SIZE", "320")),
+    "screen": int(os.getenv("ANNOTATION_SCREEN_SIZE", "1280")),
+    "full": 0,
+}
+ANNOTATION_JPEG_QUALITY = int(os.getenv("ANNOTATION_JPEG_QUALITY", "85"))
+ANNOTATION_WEBP_QUALITY = int(os.getenv("ANNOTATION_WEBP_QUALITY", "80"))
+# ✅ Varsayılan: görsel ilk istendiğinde yalnızca istenen boyut / format üretilir.
+# 1 → sonuç gelir gelmez "screen" varyantı arka planda önceden üretilir (inference ile CPU paylaşır)
+ANNOTATION_EAGER_ENCODE = os.getenv("ANNOTATION_EAGER_ENCODE", "0") == "1"
+# Aynı anda en fazla bu kadar görsel çizilir / encode edilir
+ANNOTATION_ENCODER_WORKERS = int(os.getenv("ANNOTATION_ENCODER_WORKERS", "1"))
+
+# Pillow WebP desteği olmadan derlendiyse yalnızca JPEG üretilir
+FORMAT_MEDIA_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"} if features.check("webp") else {"jpeg": "image/jpeg"}
+_FORMAT_EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+
+_KEY_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+_FILE_PATTERN = re.compile(r"^([0-9a-f]{32})\.([a-z]+)\.([a-z]+)$")
+# Encode ayarları değişince ETag'ler de değişsin (aynı anahtar farklı bayt üretir)
+_ENCODING_TAG = hashlib.sha256(
+    repr((sorted(ANNOTATION_VARIANTS.items()), ANNOTATION_JPEG_QUALITY, ANNOTATION_WEBP_QUALITY)).encode()
+).hexdigest()[:8]
+
+
+def image_key(data) -> str:
+    """Girdi resminin içeriğinden (bayt ya da numpy dizi) sabit uzunlukta bir anahtar üretir."""
+    if not isinstance(data, (bytes, bytearray, memoryview)):
+        data = data.tobytes()
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def preferred_format(accept: str) -> str:
+    """Accept header'ına göre istemcinin kabul ettiği en küçük format (WebP, yoksa JPEG)."""
+    if "webp" not in FORMAT_MEDIA_TYPES:
+        return "jpeg"
+    for media_range in (accept or "").split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        if media_type.lower() != "image/webp":
+            continue
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    if float(value) <= 0:
+                        return "jpeg"
+                except ValueError:
+                    return "jpeg"
+        return "webp"
+    return "jpeg"
+
+
+def _long_side(image) -> int:
+    """Bekleyen kaydın (YOLO sonucu ya da çizilmiş görsel) uzun kenarı."""
+    if isinstance(image, Image.Image):
+        return max(image.size)
+    return max(image.orig_img.shape[:2])
+
+
+def _resolve_variant(variant: str, long_side: int) -> str:
+    """Kaynaktan büyük olmayan varyant ayrıca encode edilmez; "full" ile aynı baytlar olurdu."""
+    max_side = ANNOTATION_VARIANTS[variant]
+    return "full" if not max_side or long_side <= max_side else variant
+
+
+def _encode(image, variant: str, fmt: str) -> bytes:
+    max_side = ANNOTATION_VARIANTS[variant]
+    if max_side and max(image.size) > max_side:
+        image = image.copy()
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+    buffer = io.BytesIO()
+    if fmt == "webp":
+        image.save(buffer, format="WEBP", quality=ANNOTATION_WEBP_QUALITY, method=4)
+    else:
+        image.save(buffer, format="JPEG", quality=ANNOTATION_JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+class AnnotationStore:
+    """
+    Boxlu sonuç görsellerini girdi resminin hash'i ile saklar.
+    Görsel inference sırasında çizilmez; YOLO sonucu bekletilir ve bir boyut / format ilk istendiğinde
+    sonuç bir kez çizilip yalnızca o varyant encode edilerek diske yazılır. Kaynaktan büyük olmayan
+    varyantlar ayrıca üretilmez, "full" dosyası kullanılır.
+    Hem bekleyen sonuçlar hem de diskteki dosyalar boyut ve yaşa göre silinir.
+    """
+
+    def __init__(self, directory: str = ANNOTATION_CACHE_DIR, max_disk_bytes: int = ANNOTATION_MAX_DISK_BYTES,
+                 max_pending_bytes: int = ANNOTATION_MAX_PENDING_BYTES, ttl_seconds: int = ANNOTATION_TTL_SECONDS,
+                 eager_encode: bool = ANNOTATION_EAGER_ENCODE, encoder_workers: int = ANNOTATION_ENCODER_WORKERS):
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.max_pending_bytes = max_pending_bytes
+        self.ttl_seconds = ttl_seconds
+        self.eager_encode = eager_encode
+        self.encoder_workers = max(1, encoder_workers)
+        self._lock = threading.Lock()
+        # key -> [YOLO sonucu ya da çizilmiş görsel, boyut, eklenme zamanı]; ilk çizimden sonra
+        # sonuç yerine görsel tutulur, diğer varyantlar için tekrar çizilmez
+        self._pending = OrderedDict()
+        self._pending_bytes = 0
+        self._encoding = {}            # (key, varyant, format) -> encoder Future'ı (aynı iş iki kez yapılmasın)
+        self._executor = None
+        self._files = OrderedDict()    # key -> (diskteki varyantların toplam boyutu, ilk yazılma zamanı)
+        self._disk_bytes = 0
+        self._load_existing_files()
+
+    def url_for(self, key: str) -> str:
+        return f"{ANNOTATION_URL_PREFIX}/{key}"
+
+    def etag(self, key: str, variant: str, fmt: str) -> str:
+        """Varyantın içeriği anahtar ve encode ayarlarıyla belirlendiği için dosya okumadan hesaplanır."""
+        return f'"{key}-{variant}-{fmt}-{_ENCODING_TAG}"'
+
+    def put(self, key: str, result) -> str:
+        """YOLO sonucunu çizmeden kaydeder ve görselin benzersiz URL'ini döner."""
+        size = getattr(result.orig_img, "nbytes", 0)
+        with self._lock:
+            # Diskte yalnızca küçük varyantlar varsa sonuç yeniden bekletilir (full onlardan üretilemez)
+            if not self._has_full_locked(key):
+                old = self._pending.pop(key, None)
+                if old is not None:
+                    self._pending_bytes -= old[1]
+                self._pending[key] = [result, size, time.time()]
+                self._pending_bytes += size
+            self._evict_locked()
+        if self.eager_encode:
+            variant = _resolve_variant("screen", _long_side(result))
+            for fmt in FORMAT_MEDIA_TYPES:
+                self._schedule(key, variant, fmt)
+        return self.url_for(key)
+
+    def contains(self, key: str) -> bool:
+        """Görselin "full" varyantı hâlâ verilebiliyor mu (bekleyen sonuç ya da diskteki full dosyası)."""
+        with self._lock:
+            self._evict_locked()
+            return key in self._pending or self._has_full_locked(key)
+
+    def get(self, key: str, variant: str = "full", fmt: str = "jpeg"):
+        """
+        Görselin istenen boyut ve formattaki baytlarını döner; yoksa şimdi üretir (aynı varyant zaten
+        üretiliyorsa onu bekler). Anahtar bilinmiyorsa ya da üretilemiyorsa None döner.
+        """
+        if not _KEY_PATTERN.match(key) or variant not in ANNOTATION_VARIANTS or fmt not in FORMAT_MEDIA_TYPES:
+            return None
+
+        with self._lock:
+            self._evict_locked()
+            pending = self._pending.get(key)
+            on_disk = key in self._files
+        if pending is not None:
+            variant = _resolve_variant(variant, _long_side(pending[0]))
+
+        if on_disk:
+            data = self._read(key, variant, fmt)
+            if data is not None:
+                return data
+
+        if pending is None:
+            # Sonuç bellekten silinmiş: diskteki daha büyük bir varyanttan türetilebilir
+            return self._derive(key, variant, fmt) if on_disk else None
+
+        future = self._schedule(key, variant, fmt)
+        data = future.result() if future is not None else None
+        return data if data is not None else self._read(key, variant, fmt)
+
+    def _read(self, key: str, variant: str, fmt: str):
+        try:
+            with open(self._path(key, variant, fmt), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _schedule(self, key: str, variant: str, fmt: str):
+        """Varyantın encode işini (yoksa) encoder havuzuna verir ve Future'ı döner."""
+        task = (key, variant, fmt)
+        with self._lock:
+            future = self._encoding.get(task)
+            if future is not None or key not in self._pending:
+                return future
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.encoder_workers, thread_name_prefix="annotation-encoder")
+            future = self._executor.submit(self._encode_pending, task)
+            self._encoding[task] = future
+        return future
+
+    def _encode_pending(self, task: tuple):
+        key, variant, fmt = task
+        try:
+            # Kuyrukta beklerken bellek sınırı yüzünden silindiyse boşuna çizme
+            with self._lock:
+                entry = self._pending.get(key)
+            if entry is None:
+                return None
+            image = entry[0]
+            if not isinstance(image, Image.Image):
+                with stage("upload", "annotate"):
+                    image = Image.fromarray(image.plot()[..., ::-1])  # BGR → RGB
+                with self._lock:
+                    if self._pending.get(key) is entry:
+                        entry[0] = image
+            data = _encode(image, variant, fmt)
+            self._write(key, variant, fmt, data)
+            return data
+        finally:
+            with self._lock:
+                self._encoding.pop(task, None)
+
+    def _derive(self, key: str, variant: str, fmt: str):
+        """Diskteki en büyük varyanttan (full, yoksa daha büyük olan) istenen varyantı üretir."""
+        max_side = ANNOTATION_VARIANTS[variant]
+        candidates = sorted(
+            (name for name, side in ANNOTATION_VARIANTS.items() if not side or (max_side and side > max_side)),
+            key=lambda name: ANNOTATION_VARIANTS[name] or float("inf"), reverse=True,
+        )
+        for source_variant in candidates:
+            for source_fmt in FORMAT_MEDIA_TYPES:
+                try:
+                    with Image.open(self._path(key, source_variant, source_fmt)) as source:
+                        source.load()
+                except FileNotFoundError:
+                    continue
+                if source_variant == "full":
+                    variant = _resolve_variant(variant, max(source.size))
+                    data = self._read(key, variant, fmt)
+                    if data is not None:
+                        return data
+                data = _encode(source.convert("RGB"), variant, fmt)
+                self._write(key, variant, fmt, data)
+                return data
+        return None
+
+    def _write(self, key: str, variant: str, fmt: str, data: bytes):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key, variant, fmt)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+
+        with self._lock:
+            # Aynı varyant yeniden yazılıyorsa (eşzamanlı türetme / yeniden encode) eski dosya düşülür
+            try:
+                replaced = os.path.getsize(path) if key in self._files else 0
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+            size, written_at = self._files.get(key, (0, time.time()))
+            self._files[key] = (size + len(data) - replaced, written_at)
+            self._disk_bytes += len(data) - replaced
+            self._evict_locked()
+
+    def _has_full_locked(self, key: str) -> bool:
+        return key in self._files and any(os.path.exists(self._path(key, "full", fmt)) for fmt in FORMAT_MEDIA_TYPES)
+
+    def _path(self, key: str, variant: str, fmt: str) -> str:
+        return os.path.join(self.directory, f"{key}.{variant}.{_FORMAT_EXTENSIONS[fmt]}")
+
+    def _load_existing_files(self):
+        """Yeniden başlatmada diskte kalan görselleri eski → yeni sırasıyla indeksler."""
+        if not os.path.isdir(self.directory):
+            return
+        entries = {}
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            match = _FILE_PATTERN.match(name)
+            if match is None:
+                # ✅ Varyantsız eski sürüm dosyaları ({key}.jpg) artık indekslenmiyor; yer kaplamasın
+                key, ext = os.path.splitext(name)
+                if ext == ".jpg" and _KEY_PATTERN.match(key):
+                    os.remove(path)
+                continue
+            stat = os.stat(path)
+            size, mtime = entries.get(match.group(1), (0, 0.0))
+            entries[match.group(1)] = (size + stat.st_size, max(mtime, stat.st_mtime))
+        for key, (size, mtime) in sorted(entries.items(), key=lambda item: item[1][1]):
+            self._files[key] = (size, mtime)
+            self._disk_bytes += size
+        self._evict_locked()
+
+    def _drop_file_locked(self, key: str):
+        size, _ = self._files.pop(key)
+        self._disk_bytes -= size
+        for variant in ANNOTATION_VARIANTS:
+            for ext in _FORMAT_EXTENSIONS.values():
+                try:
+                    os.remove(os.path.join(self.directory, f"{key}.{variant}.{ext}"))
+                except FileNotFoundError:
+                    pass
+
+    def _evict_locked(self):
+        cutoff = time.time() - self.ttl_seconds
+
+        # ✅ Bekleyen sonuçlar: süresi dolan ya da bellek sınırını aşan en eskiler
+        while self._pending:
+            key, (_, size, created_at) = next(iter(self._pending.items()))
+            if created_at >= cutoff and self._pending_bytes <= self.max_pending_bytes:
+                break
+            self._pending.popitem(last=False)
+            self._pending_bytes -= size
+
+        # ✅ Diskteki görseller: süresi dolan ya da disk sınırını aşan en eskiler (tüm varyantlarıyla)
+        while self._files:
+            key, (size, written_at) = next(iter(self._files.items()))
+            if written_at >= cutoff and self._disk_bytes <= self.max_disk_bytes:
+                break
+            self._drop_file_locked(key)
+
+
+annotation_store = AnnotationStore()
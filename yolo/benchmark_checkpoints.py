@@ -0,0 +1,276 @@
+"""
+Eğitilmiş YOLO checkpoint'lerini CPU'da karşılaştırır: doğruluk (mAP, sınıf başına recall),
+farklı batch boyutu / thread sayısında gecikme yüzdelikleri ve tepe bellek (peak RSS).
+Sonuçlar rapor olarak yazılır ve MLflow'a yeni bir koşu olarak loglanır; servis modeli
+gerçek hız / doğruluk dengesine göre seçilebilsin.
+
+Kullanım (repo kökünden):
+    python -m yolo.benchmark_checkpoints                                  # yolo/*.pt + runs/detect/*/weights/best.pt
+    python -m yolo.benchmark_checkpoints yolo/yolov8s_50epochs.pt yolo/yolov8n_custom.pt
+    python -m yolo.benchmark_checkpoints --data path/to/val_images --batch-sizes 1 4 --threads 1 4
+    python -m yolo.benchmark_checkpoints --no-mlflow                      # sadece rapor
+
+--data bir data.yaml ya da doğrulama klasörü olabilir (images/ + labels/ ya da resimler ve YOLO .txt
+etiketleri yan yana); klasörde sınıf isimleri checkpoint'in kendisinden alınır.
+Her checkpoint ayrı bir süreçte ölçülür; peak RSS diğer modellerden etkilenmez.
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import yaml
+
+from yolo.export_model import (
+    DEFAULT_RUN_DIR, YOLO_DIR, load_run_args, load_sample_images, measure_latency, resolve_data,
+)
+from yolo.model_backends import BASE_DIR
+
+DEFAULT_REPORT_DIR = os.path.join(YOLO_DIR, "exports")
+# ✅ Notebook'taki tracking sunucusu (mlflow server --backend-store-uri yolo/mlruns)
+MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://localhost:5000")
+MLFLOW_EXPERIMENT = os.getenv("MLFLOW_BENCHMARK_EXPERIMENT", "YOLO-Checkpoint-Benchmarks")
+
+
+def discover_checkpoints() -> list:
+    """Repodaki checkpoint'ler: yolo/*.pt ve eğitim koşularının best.pt'leri."""
+    paths = glob.glob(os.path.join(YOLO_DIR, "*.pt"))
+    paths += glob.glob(os.path.join(YOLO_DIR, "runs", "detect", "*", "weights", "best.pt"))
+    return sorted(paths)
+
+
+def _display_path(path: str) -> str:
+    """Repo içindeki yolları köke göre kısaltır."""
+    path = os.path.abspath(path)
+    return os.path.relpath(path, BASE_DIR) if path.startswith(BASE_DIR + os.sep) else path
+
+
+def prepare_data(data: str, names: dict, workdir: str):
+    """
+    data.yaml'ı olduğu gibi döner; doğrulama klasörü verildiyse checkpoint'in sınıf isimleriyle
+    geçici bir data.yaml yazar. Klasörde images/ alt klasörü varsa etiketler labels/'ta aranır.
+    """
+    if data is None or not os.path.isdir(data):
+        return data
+    folder = os.path.abspath(data)
+    images = "images" if os.path.isdir(os.path.join(folder, "images")) else "."
+    path = os.path.join(workdir, "data.yaml")
+    with open(path, "w") as f:
+        yaml.safe_dump({"path": folder, "train": images, "val": images, "names": dict(names)}, f)
+    return path
+
+
+def evaluate_checkpoint(model, data: str, imgsz: int) -> dict:
+    """Tek val koşusundan genel metrikler ve sınıf başına recall."""
+    metrics = model.val(data=data, imgsz=imgsz, batch=1, device="cpu", plots=False, verbose=False)
+    box = metrics.box
+    return {
+        "mAP50": round(float(box.map50), 4),
+        "mAP50-95": round(float(box.map), 4),
+        "precision": round(float(box.mp), 4),
+        "recall": round(float(box.mr), 4),
+        # Doğrulama setinde hiç örneği olmayan sınıflar listede yer almaz
+        "recall_per_class": {
+            metrics.names[int(class_id)]: round(float(recall), 4)
+            for class_id, recall in zip(box.ap_class_index, box.r)
+        },
+    }
+
+
+def peak_rss_mb():
+    """Sürecin ömrü boyunca ulaştığı en yüksek bellek (MB); desteklenmeyen platformda None."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux KB, macOS bayt cinsinden döner
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def benchmark_checkpoint(checkpoint: str, data: str, imgsz: int, batch_sizes: list, threads: list,
+                         runs: int, skip_accuracy: bool = False) -> dict:
+    """Bir checkpoint'i yükler, doğruluğunu ve her (thread, batch) için gecikmesini ölçer."""
+    import torch
+    from ultralytics import YOLO
+
+    model = YOLO(checkpoint, task="detect")
+    row = {
+        "checkpoint": _display_path(checkpoint),
+        "size_mb": round(os.path.getsize(checkpoint) / (1024 * 1024), 2) if os.path.isfile(checkpoint) else None,
+        "classes": len(model.names),
+        "accuracy": None,
+        "latency": [],
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        data = prepare_data(data, model.names, workdir)
+        if data is not None and not skip_accuracy:
+            row["accuracy"] = evaluate_checkpoint(model, data, imgsz)
+
+        images = load_sample_images(data, max(8, max(batch_sizes) * 4), imgsz)
+
+    default_threads = torch.get_num_threads()
+    try:
+        for num_threads in threads:
+            torch.set_num_threads(num_threads)
+            for batch_size in batch_sizes:
+                latency = measure_latency(model, images, batch_size=batch_size, runs=runs)
+                row["latency"].append({"threads": num_threads, **latency})
+    finally:
+        torch.set_num_threads(default_threads)
+
+    row["peak_rss_mb"] = peak_rss_mb()
+    return row
+
+
+def run_isolated(checkpoint: str, **kwargs) -> dict:
+    """Checkpoint'i yeni bir süreçte ölçer (spawn: temiz torch durumu ve kendi peak RSS'i)."""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(benchmark_checkpoint, checkpoint, **kwargs).result()
+
+
+def log_to_mlflow(rows: list, settings: dict, tracking_uri: str, experiment: str):
+    """Her checkpoint için ayrı bir MLflow koşusu açar; mlflow kurulu değilse atlar."""
+    try:
+        import mlflow
+    except ImportError:
+        print("⚠️ mlflow is not installed; skipping MLflow logging (pip install mlflow)")
+        return
+
+    mlflow.set_tracking_uri(tracking_uri)
+    mlflow.set_experiment(experiment)
+    for row in rows:
+        name = os.path.splitext(os.path.basename(row["checkpoint"]))[0]
+        with mlflow.start_run(run_name=f"cpu-benchmark-{name}"):
+            mlflow.set_tag("benchmark", "cpu")
+            mlflow.log_params({
+                "checkpoint": row["checkpoint"],
+                "data": settings["data"],
+                "imgsz": settings["imgsz"],
+                "batch_sizes": ",".join(map(str, settings["batch_sizes"])),
+                "threads": ",".join(map(str, settings["threads"])),
+                "runs": settings["runs"],
+            })
+
+            metrics = {"classes": row["classes"]}
+            if row["size_mb"] is not None:
+                metrics["size_mb"] = row["size_mb"]
+            if row["peak_rss_mb"] is not None:
+                metrics["peak_rss_mb"] = row["peak_rss_mb"]
+            accuracy = row["accuracy"] or {}
+            for key in ("mAP50", "mAP50-95", "precision", "recall"):
+                if key in accuracy:
+                    metrics[key] = accuracy[key]
+            for class_name, recall in accuracy.get("recall_per_class", {}).items():
+                metrics[f"recall_{_metric_name(class_name)}"] = recall
+            for lat in row["latency"]:
+                suffix = f"t{lat['threads']}_b{lat['batch_size']}"
+                for key in ("p50_ms", "p95_ms", "p99_ms", "images_per_second"):
+                    metrics[f"{key}_{suffix}"] = lat[key]
+            mlflow.log_metrics(metrics)
+            mlflow.log_dict(row, "checkpoint_benchmark.json")
+
+
+def _metric_name(value: str) -> str:
+    """MLflow metrik isimlerinde izin verilmeyen karakterleri '_' yapar."""
+    return "".join(c if c.isalnum() or c in "_-./" else "_" for c in str(value))
+
+
+def _or_dash(value):
+    return "-" if value is None else value
+
+
+def write_report(rows: list, report_dir: str, settings: dict) -> str:
+    os.makedirs(report_dir, exist_ok=True)
+    with open(os.path.join(report_dir, "checkpoint_report.json"), "w") as f:
+        json.dump({"settings": settings, "checkpoints": rows}, f, indent=4)
+
+    lines = [
+        "| Checkpoint | MB | mAP50 | mAP50-95 | recall | threads | batch | p50 ms | p95 ms | p99 ms | img/s | peak RSS MB |",
+        "|---|---|---|---|---|---|---|---|---|---|---|---|",
+    ]
+    for row in rows:
+        acc = row["accuracy"] or {}
+        for lat in row["latency"]:
+            lines.append(
+                f"| {row['checkpoint']} | {_or_dash(row['size_mb'])} | {acc.get('mAP50', '-')} | {acc.get('mAP50-95', '-')} "
+                f"| {acc.get('recall', '-')} | {lat['threads']} | {lat['batch_size']} | {lat['p50_ms']} "
+                f"| {lat['p95_ms']} | {lat['p99_ms']} | {lat['images_per_second']} | {_or_dash(row['peak_rss_mb'])} |"
+            )
+
+    recall_lines = []
+    for row in rows:
+        per_class = (row["accuracy"] or {}).get("recall_per_class")
+        if per_class:
+            recall_lines.append(f"\n## {row['checkpoint']} recall per class\n")
+            recall_lines += ["| Class | Recall |", "|---|---|"]
+            recall_lines += [f"| {name} | {recall} |" for name, recall in per_class.items()]
+
+    path = os.path.join(report_dir, "checkpoint_report.md")
+    with open(path, "w") as f:
+        f.write(f"# YOLO checkpoint CPU benchmark\n\nSettings: `{json.dumps(settings)}`\n\n"
+                + "\n".join(lines + recall_lines) + "\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare YOLO checkpoints on CPU: accuracy, latency and memory")
+    parser.add_argument("checkpoints", nargs="*", help="Checkpoints to compare (default: yolo/*.pt and runs' best.pt)")
+    parser.add_argument("--run", default=DEFAULT_RUN_DIR, help="Training run directory holding args.yaml")
+    parser.add_argument("--data", help="data.yaml or validation folder (default: from the run)")
+    parser.add_argument("--imgsz", type=int, help="Input size (default: from the run)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, os.cpu_count() or 1],
+                        help="torch intra-op thread counts to measure")
+    parser.add_argument("--runs", type=int, default=20, help="Timed runs per (threads, batch) setting")
+    parser.add_argument("--skip-accuracy", action="store_true")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Measure all checkpoints in this process (peak RSS is then cumulative)")
+    parser.add_argument("--report-dir", default=DEFAULT_REPORT_DIR)
+    parser.add_argument("--no-mlflow", action="store_true")
+    parser.add_argument("--tracking-uri", default=MLFLOW_TRACKING_URI)
+    parser.add_argument("--experiment", default=MLFLOW_EXPERIMENT)
+    args = parser.parse_args()
+
+    # ✅ GPU olan makinede de CPU servis maliyeti ölçülsün (torch import edilmeden önce)
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""
+
+    checkpoints = [os.path.abspath(p) for p in args.checkpoints] or discover_checkpoints()
+    missing = [p for p in checkpoints if not os.path.exists(p)]
+    if missing or not checkpoints:
+        parser.error(f"Checkpoint not found: {', '.join(missing) or 'no .pt files under yolo/'}")
+
+    run_args = load_run_args(args.run)
+    imgsz = args.imgsz or int(run_args.get("imgsz", 640))
+    data = args.data if args.data and os.path.isdir(args.data) else resolve_data(args.data or run_args.get("data"))
+    if data is None:
+        print("⚠️ Dataset not found: accuracy needs --data, latency uses synthetic images")
+
+    settings = {
+        "imgsz": imgsz, "data": data, "batch_sizes": args.batch_sizes,
+        "threads": args.threads, "runs": args.runs,
+    }
+    options = dict(data=data, imgsz=imgsz, batch_sizes=args.batch_sizes, threads=args.threads,
+                   runs=args.runs, skip_accuracy=args.skip_accuracy)
+
+    rows = []
+    for checkpoint in checkpoints:
+        print(f"Benchmarking {_display_path(checkpoint)}...")
+        if args.in_process:
+            rows.append(benchmark_checkpoint(checkpoint, **options))
+        else:
+            rows.append(run_isolated(checkpoint, **options))
+
+    print(f"Report written to {write_report(rows, args.report_dir, settings)}")
+    if not args.no_mlflow:
+        log_to_mlflow(rows, settings, args.tracking_uri, args.experiment)
+
+
+if __name__ == "__main__":
+    main()
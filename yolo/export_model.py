@@ -0,0 +1,228 @@
+"""
+Eğitilmiş YOLO ağırlıklarını CPU inference backend'lerine export eder ve
+doğruluk / gecikme karşılaştırma raporu üretir.
+
+Kullanım (repo kökünden):
+    python -m yolo.export_model                          # onnx + openvino + int8 export, rapor
+    python -m yolo.export_model --backends onnx int8     # sadece seçilen backend'ler
+    python -m yolo.export_model --skip-export            # sadece karşılaştırma raporu
+
+Görüntü boyutu ve kalibrasyon / doğrulama verisi eğitim koşusunun args.yaml'ından
+(yolo/runs/detect/<run>/args.yaml) okunur; --data ve --imgsz ile değiştirilebilir.
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import statistics
+import time
+
+import numpy as np
+import yaml
+
+from yolo.model_backends import BASE_DIR, BACKEND_PATHS, MODEL_PATH, load_model
+
+YOLO_DIR = os.path.join(BASE_DIR, "yolo")
+DEFAULT_RUN_DIR = os.path.join(YOLO_DIR, "runs", "detect", "train14")
+DEFAULT_REPORT_DIR = os.path.join(YOLO_DIR, "exports")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def load_run_args(run_dir: str) -> dict:
+    path = os.path.join(run_dir, "args.yaml")
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return yaml.safe_load(f) or {}
+
+
+def resolve_data(data: str):
+    """data.yaml yolunu cwd, yolo/ ve repo köküne göre arar; bulunamazsa None."""
+    if not data:
+        return None
+    for candidate in (data, os.path.join(YOLO_DIR, data), os.path.join(BASE_DIR, data)):
+        if os.path.exists(candidate):
+            return os.path.abspath(candidate)
+    return None
+
+
+def export_backend(backend: str, imgsz: int, data: str = None, fraction: float = 1.0) -> str:
+    """Backend'i .pt'den export eder ve model_backends'in beklediği yola koyar."""
+    if backend == "pytorch":
+        return MODEL_PATH
+
+    from ultralytics import YOLO
+
+    model = YOLO(MODEL_PATH)
+    if backend == "onnx":
+        exported = model.export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+    elif backend == "openvino":
+        exported = model.export(format="openvino", imgsz=imgsz, dynamic=True)
+    elif backend == "int8":
+        if data is None:
+            raise ValueError("INT8 export needs calibration data; pass --data or fix the run's args.yaml")
+        exported = model.export(format="openvino", imgsz=imgsz, dynamic=True, int8=True, data=data, fraction=fraction)
+    else:
+        raise ValueError(f"Unknown YOLO backend '{backend}'")
+
+    target = BACKEND_PATHS[backend]
+    if os.path.abspath(str(exported)) != os.path.abspath(target):
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        elif os.path.exists(target):
+            os.remove(target)
+        shutil.move(str(exported), target)
+    return target
+
+
+def load_sample_images(data: str, count: int, imgsz: int) -> list:
+    """Doğrulama setinden `count` resim okur; veri yoksa sentetik resim üretir."""
+    from PIL import Image
+
+    paths = []
+    if data:
+        with open(data, "r") as f:
+            spec = yaml.safe_load(f) or {}
+        root = spec.get("path") or os.path.dirname(data)
+        if not os.path.isabs(root):
+            root = os.path.join(os.path.dirname(data), root)
+        val = spec.get("val") or []
+        for entry in val if isinstance(val, list) else [val]:
+            folder = entry if os.path.isabs(entry) else os.path.join(root, entry)
+            paths += sorted(p for p in glob.glob(os.path.join(folder, "**", "*"), recursive=True)
+                            if p.lower().endswith(IMAGE_EXTENSIONS))
+
+    if paths:
+        return [np.asarray(Image.open(p).convert("RGB")) for p in paths[:count]]
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, (imgsz, imgsz, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def _percentile(sorted_values: list, q: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure_latency(model, images: list, batch_size: int = 1, warmup: int = 3, runs: int = 20) -> dict:
+    """
+    Modelin batch başına gecikmesini ölçer (ms).
+    :return: mean / p50 / p95 / p99 gecikme ve saniyedeki resim sayısı
+    """
+    batches = [images[i:i + batch_size] for i in range(0, len(images), batch_size)] or [images]
+    batches = [b for b in batches if len(b) == batch_size] or batches
+
+    for i in range(warmup):
+        model(batches[i % len(batches)], batch=batch_size, verbose=False)
+
+    timings = []
+    for i in range(runs):
+        started = time.perf_counter()
+        model(batches[i % len(batches)], batch=batch_size, verbose=False)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+    mean = statistics.fmean(timings)
+    return {
+        "batch_size": batch_size,
+        "runs": runs,
+        "mean_ms": round(mean, 2),
+        "p50_ms": round(_percentile(timings, 0.50), 2),
+        "p95_ms": round(_percentile(timings, 0.95), 2),
+        "p99_ms": round(_percentile(timings, 0.99), 2),
+        "images_per_second": round(1000 * batch_size / mean, 2),
+    }
+
+
+def evaluate_accuracy(model, data: str, imgsz: int) -> dict:
+    metrics = model.val(data=data, imgsz=imgsz, batch=1, device="cpu", plots=False, verbose=False)
+    return {
+        "mAP50": round(float(metrics.box.map50), 4),
+        "mAP50-95": round(float(metrics.box.map), 4),
+        "precision": round(float(metrics.box.mp), 4),
+        "recall": round(float(metrics.box.mr), 4),
+    }
+
+
+def compare_backends(backends: list, data: str, imgsz: int, runs: int, batch_size: int,
+                     skip_accuracy: bool = False) -> list:
+    images = load_sample_images(data, max(8, batch_size * 4), imgsz)
+    rows = []
+    for backend in backends:
+        model = load_model(backend)
+        row = {
+            "backend": backend,
+            "path": os.path.relpath(BACKEND_PATHS[backend], BASE_DIR),
+            "latency": measure_latency(model, images, batch_size=batch_size, runs=runs),
+            "accuracy": None if skip_accuracy or data is None else evaluate_accuracy(model, data, imgsz),
+        }
+        rows.append(row)
+
+    baseline = next((r for r in rows if r["backend"] == "pytorch"), None)
+    for row in rows:
+        if baseline is None:
+            break
+        row["speedup_vs_pytorch"] = round(baseline["latency"]["mean_ms"] / row["latency"]["mean_ms"], 2)
+        if row["accuracy"] and baseline["accuracy"]:
+            row["mAP50-95_delta_vs_pytorch"] = round(
+                row["accuracy"]["mAP50-95"] - baseline["accuracy"]["mAP50-95"], 4)
+    return rows
+
+
+def write_report(rows: list, report_dir: str, settings: dict) -> str:
+    os.makedirs(report_dir, exist_ok=True)
+    with open(os.path.join(report_dir, "backend_report.json"), "w") as f:
+        json.dump({"settings": settings, "backends": rows}, f, indent=4)
+
+    lines = [
+        "| Backend | mAP50 | mAP50-95 | mean ms | p95 ms | img/s | speedup | ΔmAP50-95 |",
+        "|---|---|---|---|---|---|---|---|",
+    ]
+    for row in rows:
+        acc = row["accuracy"] or {}
+        lat = row["latency"]
+        lines.append(
+            f"| {row['backend']} | {acc.get('mAP50', '-')} | {acc.get('mAP50-95', '-')} | {lat['mean_ms']} "
+            f"| {lat['p95_ms']} | {lat['images_per_second']} | {row.get('speedup_vs_pytorch', '-')} "
+            f"| {row.get('mAP50-95_delta_vs_pytorch', '-')} |"
+        )
+    path = os.path.join(report_dir, "backend_report.md")
+    with open(path, "w") as f:
+        f.write(f"# YOLO backend comparison\n\nSettings: `{json.dumps(settings)}`\n\n" + "\n".join(lines) + "\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export YOLO weights to CPU backends and compare them")
+    parser.add_argument("--backends", nargs="+", default=list(BACKEND_PATHS), choices=list(BACKEND_PATHS),
+                        help="Backends to export and compare (pytorch is always measured as the baseline)")
+    parser.add_argument("--run", default=DEFAULT_RUN_DIR, help="Training run directory holding args.yaml")
+    parser.add_argument("--data", help="data.yaml for calibration / validation (default: from the run)")
+    parser.add_argument("--imgsz", type=int, help="Input size (default: from the run)")
+    parser.add_argument("--fraction", type=float, default=1.0, help="Fraction of the dataset used for INT8 calibration")
+    parser.add_argument("--batch", type=int, default=1, help="Batch size used for latency measurement")
+    parser.add_argument("--runs", type=int, default=20, help="Timed runs per backend")
+    parser.add_argument("--skip-export", action="store_true")
+    parser.add_argument("--skip-accuracy", action="store_true")
+    parser.add_argument("--report-dir", default=DEFAULT_REPORT_DIR)
+    args = parser.parse_args()
+
+    run_args = load_run_args(args.run)
+    imgsz = args.imgsz or int(run_args.get("imgsz", 640))
+    data = resolve_data(args.data or run_args.get("data"))
+    if data is None:
+        print("⚠️ Dataset not found: INT8 calibration and accuracy comparison need --data")
+
+    backends = ["pytorch"] + [b for b in args.backends if b != "pytorch"]
+    if not args.skip_export:
+        for backend in backends:
+            print(f"Exporting {backend}...")
+            export_backend(backend, imgsz, data, args.fraction)
+
+    rows = compare_backends(backends, data, imgsz, args.runs, args.batch, args.skip_accuracy)
+    settings = {"imgsz": imgsz, "data": data, "batch": args.batch, "runs": args.runs, "run": args.run}
+    print(f"Report written to {write_report(rows, args.report_dir, settings)}")
+
+
+if __name__ == "__main__":
+    main()
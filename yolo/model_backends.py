@@ -0,0 +1,34 @@
+import os
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(BASE_DIR, "yolo", "yolov8s_50epochs.pt")
+
+# ✅ Inference backend'i: pytorch | onnx | openvino | int8 (OpenVINO INT8)
+YOLO_BACKEND = os.getenv("YOLO_BACKEND", "pytorch")
+
+# Backend -> export edilen modelin yolu (ultralytics export'u .pt'nin yanına yazar)
+_stem = os.path.splitext(MODEL_PATH)[0]
+BACKEND_PATHS = {
+    "pytorch": MODEL_PATH,
+    "onnx": f"{_stem}.onnx",
+    "openvino": f"{_stem}_openvino_model",
+    "int8": f"{_stem}_int8_openvino_model",
+}
+
+
+def model_path_for(backend: str = YOLO_BACKEND) -> str:
+    """Backend'in model dosyasını / klasörünü döner; export edilmemişse hata verir."""
+    if backend not in BACKEND_PATHS:
+        raise ValueError(f"Unknown YOLO backend '{backend}', expected one of {sorted(BACKEND_PATHS)}")
+    path = BACKEND_PATHS[backend]
+    if not os.path.exists(path):
+        hint = "" if backend == "pytorch" else f" Run `python -m yolo.export_model --backends {backend}` first."
+        raise FileNotFoundError(f"Model for backend '{backend}' not found at {path}.{hint}")
+    return path
+
+
+def load_model(backend: str = YOLO_BACKEND):
+    """Seçilen backend için ultralytics YOLO modelini yükler (predict arayüzü hepsinde aynı)."""
+    from ultralytics import YOLO
+
+    return YOLO(model_path_for(backend), task="detect")
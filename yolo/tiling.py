@@ -0,0 +1,145 @@
+import math
+import os
+import numpy as np
+
+# ✅ Inference modu: "full" → resim tek parça verilir, "adaptive" → büyük resimler parçalanır
+YOLO_INFERENCE_MODE = os.getenv("YOLO_INFERENCE_MODE", "full")
+# Parça (tile) boyutu; modelin giriş boyutuyla aynı tutulursa parçalar küçültülmeden işlenir
+YOLO_TILE_SIZE = int(os.getenv("YOLO_TILE_SIZE", "640"))
+# Komşu parçaların örtüşme oranı (kenara denk gelen lezyonlar bölünmesin)
+YOLO_TILE_OVERLAP = float(os.getenv("YOLO_TILE_OVERLAP", "0.2"))
+# En uzun kenarı bundan küçük resimler parçalanmaz
+YOLO_TILE_MIN_SIDE = int(os.getenv("YOLO_TILE_MIN_SIDE", "1600"))
+# adaptive modda resim en fazla bu çözünürlükte çözülür
+YOLO_TILE_MAX_SIDE = int(os.getenv("YOLO_TILE_MAX_SIDE", "2560"))
+# Parça sayısı bunu geçecekse resim önce küçültülür (gecikme parça sayısıyla doğrusal artmasın)
+YOLO_TILE_MAX_TILES = max(1, int(os.getenv("YOLO_TILE_MAX_TILES", "8")))
+# Parçalardan gelen kutular birleştirilirken kullanılan IoU eşiği
+YOLO_TILE_NMS_IOU = float(os.getenv("YOLO_TILE_NMS_IOU", "0.5"))
+
+
+def decode_max_side(default: int, width: int, height: int) -> int:
+    """
+    Resim çözülürken izin verilen en uzun kenar (başlıktaki boyuttan, çözmeden önce hesaplanır).
+    adaptive modda yalnızca parçalanacak resimler için yükseltilir; o da parça sayısı
+    YOLO_TILE_MAX_TILES'a sığacak boyuta kadar (fazlası plan_tiles'ta nasılsa küçültülürdü).
+    """
+    side = max(width, height)
+    if YOLO_INFERENCE_MODE != "adaptive" or side < YOLO_TILE_MIN_SIDE:
+        return default
+    ratio = min(side, max(default, YOLO_TILE_MAX_SIDE)) / side
+    width, height = int(width * ratio), int(height * ratio)
+    fitted = int(max(width, height) * _fit_scale(width, height, YOLO_TILE_SIZE, YOLO_TILE_OVERLAP, YOLO_TILE_MAX_TILES))
+    # En az YOLO_TILE_MIN_SIDE: çözülen resim plan_tiles'ta da parçalanacak resim sayılmalı
+    return max(default, YOLO_TILE_MIN_SIDE, fitted)
+
+
+def _spans(length: int, tile: int, overlap: float) -> list:
+    if length <= tile:
+        return [(0, length)]
+    stride = max(1, int(tile * (1 - overlap)))
+    count = math.ceil((length - tile) / stride) + 1
+    starts = [min(i * stride, length - tile) for i in range(count)]
+    return [(start, start + tile) for start in sorted(set(starts))]
+
+
+def tile_grid(width: int, height: int, tile: int = YOLO_TILE_SIZE, overlap: float = YOLO_TILE_OVERLAP) -> list:
+    """Resmi kaplayan, örtüşen parçaların (x0, y0, x1, y1) koordinatları; son parçalar kenara hizalanır."""
+    return [
+        (x0, y0, x1, y1)
+        for y0, y1 in _spans(height, tile, overlap)
+        for x0, x1 in _spans(width, tile, overlap)
+    ]
+
+
+def _fit_scale(width: int, height: int, tile: int, overlap: float, max_tiles: int) -> float:
+    """Parça sayısını max_tiles'a (>= 1) indiren küçültme oranı (gerekmiyorsa 1.0)."""
+    scale = 1.0
+    while len(tile_grid(int(width * scale), int(height * scale), tile, overlap)) > max_tiles:
+        scale *= 0.85
+    return scale
+
+
+def plan_tiles(image: np.ndarray, tile: int = YOLO_TILE_SIZE, overlap: float = YOLO_TILE_OVERLAP,
+               min_side: int = YOLO_TILE_MIN_SIDE, max_tiles: int = YOLO_TILE_MAX_TILES):
+    """
+    Resmin nasıl işleneceğine karar verir.
+    :return: None → tek parça işlenir; yoksa (parçalanacak resim, parça koordinatları, ölçek)
+             Ölçek, parça sayısını max_tiles'a indirmek için resmin küçültülme oranıdır.
+    """
+    if max_tiles < 1:
+        raise ValueError(f"max_tiles must be at least 1, got {max_tiles}")
+    height, width = image.shape[:2]
+    if YOLO_INFERENCE_MODE != "adaptive" or max(height, width) < min_side:
+        return None
+
+    scale = _fit_scale(width, height, tile, overlap, max_tiles)
+    grid = tile_grid(int(width * scale), int(height * scale), tile, overlap)
+
+    if scale < 1.0:
+        from PIL import Image
+
+        resized = Image.fromarray(image).resize((int(width * scale), int(height * scale)), Image.BILINEAR)
+        image = np.asarray(resized)
+    return image, grid, scale
+
+
+def crop_tiles(image: np.ndarray, grid: list) -> list:
+    return [np.ascontiguousarray(image[y0:y1, x0:x1]) for x0, y0, x1, y1 in grid]
+
+
+def _box_data(result) -> np.ndarray:
+    data = result.boxes.data
+    return data.cpu().numpy() if hasattr(data, "cpu") else np.asarray(data)
+
+
+def nms(boxes: np.ndarray, iou_threshold: float = YOLO_TILE_NMS_IOU) -> np.ndarray:
+    """
+    Sınıf bazında non-maximum suppression.
+    :param boxes: (N, 6) dizi: x1, y1, x2, y2, güven, sınıf
+    :return: Kalan kutular, güvene göre azalan sırada
+    """
+    if len(boxes) == 0:
+        return boxes
+    boxes = boxes[np.argsort(-boxes[:, 4])]
+    # Farklı sınıfların kutuları hiç çakışmasın diye sınıfa göre kaydırılır
+    offset = boxes[:, 5:6] * (boxes[:, :4].max() + 1)
+    coords = boxes[:, :4] + offset
+    areas = (coords[:, 2] - coords[:, 0]) * (coords[:, 3] - coords[:, 1])
+
+    keep = []
+    remaining = np.arange(len(boxes))
+    while len(remaining):
+        i = remaining[0]
+        keep.append(i)
+        rest = remaining[1:]
+        xx1 = np.maximum(coords[i, 0], coords[rest, 0])
+        yy1 = np.maximum(coords[i, 1], coords[rest, 1])
+        xx2 = np.minimum(coords[i, 2], coords[rest, 2])
+        yy2 = np.minimum(coords[i, 3], coords[rest, 3])
+        inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        remaining = rest[iou <= iou_threshold]
+    return boxes[keep]
+
+
+def merge_tile_results(image: np.ndarray, full_result, tile_results: list, grid: list, scale: float,
+                       iou_threshold: float = YOLO_TILE_NMS_IOU):
+    """
+    Parça sonuçlarını ve tüm resmin (büyük lezyonlar için) sonucunu orijinal koordinatlarda birleştirir.
+    Dönen ultralytics Results objesi tek parça inference sonucuyla aynı şekilde kullanılır (to_df, plot).
+    """
+    import torch
+    from ultralytics.engine.results import Results
+
+    parts = [_box_data(full_result)]
+    for result, (x0, y0, _, _) in zip(tile_results, grid):
+        data = _box_data(result).copy()
+        data[:, [0, 2]] = (data[:, [0, 2]] + x0) / scale
+        data[:, [1, 3]] = (data[:, [1, 3]] + y0) / scale
+        parts.append(data)
+
+    merged = nms(np.concatenate(parts).astype(np.float32), iou_threshold)
+    merged_result = Results(orig_img=image, path="", names=full_result.names, boxes=torch.from_numpy(merged))
+    merged_result.speed = full_result.speed
+    return merged_result
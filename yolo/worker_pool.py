@@ -0,0 +1,282 @@
+import atexit
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+from queue import Queue, Empty
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ✅ Inference worker süreçleri (0 = model API sürecinde çalışır)
+YOLO_WORKERS = int(os.getenv("YOLO_WORKERS", "0"))
+# Worker başına torch thread sayısı (0 = çekirdekler worker'lara eşit bölünür)
+YOLO_WORKER_THREADS = int(os.getenv("YOLO_WORKER_THREADS", "0"))
+# Worker'lar ayrı çekirdek gruplarına sabitlensin mi (sadece Linux)
+YOLO_WORKER_PIN_CPUS = os.getenv("YOLO_WORKER_PIN_CPUS", "0") == "1"
+# Bu sürede cevap vermeyen worker öldürülüp yeniden başlatılır
+YOLO_WORKER_TIMEOUT_SECONDS = float(os.getenv("YOLO_WORKER_TIMEOUT_SECONDS", "120"))
+# Warm-up forward pass'i için kullanılan boş resmin boyutu
+YOLO_WARMUP_IMGSZ = int(os.getenv("YOLO_WARMUP_IMGSZ", "640"))
+# Sağlık kontrolü aralığı
+HEALTH_CHECK_INTERVAL = 0.5
+
+
+def _worker_main(worker_id, model_path, num_threads, cpus, conn):
+    """
+    Worker süreci: modeli yükler, boş bir resimle warm-up yapar, sonra hazır olduğunu bildirir.
+    Sadece kutu verisi (N, 6) geri gönderilir; orijinal resim API sürecinde zaten var.
+    """
+    # torch import edilmeden önce ayarlanmalı
+    os.environ["OMP_NUM_THREADS"] = str(num_threads)
+    os.environ["MKL_NUM_THREADS"] = str(num_threads)
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+    import torch
+    from ultralytics import YOLO
+
+    torch.set_num_threads(num_threads)
+    model = YOLO(model_path, task="detect")  # .pt, ONNX ya da OpenVINO klasörü
+    model(np.zeros((YOLO_WARMUP_IMGSZ, YOLO_WARMUP_IMGSZ, 3), dtype=np.uint8), verbose=False)
+    conn.send(("ready", os.getpid(), model.names))
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break  # API süreci kapandı
+        if task is None:
+            break
+        task_id, images = task
+        try:
+            results = model(images, batch=len(images), verbose=False)
+            payload = [(r.boxes.data.cpu().numpy(), r.speed) for r in results]
+            conn.send(("done", task_id, payload))
+        except Exception as e:
+            conn.send(("error", task_id, f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    def __init__(self, worker_id, cpus):
+        self.worker_id = worker_id
+        self.cpus = cpus
+        self.process = None
+        self.conn = None
+        self.generation = 0
+        self.pid = None
+        self.ready = False
+        self.started_at = 0.0
+        self.task = None  # (task_id, future, başlama zamanı)
+        self.tasks_done = 0
+        self.restarts = 0
+
+
+class WorkerPool:
+    """
+    Her biri modelin kendi kopyasını tutan inference süreçleri havuzu.
+    - Süreçler spawn ile başlar (torch + fork güvenli değil) ve warm-up sonrası trafik alır.
+    - Her worker'a aynı anda tek batch verilir; boştaki worker'lar bir kuyrukta bekler.
+    - Ölen ya da YOLO_WORKER_TIMEOUT_SECONDS içinde cevap vermeyen worker yeniden başlatılır,
+      üzerindeki batch hata ile sonuçlanır.
+    """
+
+    def __init__(self, model_path, num_workers=YOLO_WORKERS, threads_per_worker=YOLO_WORKER_THREADS,
+                 pin_cpus=YOLO_WORKER_PIN_CPUS, task_timeout=YOLO_WORKER_TIMEOUT_SECONDS):
+        self.model_path = model_path
+        self.num_workers = max(1, num_workers)
+        cpu_count = os.cpu_count() or 1
+        self.threads_per_worker = threads_per_worker or max(1, cpu_count // self.num_workers)
+        self.task_timeout = task_timeout
+        self._context = multiprocessing.get_context("spawn")
+        self._workers = [
+            _Worker(i, self._cpu_set(i, cpu_count) if pin_cpus else None)
+            for i in range(self.num_workers)
+        ]
+        self._idle = Queue()
+        self._lock = threading.Lock()
+        self._task_ids = itertools.count()
+        self._names = None
+        self._monitor = None
+        self._closed = False
+
+    def start(self):
+        """Worker'ları başlatır (tekrar çağrılırsa bir şey yapmaz). Model yüklemesi arka planda sürer."""
+        with self._lock:
+            if self._monitor is not None:
+                return
+            for worker in self._workers:
+                self._spawn(worker)
+            self._monitor = threading.Thread(target=self._run_monitor, name="yolo-pool-monitor", daemon=True)
+            self._monitor.start()
+        atexit.register(self.shutdown)
+
+    def predict(self, images: list) -> list:
+        """Batch'i boştaki bir worker'a gönderir ve ultralytics Results listesi döner (bloklar)."""
+        self.start()
+        deadline = time.monotonic() + self.task_timeout
+        while True:
+            try:
+                worker_id, generation = self._idle.get(timeout=max(0.0, deadline - time.monotonic()))
+            except Empty:
+                raise TimeoutError("No YOLO worker became available")
+            worker = self._workers[worker_id]
+            future = Future()
+            with self._lock:
+                if worker.generation != generation or not worker.ready or worker.task is not None:
+                    continue  # Bu arada yeniden başlatılmış worker
+                task_id = next(self._task_ids)
+                worker.task = (task_id, future, time.monotonic())
+                conn = worker.conn
+            try:
+                conn.send((task_id, images))
+            except OSError:
+                pass  # Worker ölmüş; monitor future'ı hata ile kapatır
+            payload = future.result()
+            return [self._build_result(image, boxes, speed) for image, (boxes, speed) in zip(images, payload)]
+
+    def health(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            workers = [
+                {
+                    "worker_id": w.worker_id,
+                    "pid": w.pid,
+                    "alive": bool(w.process and w.process.is_alive()),
+                    "ready": w.ready,
+                    "busy": w.task is not None,
+                    "busy_seconds": round(now - w.task[2], 3) if w.task else 0.0,
+                    "tasks_done": w.tasks_done,
+                    "restarts": w.restarts,
+                    "cpus": sorted(w.cpus) if w.cpus else None,
+                }
+                for w in self._workers
+            ]
+        return {
+            "num_workers": self.num_workers,
+            "threads_per_worker": self.threads_per_worker,
+            "ready_workers": sum(1 for w in workers if w["ready"]),
+            "workers": workers,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            for worker in self._workers:
+                if worker.conn is not None:
+                    try:
+                        worker.conn.send(None)
+                    except OSError:
+                        pass
+            processes = [w.process for w in self._workers if w.process is not None]
+        for process in processes:
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+
+    def _cpu_set(self, worker_id, cpu_count):
+        start = (worker_id * self.threads_per_worker) % cpu_count
+        return {(start + i) % cpu_count for i in range(self.threads_per_worker)}
+
+    def _spawn(self, worker):
+        parent_conn, child_conn = self._context.Pipe()
+        worker.process = self._context.Process(
+            target=_worker_main,
+            args=(worker.worker_id, self.model_path, self.threads_per_worker, worker.cpus, child_conn),
+            name=f"yolo-worker-{worker.worker_id}",
+            daemon=True,
+        )
+        worker.process.start()
+        child_conn.close()
+        worker.conn = parent_conn
+        worker.ready = False
+        worker.pid = worker.process.pid
+        worker.started_at = time.monotonic()
+
+    def _restart(self, worker, reason):
+        """
+        Worker'ın yerine yeni süreç başlatır (kilit altında çağrılır). Eski (süreç, pipe) döner;
+        join kilidi tutmasın diye çağıran onu kilit dışında _reap ile toplar.
+        """
+        logger.warning("yolo_worker_restart worker_id=%s pid=%s reason=%s", worker.worker_id, worker.pid, reason)
+        if worker.task is not None:
+            worker.task[1].set_exception(RuntimeError(f"YOLO worker {worker.worker_id} {reason}"))
+            worker.task = None
+        if worker.process.is_alive():
+            worker.process.kill()
+        retired = (worker.process, worker.conn)
+        worker.generation += 1
+        worker.restarts += 1
+        self._spawn(worker)
+        return retired
+
+    @staticmethod
+    def _reap(retired):
+        """Yeniden başlatılan worker'ların eski süreçlerini bekler ve pipe'larını kapatır (kilit dışında)."""
+        for process, conn in retired:
+            process.join(timeout=5)
+            conn.close()
+
+    def _run_monitor(self):
+        """Worker mesajlarını okur, ölen / takılan worker'ları yeniden başlatır."""
+        while not self._closed:
+            with self._lock:
+                conns = {w.conn: w for w in self._workers if w.conn is not None}
+            for conn in wait(list(conns), timeout=HEALTH_CHECK_INTERVAL):
+                worker = conns[conn]
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    continue  # Süreç ölmüş; aşağıdaki kontrol yeniden başlatır
+                with self._lock:
+                    if worker.conn is conn:
+                        self._handle_message(worker, message)
+
+            now = time.monotonic()
+            retired = []
+            with self._lock:
+                if self._closed:
+                    break
+                for worker in self._workers:
+                    if not worker.process.is_alive():
+                        retired.append(self._restart(worker, f"exited with code {worker.process.exitcode}"))
+                    elif worker.task is not None and now - worker.task[2] > self.task_timeout:
+                        retired.append(self._restart(worker, "timed out"))
+                    elif not worker.ready and now - worker.started_at > self.task_timeout:
+                        retired.append(self._restart(worker, "did not finish warm-up"))
+            # ✅ Eski süreçlerin join'i kilit dışında: predict / health bu sırada bloklanmaz
+            self._reap(retired)
+
+    def _handle_message(self, worker, message):
+        kind = message[0]
+        if kind == "ready":
+            _, worker.pid, self._names = message
+            worker.ready = True
+            logger.info("yolo_worker_ready worker_id=%s pid=%s", worker.worker_id, worker.pid)
+            self._idle.put((worker.worker_id, worker.generation))
+            return
+
+        task_id = message[1]
+        if worker.task is None or worker.task[0] != task_id:
+            return
+        future = worker.task[1]
+        worker.task = None
+        worker.tasks_done += 1
+        if kind == "done":
+            future.set_result(message[2])
+        else:
+            future.set_exception(RuntimeError(message[2]))
+        self._idle.put((worker.worker_id, worker.generation))
+
+    def _build_result(self, image, boxes, speed):
+        import torch
+        from ultralytics.engine.results import Results
+
+        result = Results(orig_img=image, path="", names=self._names, boxes=torch.from_numpy(boxes))
+        result.speed = speed
+        return result
@@ -8,7 +8,9 @@ from ultralytics import YOLO
 
 print(f"Is Cuda available      :{torch.cuda.is_available()}")
 print(f"Number of Cuda devices :{torch.cuda.device_count()}")
-print(f"Name of the GPU        :{torch.cuda.get_device_name(0)}")
+# ✅ GPU yoksa get_device_name(0) hata verir; CPU'da da çalışsın
+if torch.cuda.is_available():
+    print(f"Name of the GPU        :{torch.cuda.get_device_name(0)}")
 
 # Load the YOLO model
 print("Loading YOLO model...")
@@ -1,21 +1,262 @@
+import logging
 import os
-from ultralytics import YOLO
+import threading
+import time
+from concurrent.futures import Future
+from queue import Queue, Empty
+import numpy as np
+from yolo.annotation_store import annotation_store, image_key as compute_image_key
+from yolo.worker_pool import WorkerPool, YOLO_WORKERS, YOLO_WARMUP_IMGSZ
+from yolo.model_backends import YOLO_BACKEND, load_model, model_path_for
+from yolo.tiling import YOLO_INFERENCE_MODE, plan_tiles, crop_tiles, merge_tile_results
+from common.metrics import stage, observe_queue_depth
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-MODEL_PATH = os.path.join(BASE_DIR, "yolo", "yolov8s_50epochs.pt")
+logger = logging.getLogger(__name__)
 
-yolo_model = YOLO(MODEL_PATH)
+# ✅ Micro-batching ayarları (ortam değişkenleriyle ayarlanabilir)
+YOLO_MAX_BATCH_SIZE = int(os.getenv("YOLO_MAX_BATCH_SIZE", "8"))
+YOLO_MAX_WAIT_MS = float(os.getenv("YOLO_MAX_WAIT_MS", "5"))
 
-def classify_image(image_path: str):
+# ✅ Model import sırasında değil, ilk kullanımda (ya da startup warm-up'ında) yüklenir.
+# YOLO_WORKERS > 0 ise model ayrı worker süreçlerinde yüklenir, API sürecinde hiç yüklenmez.
+_yolo_model = None
+_worker_pool = None
+_init_lock = threading.Lock()
+
+
+def get_model():
+    """Süreç içi modeli döner; ilk çağrıda ultralytics import edilip ağırlıklar yüklenir."""
+    global _yolo_model
+    if _yolo_model is None:
+        with _init_lock:
+            if _yolo_model is None:
+                _yolo_model = load_model(YOLO_BACKEND)
+    return _yolo_model
+
+
+def get_worker_pool():
+    """Worker havuzunu döner (YOLO_WORKERS <= 0 ise None); süreçler start_workers ile başlar."""
+    global _worker_pool
+    if _worker_pool is None and YOLO_WORKERS > 0:
+        with _init_lock:
+            if _worker_pool is None:
+                _worker_pool = WorkerPool(model_path_for(YOLO_BACKEND), YOLO_WORKERS)
+    return _worker_pool
+
+
+class BatchScheduler:
+    """
+    Eşzamanlı gelen istekleri kısa bir süre bekletip tek bir batch halinde modele gönderir.
+    Batch, max_batch_size'a ulaşınca ya da ilk istekten itibaren max_wait_ms geçince çalışır.
+    concurrency > 1 ise (worker havuzu) o kadar batch aynı anda çalışabilir.
+    """
+
+    def __init__(self, predict_fn, max_batch_size: int = YOLO_MAX_BATCH_SIZE, max_wait_ms: float = YOLO_MAX_WAIT_MS,
+                 concurrency: int = 1):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self.concurrency = max(1, concurrency)
+        self._queue = Queue()
+        self._threads = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._images = 0
+        self._inference_seconds = 0.0
+        self._size_histogram = {}
+
+    def submit(self, image) -> Future:
+        """Resmi kuyruğa ekler, sonucu taşıyacak Future'ı döner."""
+        self._ensure_started()
+        future = Future()
+        observe_queue_depth("yolo_batch", self._queue.qsize())
+        self._queue.put((image, future))
+        return future
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def get_stats(self) -> dict:
+        """Batch doluluk istatistiklerini döner (throughput / p99 ayarı için)."""
+        with self._stats_lock:
+            avg_size = self._images / self._batches if self._batches else 0.0
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "concurrency": self.concurrency,
+                "batches": self._batches,
+                "images": self._images,
+                "avg_batch_size": round(avg_size, 3),
+                "avg_occupancy": round(avg_size / self.max_batch_size, 3),
+                "avg_batch_ms": round(1000 * self._inference_seconds / self._batches, 3) if self._batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._size_histogram.items())),
+                "queue_depth": self.queue_depth(),
+            }
+
+    def _ensure_started(self):
+        if self._threads is not None:
+            return
+        with self._start_lock:
+            if self._threads is None:
+                threads = [
+                    threading.Thread(target=self._run, name=f"yolo-batcher-{i}", daemon=True)
+                    for i in range(self.concurrency)
+                ]
+                for thread in threads:
+                    thread.start()
+                self._threads = threads
+
+    def _collect_batch(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            images = [image for image, _ in batch]
+
+            started = time.perf_counter()
+            try:
+                with stage("yolo", "batch_inference"):
+                    results = self.predict_fn(images)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            elapsed = time.perf_counter() - started
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+            with self._stats_lock:
+                self._batches += 1
+                self._images += len(batch)
+                self._inference_seconds += elapsed
+                self._size_histogram[len(batch)] = self._size_histogram.get(len(batch), 0) + 1
+
+
+def _predict_batch(images: list):
+    """Tek bir batch forward pass çalıştırır (worker havuzunda ya da paylaşılan süreç içi modelde)."""
+    pool = get_worker_pool()
+    if pool is not None:
+        return pool.predict(images)
+    return get_model()(images, batch=len(images), verbose=False)
+
+
+batch_scheduler = BatchScheduler(_predict_batch, concurrency=max(1, YOLO_WORKERS))
+
+
+def start_workers():
+    """Worker havuzunu (varsa) başlatır; warm-up arka planda sürer."""
+    pool = get_worker_pool()
+    if pool is not None:
+        pool.start()
+
+
+def warm_up():
+    """
+    Modeli trafik gelmeden önce hazırlar (startup'ta arka plan thread'inde çağrılır).
+    Süreç içi modda ağırlıklar yüklenip boş bir resimle ilk inference yapılır.
+    """
+    if YOLO_WORKERS > 0:
+        start_workers()
+        return
+    started = time.perf_counter()
+    get_model()(np.zeros((YOLO_WARMUP_IMGSZ, YOLO_WARMUP_IMGSZ, 3), dtype=np.uint8), verbose=False)
+    logger.info("yolo_warmup_done backend=%s seconds=%.2f", YOLO_BACKEND, time.perf_counter() - started)
+
+
+def is_ready() -> bool:
+    """Model yüklenmiş (havuz modunda en az bir worker warm-up'ı bitirmiş) ise True."""
+    if YOLO_WORKERS > 0:
+        return _worker_pool is not None and _worker_pool.health()["ready_workers"] > 0
+    return _yolo_model is not None
+
+
+def _submit(image):
+    """
+    Resmi batch_scheduler'a verir ve sonucu bekleyen bir fonksiyon döner.
+    adaptive modda büyük resimler parçalara bölünür; parçalar ve tüm resim
+    aynı batch'lerde işlenip kutular NMS ile birleştirilir.
+    """
+    plan = plan_tiles(image)
+    if plan is None:
+        return batch_scheduler.submit(image).result
+
+    tiled_image, grid, scale = plan
+    full_future = batch_scheduler.submit(image)
+    tile_futures = [batch_scheduler.submit(tile) for tile in crop_tiles(tiled_image, grid)]
+    return lambda: merge_tile_results(
+        image, full_future.result(), [future.result() for future in tile_futures], grid, scale
+    )
+
+
+def classify_image(image, image_key: str = None):
     """
     YOLOv8 modelini kullanarak bir resmi sınıflandırır.
-    :param image_path: Resmin dosya yolu
-    :return: YOLO results objesi
+    İstek batch_scheduler üzerinden diğer eşzamanlı isteklerle birlikte işlenir.
+    Boxlu görsel burada çizilmez; sonuç annotation_store'a bırakılır ve URL ilk istendiğinde çizilir.
+    :param image: (H, W, 3) uint8 resim dizisi
+    :param image_key: Girdi resminin hash'i (verilmezse dizinin içeriğinden hesaplanır)
+    :return: (YOLO results objesi, boxlu görselin URL'i)
     """
-    results = yolo_model(image_path)
+    result = _submit(image)()
+
+    # ✅ Her resme özel, içerik hash'li URL
+    boxed_image_url = annotation_store.put(image_key or compute_image_key(image), result)
+
+    return result, boxed_image_url
+
+
+def classify_images(images: list, image_keys: list = None) -> list:
+    """
+    Birden fazla resmi sınıflandırır. Resimler kuyruğa art arda eklendiği için
+    (max_batch_size'a kadar) aynı forward pass'te işlenir.
+    :param images: (H, W, 3) uint8 resim dizileri
+    :param image_keys: Her resmin hash'i (verilmezse içerikten hesaplanır)
+    :return: Her resim için (YOLO results objesi, boxlu görselin URL'i)
+    """
+    image_keys = image_keys or [None] * len(images)
+    pending = [_submit(image) for image in images]
+
+    classified = []
+    for image, key, wait_result in zip(images, image_keys, pending):
+        result = wait_result()
+        classified.append((result, annotation_store.put(key or compute_image_key(image), result)))
+    return classified
+
+
+def annotate_boxes(image, boxes, names: dict, image_key: str = None) -> str:
+    """
+    Daha önce bulunmuş kutuları (N, 6) verilen resim için annotation_store'a kaydeder; model çalışmaz.
+    Near-duplicate cache isabetinde boxlu görsel eski yüklemenin değil bu resmin üzerine çizilsin diye.
+    :return: Boxlu görselin URL'i
+    """
+    import torch
+    from ultralytics.engine.results import Results
+
+    result = Results(orig_img=image, path="", names=names, boxes=torch.from_numpy(boxes))
+    return annotation_store.put(image_key or compute_image_key(image), result)
+
+
+def get_batch_stats() -> dict:
+    return batch_scheduler.get_stats()
 
-    # ✅ boxlu görseli static klasörüne kaydediyoruz
-    os.makedirs("static", exist_ok=True)
-    results[0].save(filename="static/boxed.jpg")
 
-    return results[0]  # ilk (ve tek) sonucu döndürüyoruz
+def get_worker_health() -> dict:
+    """Worker havuzunun sağlık durumu (havuz yoksa in-process mod bilgisi)."""
+    pool = get_worker_pool()
+    if pool is None:
+        return {"num_workers": 0, "mode": "in-process", "backend": YOLO_BACKEND, "inference_mode": YOLO_INFERENCE_MODE,
+                "model_loaded": _yolo_model is not None}
+    return {"mode": "worker-pool", "backend": YOLO_BACKEND, "inference_mode": YOLO_INFERENCE_MODE, **pool.health()}